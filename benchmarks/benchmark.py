@@ -0,0 +1,234 @@
+"""
+Times the planner and the map at growing radii, and checks the numbers against a stored baseline.
+
+    poetry run python benchmarks/benchmark.py
+    poetry run python benchmarks/benchmark.py --update-baseline
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from lod_hopper.lod_hopper import get_all_teleporation_rings, load_line
+from lod_hopper.plan import teleport_plan_build
+from lod_hopper.grid_display import (
+    grid_data_initialize,
+    grid_data_add_visited,
+    grid_data_fit_level,
+    grid_data_pyramid,
+    grid_data_to_lines,
+    grid_data_to_string,
+)
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+RESULTS_VERSION = 1
+
+DEFAULT_RADII = (1000, 10000, 50000, 100000, 200000)
+DEFAULT_BLOCKS_PER_TP = (100,)
+
+# Single cell updates are timed over this many calls, like the first stretch of a run
+VISITED_CALLS = 10000
+
+# One frame of a big terminal
+FRAME_ROWS = 60
+FRAME_CELLS = 120
+
+# Differences smaller than these are noise, whatever the ratio
+MIN_SECONDS_DIFFERENCE = 0.005
+MIN_BYTES_DIFFERENCE = 1 << 20
+
+
+@dataclass
+class Stage:
+    name: str
+    # Builds the stage's input from radius and blocks per teleport. Not measured.
+    prepare: Callable[[int, int], tuple]
+    run: Callable[..., object]
+    # Stages that keep a Python object per coordinate or per cell only run up to here
+    max_radius: Optional[int] = None
+
+
+@dataclass
+class Result:
+    stage: str
+    radius: int
+    blocks_per_tp: int
+    seconds: float
+    peak_bytes: int
+
+
+def prepare_nothing(radius: int, blocks_per_tp: int) -> tuple:
+    return radius, blocks_per_tp
+
+
+def prepare_plan(radius: int, blocks_per_tp: int) -> tuple:
+    plan = teleport_plan_build(radius, 0, blocks_per_tp)
+
+    return plan.x, plan.z, blocks_per_tp
+
+
+def prepare_grid(radius: int, blocks_per_tp: int) -> tuple:
+    plan = teleport_plan_build(radius, 0, blocks_per_tp)
+
+    return (grid_data_initialize(plan.x, plan.z, blocks_per_tp),)
+
+
+def prepare_pyramid(radius: int, blocks_per_tp: int) -> tuple:
+    (grid_data,) = prepare_grid(radius, blocks_per_tp)
+    grid_data_pyramid(grid_data)
+
+    return (grid_data,)
+
+
+def build_pyramid(grid_data) -> None:
+    grid_data.pyramid = None
+    grid_data_pyramid(grid_data)
+
+
+def fitted_lines(grid_data) -> None:
+    level = grid_data_fit_level(grid_data, FRAME_ROWS, FRAME_CELLS)
+    grid_data_to_lines(grid_data, max_rows=FRAME_ROWS, max_cells=FRAME_CELLS, level=level)
+
+
+def add_visited(grid_data) -> None:
+    for index in range(min(VISITED_CALLS, len(grid_data.x))):
+        grid_data_add_visited(grid_data, index)
+
+
+STAGES = (
+    Stage("legacy_rings", prepare_nothing, lambda radius, blocks_per_tp: list(get_all_teleporation_rings(radius, 0, blocks_per_tp)), max_radius=20000),
+    Stage("load_line", prepare_nothing, lambda radius, blocks_per_tp: load_line(-radius, radius, blocks_per_tp)),
+    Stage("plan_build", prepare_nothing, lambda radius, blocks_per_tp: teleport_plan_build(radius, 0, blocks_per_tp)),
+    Stage("grid_initialize", prepare_plan, grid_data_initialize),
+    Stage("grid_add_visited", prepare_grid, add_visited),
+    Stage("grid_to_lines", prepare_grid, lambda grid_data: grid_data_to_lines(grid_data, max_rows=FRAME_ROWS, max_cells=FRAME_CELLS)),
+    Stage("pyramid_build", prepare_grid, build_pyramid),
+    Stage("pyramid_visited", prepare_pyramid, add_visited),
+    Stage("pyramid_to_lines", prepare_pyramid, fitted_lines),
+    Stage("grid_to_string", prepare_grid, grid_data_to_string, max_radius=50000),
+)
+
+
+def measure(stage: Stage, radius: int, blocks_per_tp: int, repeats: int) -> Result:
+    """Best time out of the repeats, then peak memory from one more run with tracemalloc on."""
+    arguments = stage.prepare(radius, blocks_per_tp)
+    best = float("inf")
+
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        stage.run(*arguments)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    stage.run(*arguments)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return Result(stage=stage.name, radius=radius, blocks_per_tp=blocks_per_tp, seconds=best, peak_bytes=peak_bytes)
+
+
+def run_benchmarks(radii: List[int], blocks_per_tp: List[int], repeats: int, stages: Tuple[Stage, ...] = STAGES) -> List[Result]:
+    results = []
+
+    for blocks in blocks_per_tp:
+        for radius in radii:
+            for stage in stages:
+                if stage.max_radius is not None and radius > stage.max_radius:
+                    continue
+
+                result = measure(stage, radius, blocks, repeats)
+                print(f"{stage.name:<18}{radius:>8}{blocks:>6}{result.seconds * 1000:>12.2f} ms{result.peak_bytes / 1e6:>10.1f} MB", flush=True)
+                results.append(result)
+
+    return results
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def results_save(path: Path, results: List[Result]) -> None:
+    path.write_text(json.dumps({
+        "version": RESULTS_VERSION,
+        "environment": environment(),
+        "results": [asdict(result) for result in results],
+    }, indent=2) + "\n")
+
+
+def results_load(path: Path) -> List[Result]:
+    return [Result(**result) for result in json.loads(path.read_text())["results"]]
+
+
+def compare(results: List[Result], baseline: List[Result], threshold: float) -> List[str]:
+    """A line for every result that got more than threshold times slower or bigger than its baseline."""
+    baseline_by_key = {(result.stage, result.radius, result.blocks_per_tp): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        before = baseline_by_key.get((result.stage, result.radius, result.blocks_per_tp))
+        if before is None:
+            continue
+
+        if result.seconds > before.seconds * threshold and result.seconds - before.seconds > MIN_SECONDS_DIFFERENCE:
+            regressions.append(
+                f"{result.stage} at radius {result.radius}: {result.seconds * 1000:.2f} ms, was {before.seconds * 1000:.2f} ms"
+            )
+
+        if result.peak_bytes > before.peak_bytes * threshold and result.peak_bytes - before.peak_bytes > MIN_BYTES_DIFFERENCE:
+            regressions.append(
+                f"{result.stage} at radius {result.radius}: {result.peak_bytes / 1e6:.1f} MB, was {before.peak_bytes / 1e6:.1f} MB"
+            )
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the planner and the map")
+    parser.add_argument("--radii", type=int, nargs="+", default=list(DEFAULT_RADII))
+    parser.add_argument("--blocks-per-tp", type=int, nargs="+", default=list(DEFAULT_BLOCKS_PER_TP))
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per measurement, the fastest counts (default: 3)")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"), help="Where to write the results")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=1.5, help="Slowdown or growth that counts as a regression (default: 1.5)")
+    parser.add_argument("--update-baseline", action="store_true", help="Save these results as the new baseline")
+    args = parser.parse_args()
+
+    print(f"{'Stage':<18}{'Radius':>8}{'Step':>6}{'Time':>15}{'Peak':>13}")
+    results = run_benchmarks(args.radii, args.blocks_per_tp, args.repeats)
+    results_save(args.output, results)
+
+    if args.update_baseline:
+        results_save(args.baseline, results)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline} to compare with")
+        return 0
+
+    regressions = compare(results, results_load(args.baseline), args.threshold)
+
+    if regressions:
+        print(f"\n{len(regressions)} regressions past {args.threshold}x the baseline:")
+        print("\n".join(f"  {regression}" for regression in regressions))
+        return 1
+
+    print(f"\nNo regressions past {args.threshold}x the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import math
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Sequence
+import numpy as np
+from lod_hopper.eta import chunks_per_teleport
+from lod_hopper.schemas import Blocks
+
+CHUNK_SIZE = 16
+
+# Spacings tried, as multiples of --blocks-per-tp
+SPACING_FACTORS = (0.5, 0.75, 1, 1.25, 1.5, 2)
+
+DEFAULT_PROBES = 4
+
+# Every spacing probes its own row this far from the others, past any render distance,
+# so chunks loaded by one row don't make the next one look faster
+ROW_GAP = 1024
+
+# The recommended wait covers this share of the measured ones, with some room to spare
+DWELL_QUANTILE = 0.9
+DWELL_MARGIN = 1.25
+
+
+class CalibrationError(Exception):
+    pass
+
+
+@dataclass
+class ProbeRow:
+    spacing: Blocks
+    x: np.ndarray
+    z: np.ndarray
+
+
+@dataclass
+class SpacingResult:
+    spacing: Blocks
+    # Seconds until chunk loading settled after each probe, or the fixed wait without a log
+    settle_seconds: List[float]
+    command_seconds: List[float]
+    # Whether the region files have every chunk between the probes, None when they weren't checked
+    covered: Optional[bool]
+    # Wait that would have done for every probe (or nearly), and the chunks per second it gives
+    dwell_seconds: float
+    chunks_per_second: float
+
+
+@dataclass
+class Calibration:
+    blocks_per_tp: Blocks
+    seconds_per_tp: float
+    results: List[SpacingResult]
+
+
+def calibration_spacings(blocks_per_tp: int, checked: bool) -> List[Blocks]:
+    """
+    Spacings to try around blocks_per_tp, in whole chunks. Without region files to check for
+    holes, nothing wider than blocks_per_tp is tried, since nothing would catch the holes.
+    """
+    factors = SPACING_FACTORS if checked else [factor for factor in SPACING_FACTORS if factor <= 1]
+    spacings = {max(round(blocks_per_tp * factor / CHUNK_SIZE), 1) * CHUNK_SIZE for factor in factors}
+
+    return [Blocks(spacing) for spacing in sorted(spacings)]
+
+
+def probe_rows(spacings: Sequence[Blocks], probes: int, start_x: Blocks, start_z: Blocks) -> List[ProbeRow]:
+    """A row of probes spacing apart for every spacing, going south from the start one row at a time."""
+    rows = []
+    z = start_z
+
+    for spacing in spacings:
+        # Probes sit in the middle of a chunk, like the plans built from view distance
+        x = start_x + spacing // 2 + spacing * np.arange(probes)
+        x = x // CHUNK_SIZE * CHUNK_SIZE + CHUNK_SIZE // 2
+        row_z = (z + spacing // 2) // CHUNK_SIZE * CHUNK_SIZE + CHUNK_SIZE // 2
+        rows.append(ProbeRow(spacing=spacing, x=x.astype(np.int32), z=np.full(probes, row_z, dtype=np.int32)))
+        z += spacing + ROW_GAP
+
+    return rows
+
+
+def recommended_dwell(settle_seconds: Sequence[float], measured: bool) -> float:
+    """A fixed wait long enough for nearly every probe, rounded up to a tenth of a second."""
+    if not measured:
+        return max(settle_seconds)
+
+    dwell = float(np.quantile(settle_seconds, DWELL_QUANTILE)) * DWELL_MARGIN
+
+    return math.ceil(round(dwell * 10, 6)) / 10
+
+
+def spacing_result(
+    spacing: Blocks,
+    settle_seconds: Sequence[float],
+    command_seconds: Sequence[float],
+    covered: Optional[bool],
+    measured: bool,
+) -> SpacingResult:
+    dwell = recommended_dwell(settle_seconds, measured)
+    seconds_per_teleport = dwell + float(np.mean(command_seconds))
+
+    return SpacingResult(
+        spacing=spacing,
+        settle_seconds=list(settle_seconds),
+        command_seconds=list(command_seconds),
+        covered=covered,
+        dwell_seconds=dwell,
+        chunks_per_second=chunks_per_teleport(spacing) / max(seconds_per_teleport, 1e-9),
+    )
+
+
+def calibration_pick(results: List[SpacingResult]) -> Calibration:
+    """The spacing and wait that load the most chunks per second, of those that left no holes."""
+    usable = [result for result in results if result.covered is not False]
+
+    if not usable:
+        raise CalibrationError("every spacing tried left holes, try a longer --max-dwell or a smaller --blocks-per-tp")
+
+    best = max(usable, key=lambda result: result.chunks_per_second)
+
+    return Calibration(blocks_per_tp=best.spacing, seconds_per_tp=best.dwell_seconds, results=results)
+
+
+def calibration_to_profile(calibration: Calibration, **details) -> dict:
+    """What a profile keeps: the settings runs use, plus every measurement behind them."""
+    return {
+        "blocks_per_tp": int(calibration.blocks_per_tp),
+        "seconds_per_tp": calibration.seconds_per_tp,
+        **details,
+        "results": [asdict(result) for result in calibration.results],
+    }
+
+
+def calibration_lines(calibration: Calibration) -> List[str]:
+    lines = [f"{'Spacing':>8}{'Wait':>9}{'Holes':>8}{'Chunks/s':>11}"]
+
+    for result in calibration.results:
+        holes = {None: "?", True: "no", False: "yes"}[result.covered]
+        chosen = "  <-" if result.spacing == calibration.blocks_per_tp else ""
+        lines.append(f"{result.spacing:>8}{result.dwell_seconds:>8.1f}s{holes:>8}{result.chunks_per_second:>11.1f}{chosen}")
+
+    return lines
@@ -0,0 +1,472 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+from lod_hopper.dwell import DEFAULT_ACTIVITY_PATTERN
+from lod_hopper.profiles import (
+    DEFAULT_PROFILE,
+    ProfileError,
+    profile_dir,
+    profile_load,
+    profile_path,
+    profile_settings,
+)
+
+# Only the standard library is imported up here. Everything else is imported by the command
+# that needs it, so --help, status and planning start without loading asyncio or the
+# keyboard and mouse backends, and work without a display.
+
+# Same values as ShapeKind, Packing, Traversal and WorldDimension, which would bring numpy along
+SHAPES = ("square", "circle")
+PACKINGS = ("square", "hex")
+ORDERS = ("rings", "hilbert", "serpentine", "region")
+DIMENSIONS = ("overworld", "nether", "end")
+
+COMMANDS = {
+    "run": "Teleport through the area. The same as giving no command",
+    "plan": "Plan the area and show how long running it would take, without running it",
+    "simulate": "Run without the game, on a virtual clock. The same as run --simulate",
+    "export": "Save the plan to a .npz file, to look at with numpy or run later with --import-plan",
+    "datapack": "Turn the plan into a datapack that teleports a player through it on the server by itself",
+    "status": "Show how far the run saved in a journal got",
+    "calibrate": "Time a few probe teleports to find the --blocks-per-tp and --seconds-per-tp that load chunks fastest, "
+    "and save them to a profile",
+}
+
+DESCRIPTION = """Script for loading a wide area in Minecraft.
+Created for the purpose of generating "LODs" for the "Distant Horizons" mod on servers."""
+
+
+def add_area_arguments(parser: argparse.ArgumentParser) -> None:
+    """What decides the plan: the area, and how it is covered and ordered."""
+    parser.add_argument(
+        "-r",
+        "--desired-radius",
+        type=int,
+        help="Desired radius to be loaded (required, unless --polygon, --jobs or --import-plan gives the area)",
+    )
+
+    parser.add_argument(
+        "-e",
+        "--exclude",
+        type=int,
+        default=0,
+        help="Exclude any inner radius already completed (default: 0)",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--seconds-per-tp",
+        type=float,
+        default=3,
+        help="Seconds to wait per teleport - shorter if you have a faster PC (default: 3)",
+    )
+
+    parser.add_argument(
+        "-b",
+        "--blocks-per-tp",
+        type=int,
+        default=100,
+        help="Radius of blocks loaded per teleport jump (default: 100)",
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="NAME",
+        help="Use the --blocks-per-tp and --seconds-per-tp that calibrate saved under NAME, unless they are given too "
+        f"(calibrate saves to '{DEFAULT_PROFILE}' without it)",
+    )
+
+    parser.add_argument(
+        "-y",
+        "--height",
+        type=int,
+        default=180,  # Just below the clouds
+        help="Your Y axis coordinate each time you teleport (default: 180)",
+    )
+
+    parser.add_argument(
+        "--shape",
+        choices=SHAPES,
+        default="square",
+        help="Shape of the area within --desired-radius, and of the --exclude one within it. "
+        "A 'circle' skips the corners a 'square' loads (default: square)",
+    )
+
+    parser.add_argument(
+        "--polygon",
+        type=Path,
+        help="File with the corners of the area to load instead, one 'x,z' per line",
+    )
+
+    parser.add_argument(
+        "--exclude-polygon",
+        type=Path,
+        help="File with the corners of an area inside it to leave out instead of --exclude, one 'x,z' per line",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=Path,
+        help="TOML (or .json) file of several areas to load one after the other, "
+        "each with its own dimension, height and --seconds-per-tp, as one run",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--view-distance",
+        type=int,
+        help="Plan teleports from your render distance in chunks instead of --blocks-per-tp, "
+        "using as few teleports as it takes to see every chunk once",
+    )
+
+    parser.add_argument(
+        "--packing",
+        choices=PACKINGS,
+        default="square",
+        help="With --view-distance, 'square' for the square of chunks the client loads, "
+        "or 'hex' for a circular simulation distance (default: square)",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--order",
+        choices=ORDERS,
+        default="rings",
+        help="Order to visit the teleports in: 'rings' from the outside in, a 'hilbert' curve, "
+        "'serpentine' rows, or one 'region' file at a time (default: rings)",
+    )
+
+    parser.add_argument(
+        "--plan-cache",
+        type=Path,
+        help="Folder finished plans are kept in, so planning the same area again is instant (default: ~/.cache/lod_hopper)",
+    )
+
+    parser.add_argument(
+        "--no-plan-cache",
+        action="store_true",
+        help="Always plan from scratch, without reading or writing the plan cache",
+    )
+
+    parser.add_argument(
+        "--import-plan",
+        type=Path,
+        help="Run a plan saved with --export-plan instead of planning one",
+    )
+
+
+def add_journal_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "-j",
+        "--journal",
+        type=Path,
+        default=Path("lod_hopper.journal"),
+        help="File progress is saved to after every teleport (default: lod_hopper.journal)",
+    )
+
+
+def add_run_arguments(parser: argparse.ArgumentParser) -> None:
+    """How the plan is run: the game, the waiting, the journal and the world."""
+    parser.add_argument(
+        "-nov",
+        "--no-visualization",
+        action="store_true",
+        help="Will turn off map visualization, which is enabled by default.",
+    )
+
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=10,
+        help="Most times per second the status screen is redrawn (default: 10)",
+    )
+
+    parser.add_argument(
+        "-l",
+        "--log-file",
+        type=Path,
+        help="Log to watch for chunk loading (latest.log, a server log or a Distant Horizons log). "
+        "Each teleport moves on as soon as the log goes quiet instead of waiting --seconds-per-tp",
+    )
+
+    parser.add_argument(
+        "--min-dwell",
+        type=float,
+        default=0.5,
+        help="With --log-file, fewest seconds to wait per teleport (default: 0.5)",
+    )
+
+    parser.add_argument(
+        "--max-dwell",
+        type=float,
+        default=10,
+        help="With --log-file, most seconds to wait per teleport (default: 10)",
+    )
+
+    parser.add_argument(
+        "--quiet-period",
+        type=float,
+        default=1,
+        help="With --log-file, seconds without chunk activity before moving on (default: 1)",
+    )
+
+    parser.add_argument(
+        "--log-pattern",
+        default=DEFAULT_ACTIVITY_PATTERN,
+        help="With --log-file, regex matching log lines that count as chunk activity",
+    )
+
+    parser.add_argument(
+        "--rcon",
+        metavar="HOST[:PORT]",
+        help="Send teleports over RCON instead of typing them in chat (default port: 25575)",
+    )
+
+    parser.add_argument(
+        "--rcon-password",
+        help="RCON password, also read from the LOD_HOPPER_RCON_PASSWORD environment variable",
+    )
+
+    parser.add_argument(
+        "-p",
+        "--player",
+        help="With --rcon, name of the player to teleport",
+    )
+
+    parser.add_argument(
+        "--players",
+        metavar="NAME,NAME,...",
+        help="With --rcon, teleport several players at once, each through their own part of the area",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue a run from its journal, right where it stopped. Use the same options as that run",
+    )
+
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Start over, replacing the journal an earlier run left behind",
+    )
+
+    parser.add_argument(
+        "--export-plan",
+        type=Path,
+        help="Save the plan to a .npz file, to look at with numpy or run later with --import-plan, and quit",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--world",
+        type=Path,
+        help="World folder (with the level.dat) to check first, skipping teleports whose chunks were all generated already",
+    )
+
+    parser.add_argument(
+        "-d",
+        "--dimension",
+        choices=DIMENSIONS,
+        default="overworld",
+        help="With --world, dimension to check (default: overworld)",
+    )
+
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="With --world, check the region files once done and fly over any holes the run left",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="With --verify, most retry passes over the holes (default: 2)",
+    )
+
+    parser.add_argument(
+        "--metrics-dir",
+        type=Path,
+        help="Folder to keep writing timings to, as JSON lines and as a Prometheus textfile for node_exporter",
+    )
+
+    parser.add_argument(
+        "--status-port",
+        type=int,
+        metavar="PORT",
+        help="Serve the progress as JSON and the map as a PNG on http://127.0.0.1:PORT, where the run can also be paused and resumed",
+    )
+
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="Run without the game: keys and text are only recorded, and waiting is skipped on a virtual clock",
+    )
+
+    parser.add_argument(
+        "--simulate-pause",
+        metavar="AT:SECONDS",
+        action="append",
+        default=[],
+        help="With --simulate, press CTRL+P at AT simulated seconds and again SECONDS later. Can be given more than once",
+    )
+
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        help="With --simulate, file to write every key and command to, with its simulated time, as JSON lines",
+    )
+
+
+def add_datapack_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("directory", type=Path, metavar="FOLDER", help="Folder to write the datapack to")
+
+    parser.add_argument(
+        "-p",
+        "--player",
+        required=True,
+        help="Name of the player the datapack teleports",
+    )
+
+    parser.add_argument(
+        "-d",
+        "--dimension",
+        choices=DIMENSIONS,
+        default="overworld",
+        help="Dimension to teleport the player in (default: overworld)",
+    )
+
+    parser.add_argument(
+        "--ticks-per-tp",
+        type=int,
+        help="Game ticks to wait per teleport, 20 to a second (default: --seconds-per-tp in ticks)",
+    )
+
+    parser.add_argument(
+        "--pack-format",
+        type=int,
+        default=48,
+        help="pack_format of the Minecraft version the server runs (default: 48, for 1.21)",
+    )
+
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Check a datapack already in FOLDER against the plan instead of writing one",
+    )
+
+
+def add_calibrate_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--probes",
+        type=int,
+        default=4,
+        help="Teleports made at every spacing tried (default: 4)",
+    )
+
+
+def command_line_parsing(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Command line arguments, with the command in args.command. Without one of the
+    COMMANDS first, the arguments are those of run, like before there were any.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    command = argv.pop(0) if argv and argv[0] in COMMANDS else "run"
+
+    if command == "run":
+        commands = "\n".join(f"  {name:<10}{help}" for name, help in COMMANDS.items())
+        parser = argparse.ArgumentParser(
+            prog="lod_hopper",
+            description=DESCRIPTION,
+            epilog=f"commands (lod_hopper COMMAND --help for theirs):\n{commands}",
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(prog=f"lod_hopper {command}", description=COMMANDS[command])
+
+    if command == "status":
+        add_journal_argument(parser)
+        return parser.parse_args(argv, argparse.Namespace(command=command))
+
+    add_area_arguments(parser)
+
+    if command == "export":
+        parser.add_argument("export_plan", type=Path, metavar="FILE", help="File to save the plan to")
+    elif command == "datapack":
+        add_datapack_arguments(parser)
+    elif command in ("run", "simulate"):
+        add_journal_argument(parser)
+        add_run_arguments(parser)
+    elif command == "calibrate":
+        add_run_arguments(parser)
+        add_calibrate_arguments(parser)
+
+    args = parser.parse_args(argv, argparse.Namespace(command=command, export_plan=None))
+
+    if args.profile is not None or command == "calibrate":
+        args = profile_parsing(parser, argv, args)
+
+    if command == "simulate":
+        args.simulate = True
+
+    if args.desired_radius is None and args.polygon is None and args.jobs is None and args.import_plan is None:
+        parser.error("the following arguments are required: -r/--desired-radius (or --polygon, --jobs or --import-plan)")
+
+    if args.jobs is not None and (args.export_plan is not None or args.import_plan is not None or command == "datapack"):
+        parser.error("--jobs can't be exported or used with --import-plan yet")
+
+    if getattr(args, "resume", False) and args.fresh:
+        parser.error("--resume continues the journal that --fresh replaces, use one or the other")
+
+    if command == "calibrate" and (args.jobs is not None or args.import_plan is not None):
+        parser.error("calibrate probes an area given with -r or --polygon, not --jobs or --import-plan")
+
+    return args
+
+
+def profile_parsing(parser: argparse.ArgumentParser, argv: List[str], args: argparse.Namespace) -> argparse.Namespace:
+    """Parses again with the profile's settings as the defaults, so the ones given on the command line still win."""
+    name = args.profile or DEFAULT_PROFILE
+
+    try:
+        profile = profile_load(profile_path(profile_dir(), name))
+    except ProfileError as error:
+        parser.error(str(error))
+
+    if profile is None:
+        # Calibrating a new profile starts from the usual defaults
+        if args.command != "calibrate":
+            parser.error(f"there is no profile {name!r}, 'lod_hopper calibrate --profile {name}' makes one")
+    else:
+        parser.set_defaults(**profile_settings(profile))
+        args = parser.parse_args(argv, argparse.Namespace(command=args.command, export_plan=None))
+
+    args.profile = name
+
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = command_line_parsing(argv)
+
+    if args.command == "status":
+        from lod_hopper.status import status_main
+        status_main(args)
+    elif args.command in ("plan", "export"):
+        from lod_hopper.planning import plan_main
+        plan_main(args)
+    elif args.command == "datapack":
+        from lod_hopper.planning import datapack_main
+        datapack_main(args)
+    elif args.command == "calibrate":
+        from lod_hopper.lod_hopper import calibrate_main
+        calibrate_main(args)
+    else:
+        from lod_hopper.lod_hopper import run_main
+        run_main(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import heapq
+import itertools
+import selectors
+import threading
+import time
+from typing import Callable, List, Optional, Protocol, Tuple
+
+
+class Clock(Protocol):
+    def sleep(self, seconds: float) -> None:
+        ...
+
+    def monotonic(self) -> float:
+        ...
+
+
+class SystemClock:
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class VirtualClock:
+    """
+    Clock that jumps ahead instead of sleeping, so hours of a run take moments.
+    Scheduled callbacks fire when a sleep passes their time, with the clock set to it.
+    """
+
+    def __init__(self, start: float = 0):
+        self._now = start
+        self._lock = threading.RLock()
+        self._order = itertools.count()
+        self._scheduled: List[Tuple[float, int, Callable[[], None]]] = []
+
+    def monotonic(self) -> float:
+        with self._lock:
+            return self._now
+
+    def schedule(self, at: float, callback: Callable[[], None]) -> None:
+        with self._lock:
+            heapq.heappush(self._scheduled, (at, next(self._order), callback))
+
+    def next_scheduled(self) -> Optional[float]:
+        with self._lock:
+            return self._scheduled[0][0] if self._scheduled else None
+
+    def sleep(self, seconds: float) -> None:
+        with self._lock:
+            wake = self._now + max(seconds, 0)
+
+            while self._scheduled and self._scheduled[0][0] <= wake:
+                at, _, callback = heapq.heappop(self._scheduled)
+                self._now = max(self._now, at)
+                callback()
+
+            self._now = wake
+
+
+class VirtualSelector(selectors.DefaultSelector):
+    """Never blocks: where it would wait, it sleeps the clock instead, stopping at scheduled callbacks."""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout: Optional[float] = None):
+        ready = super().select(0)
+        if ready or timeout == 0:
+            return ready
+
+        now = self._clock.monotonic()
+        scheduled = self._clock.next_scheduled()
+        if scheduled is not None:
+            timeout = scheduled - now if timeout is None else min(timeout, scheduled - now)
+
+        if timeout is None:
+            raise RuntimeError("Nothing is scheduled, so the simulation would wait forever")
+
+        self._clock.sleep(timeout)
+
+        # Scheduled callbacks may have handed work to the loop
+        return super().select(0)
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop on a VirtualClock, so asyncio code runs hours ahead in moments.
+    Work handed to threads runs right away instead, on the same clock.
+    """
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__(VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self) -> float:
+        return self.clock.monotonic()
+
+    def run_in_executor(self, executor, func, *args) -> asyncio.Future:
+        future = self.create_future()
+
+        try:
+            future.set_result(func(*args))
+        except Exception as error:
+            future.set_exception(error)
+
+        return future
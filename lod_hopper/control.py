@@ -0,0 +1,120 @@
+import asyncio
+import time
+from typing import Callable, Optional
+from lod_hopper.eta import RunClock
+from lod_hopper.metrics import Metrics
+
+
+class RunStopped(Exception):
+    """Raised in everything waiting on a run once it is stopped."""
+
+
+class RunControl:
+    """
+    Pause, resume, skip and stop for a run on an asyncio loop, as events the run awaits.
+    Only call it from the loop's thread. Other threads (like pynput's) hand calls over
+    with loop.call_soon_threadsafe.
+    """
+
+    def __init__(
+        self,
+        paused: bool = False,
+        monotonic: Callable[[], float] = time.monotonic,
+        on_change: Optional[Callable[[], None]] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        # Stands still while paused, for measuring speed and dwells
+        self.clock = RunClock(paused=paused, monotonic=monotonic)
+        self.stopped = False
+        self._on_change = on_change
+        self._metrics = metrics
+        self._running = asyncio.Event()
+        self._changed = asyncio.Event()
+        self._skips = 0
+
+        if not paused:
+            self._running.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def pause(self) -> None:
+        if self.paused or self.stopped:
+            return
+
+        self._running.clear()
+        self.clock.pause()
+        self._change()
+
+    def resume(self) -> None:
+        if not self.paused:
+            return
+
+        self._running.set()
+        self.clock.resume()
+        self._change()
+
+    def toggle_pause(self) -> None:
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def skip(self) -> None:
+        """Ends the waits going on right now, so the next teleport goes out."""
+        self._skips += 1
+        self._change()
+
+    def stop(self) -> None:
+        self.stopped = True
+        self.resume()
+        self._change()
+
+    def _change(self) -> None:
+        # Wakes everyone waiting on this change, later waits get a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+        if self._on_change is not None:
+            self._on_change()
+
+    async def wait_running(self) -> None:
+        """Returns right away unless paused, and the moment the run is resumed if it is."""
+        if self.paused:
+            if self._metrics is None:
+                await self._running.wait()
+            else:
+                with self._metrics.timer("pause"):
+                    await self._running.wait()
+
+        if self.stopped:
+            raise RunStopped()
+
+    async def sleep(self, seconds: float) -> bool:
+        """
+        Waits for seconds of unpaused time: pausing holds the time left until resumed.
+        False if a skip cut it short.
+        """
+        loop = asyncio.get_running_loop()
+        skips = self._skips
+        remaining = seconds
+
+        while True:
+            await self.wait_running()
+
+            if self._skips != skips:
+                return False
+
+            if remaining <= 0:
+                return True
+
+            changed = self._changed
+            start = loop.time()
+
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                remaining = 0
+            else:
+                remaining -= loop.time() - start
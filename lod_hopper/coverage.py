@@ -0,0 +1,182 @@
+import math
+from dataclasses import dataclass
+from enum import Enum
+from typing import Tuple
+import numpy as np
+from lod_hopper.plan import (
+    TeleportPlan,
+    get_ring_radii,
+    teleport_plan_from_points,
+)
+from lod_hopper.schemas import Blocks
+
+CHUNK_SIZE = 16
+
+# Past this many chunks across, coverage is only checked in a window around the center
+COVERAGE_CHECK_MAX_CHUNKS = 4096
+
+
+class Packing(Enum):
+    # The client loads a square of chunks around the player
+    square = "square"
+    # Circles of simulation distance, packed in offset rows
+    hex = "hex"
+
+
+@dataclass
+class CoveragePlan:
+    plan: TeleportPlan
+    # Distance between neighbouring points, in blocks (the smaller one, for hex packing)
+    spacing: Blocks
+    # Fraction of the chunks in the area that end up within view distance of a point
+    coverage_ratio: float
+    ring_plan_teleports: int
+
+    @property
+    def teleports_saved(self) -> int:
+        return self.ring_plan_teleports - len(self.plan)
+
+
+def ring_plan_length(desired_radius: Blocks, radius_done: Blocks, blocks_per_tp: int) -> int:
+    """How many teleports `teleport_plan_build` would make, without building it."""
+    radii = get_ring_radii(desired_radius, radius_done, blocks_per_tp)
+
+    return int(np.sum(4 * (np.abs(2 * radii) // blocks_per_tp + 1)))
+
+
+def area_chunks(desired_radius: Blocks, radius_done: Blocks) -> Tuple[int, int, int, int]:
+    """
+    First and last chunk of the area along each axis, and the first and last chunk of the
+    excluded middle (an empty range when nothing is excluded).
+    """
+    low = -desired_radius // CHUNK_SIZE
+    high = desired_radius // CHUNK_SIZE
+
+    # Only chunks entirely inside the excluded radius are skipped
+    excluded_low = -(-(-radius_done) // CHUNK_SIZE)
+    excluded_high = (radius_done + 1) // CHUNK_SIZE - 1
+
+    return low, high, excluded_low, excluded_high
+
+
+def packing_lattice(low: int, high: int, view_distance: int, packing: Packing) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """Chunk x, chunk z and row of every point of a lattice covering low..high on both axes."""
+    span = high - low + 1
+
+    if packing == Packing.square:
+        # Squares tile exactly
+        column_step = row_step = 2 * view_distance + 1
+        row_shift = 0
+        num_rows = num_columns = -(-span // row_step)
+    else:
+        # Circles only cover everything between the outermost rows and columns, so those go past the edges
+        column_step = max(math.floor(math.sqrt(3) * view_distance), 1)
+        row_step = max(math.floor(1.5 * view_distance), 1)
+        row_shift = column_step // 2
+        num_rows = -(-span // row_step) + 1
+        num_columns = -(-span // column_step) + 1
+
+    # Centered so the leftover is split evenly between both edges
+    rows_z = low + (span - (num_rows - 1) * row_step) // 2 + row_step * np.arange(num_rows)
+    columns_x = low + (span - (num_columns - 1) * column_step) // 2 + column_step * np.arange(num_columns)
+
+    row = np.repeat(np.arange(num_rows), num_columns)
+    chunk_x = np.tile(columns_x, num_rows) + (row % 2) * row_shift
+    chunk_z = rows_z[row]
+
+    # Shifted rows can end up with a column that sees nothing of the area
+    inside = (chunk_x >= low - view_distance) & (chunk_x <= high + view_distance)
+
+    return chunk_x[inside], chunk_z[inside], row[inside], min(column_step, row_step)
+
+
+def view_offsets(view_distance: int, packing: Packing) -> Tuple[np.ndarray, np.ndarray]:
+    """Chunk offsets loaded around a player."""
+    dx, dz = np.meshgrid(np.arange(-view_distance, view_distance + 1), np.arange(-view_distance, view_distance + 1))
+
+    if packing == Packing.hex:
+        inside = dx ** 2 + dz ** 2 <= view_distance ** 2
+        return dx[inside], dz[inside]
+
+    return dx.ravel(), dz.ravel()
+
+
+def coverage_ratio(
+    chunk_x: np.ndarray,
+    chunk_z: np.ndarray,
+    view_distance: int,
+    packing: Packing,
+    low: int,
+    high: int,
+    excluded_low: int,
+    excluded_high: int,
+) -> float:
+    # Large areas are checked in a window around the center, the lattice repeats anyway
+    half_window = COVERAGE_CHECK_MAX_CHUNKS // 2
+    low = max(low, -half_window)
+    high = min(high, half_window - 1)
+    size = high - low + 1
+
+    covered = np.zeros((size, size), dtype=bool)
+    near = (chunk_x >= low - view_distance) & (chunk_x <= high + view_distance) & \
+        (chunk_z >= low - view_distance) & (chunk_z <= high + view_distance)
+    columns = chunk_x[near] - low
+    rows = chunk_z[near] - low
+
+    for dx, dz in zip(*view_offsets(view_distance, packing)):
+        column = columns + dx
+        row = rows + dz
+        valid = (column >= 0) & (column < size) & (row >= 0) & (row < size)
+        covered[row[valid], column[valid]] = True
+
+    wanted = np.ones((size, size), dtype=bool)
+    excluded = np.arange(low, high + 1)
+    excluded = (excluded >= excluded_low) & (excluded <= excluded_high)
+    wanted[np.ix_(excluded, excluded)] = False
+
+    return float(np.count_nonzero(covered & wanted) / max(np.count_nonzero(wanted), 1))
+
+
+def coverage_plan_build(
+    desired_radius: Blocks,
+    radius_done: Blocks,
+    view_distance: int,
+    packing: Packing,
+    blocks_per_tp: int,
+) -> CoveragePlan:
+    """
+    Fewest chunk-aligned teleports that bring every chunk of the area within view distance
+    (in chunks), walked row by row in alternating directions.
+    blocks_per_tp is only used to compare against the ring plan.
+    """
+    low, high, excluded_low, excluded_high = area_chunks(desired_radius, radius_done)
+
+    chunk_x, chunk_z, row, spacing = packing_lattice(low, high, view_distance, packing)
+
+    # Points that see nothing but the excluded middle are dropped
+    inside_excluded = (
+        (chunk_x - view_distance >= excluded_low) & (chunk_x + view_distance <= excluded_high) &
+        (chunk_z - view_distance >= excluded_low) & (chunk_z + view_distance <= excluded_high)
+    )
+    chunk_x, chunk_z, row = chunk_x[~inside_excluded], chunk_z[~inside_excluded], row[~inside_excluded]
+
+    # Serpentine: every other row is walked backwards
+    order = np.lexsort((np.where(row % 2 == 1, -chunk_x, chunk_x), row))
+    chunk_x, chunk_z, row = chunk_x[order], chunk_z[order], row[order]
+
+    # Renumber rows from 0, in case whole rows were dropped
+    _, row = np.unique(row, return_inverse=True)
+
+    plan = teleport_plan_from_points(
+        x=chunk_x * CHUNK_SIZE + CHUNK_SIZE // 2,
+        z=chunk_z * CHUNK_SIZE + CHUNK_SIZE // 2,
+        segment=row,
+        segment_name="Row",
+    )
+
+    return CoveragePlan(
+        plan=plan,
+        spacing=Blocks(spacing * CHUNK_SIZE),
+        coverage_ratio=coverage_ratio(chunk_x, chunk_z, view_distance, packing, low, high, excluded_low, excluded_high),
+        ring_plan_teleports=ring_plan_length(desired_radius, radius_done, blocks_per_tp),
+    )
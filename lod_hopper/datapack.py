@@ -0,0 +1,300 @@
+import json
+import re
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Set, Tuple
+import numpy as np
+from lod_hopper.plan import TeleportPlan
+from lod_hopper.schemas import Blocks
+
+NAMESPACE = "lod_hopper"
+# Scoreboard objective, and the fake player holding the index of the next teleport in it
+OBJECTIVE = "lod_hopper"
+STEP = "#step"
+
+# Entries per function file. Every tick checks at most this many at each level of the tree,
+# so even millions of teleports only take a few hundred checks to find the next one
+FAN_OUT = 256
+
+# Game ticks in a second, when the server keeps up
+TICKS_PER_SECOND = 20
+
+# 1.21, the first version with singular "function" folders
+DEFAULT_PACK_FORMAT = 48
+SINGULAR_FOLDERS_FORMAT = 45
+
+DESCRIPTION_PREFIX = "LOD Hopper:"
+
+_MATCHES = rf"execute if score {STEP} {OBJECTIVE} matches"
+_NODE_LINE = re.compile(rf"{_MATCHES} (\d+)\.\.(\d+) run function {NAMESPACE}:(\S+)")
+_LEAF_LINE = re.compile(rf"{_MATCHES} (\d+) in (\S+) run tp (\S+) (-?\d+) (-?\d+) (-?\d+)")
+_ROOT_LINE = re.compile(rf"function {NAMESPACE}:(\S+)")
+_SCHEDULE_LINE = re.compile(rf"{_MATCHES} \.\.(\d+) run schedule function {NAMESPACE}:tick (\d+)t replace")
+
+
+class DatapackError(Exception):
+    pass
+
+
+@dataclass
+class DatapackSettings:
+    # Name (or selector without spaces) of the player to teleport
+    player: str
+    # Dimension id, like minecraft:overworld
+    dimension: str
+    height: Blocks
+    ticks_per_tp: int
+    pack_format: int = DEFAULT_PACK_FORMAT
+
+
+@dataclass
+class DatapackRun:
+    """Everything a datapack makes the server do, read back from its files."""
+    ticks_per_tp: int
+    # Every teleport, in the order the pack makes them
+    x: np.ndarray
+    y: np.ndarray
+    z: np.ndarray
+    players: Set[str]
+    dimensions: Set[str]
+
+
+def _function_folder(pack_format: int) -> str:
+    return "function" if pack_format >= SINGULAR_FOLDERS_FORMAT else "functions"
+
+
+def _tree_levels(num_points: int) -> List[int]:
+    """Number of function files on every level of the tree, from the leaves up to the single root."""
+    levels = [-(-num_points // FAN_OUT)]
+
+    while levels[-1] > 1:
+        levels.append(-(-levels[-1] // FAN_OUT))
+
+    return levels
+
+
+def _step_function(level: int, index: int) -> str:
+    return f"steps/{level}/{index}"
+
+
+def datapack_files(plan: TeleportPlan, settings: DatapackSettings) -> Iterator[Tuple[str, str]]:
+    """
+    Path in the pack and contents of every file, one at a time and always the same for the
+    same plan and settings. The step score picks which teleport each tick makes, through a
+    tree of functions: leaves hold FAN_OUT teleports each, the levels above FAN_OUT functions.
+    """
+    num_points = len(plan)
+    functions = f"data/{NAMESPACE}/{_function_folder(settings.pack_format)}"
+    levels = _tree_levels(num_points)
+    root = _step_function(len(levels) - 1, 0)
+    last = num_points - 1
+    progress = json.dumps([
+        {"text": f"{DESCRIPTION_PREFIX} "},
+        {"score": {"name": STEP, "objective": OBJECTIVE}},
+        {"text": f" / {num_points}"},
+    ])
+
+    def message(text: str) -> str:
+        return json.dumps({"text": f"{DESCRIPTION_PREFIX} {text}"})
+
+    yield "pack.mcmeta", json.dumps({
+        "pack": {
+            "description": f"{DESCRIPTION_PREFIX} {num_points} teleports for {settings.player}, {settings.ticks_per_tp} ticks apart",
+            "pack_format": settings.pack_format,
+        },
+    }, indent=4, sort_keys=True) + "\n"
+
+    yield f"data/minecraft/tags/{_function_folder(settings.pack_format)}/load.json", json.dumps({"values": [f"{NAMESPACE}:load"]}, indent=4) + "\n"
+
+    function_lines = {
+        "load": [
+            f"scoreboard objectives add {OBJECTIVE} dummy",
+            f"execute unless score {STEP} {OBJECTIVE} matches 0.. run scoreboard players set {STEP} {OBJECTIVE} 0",
+        ],
+        "start": [
+            "# Picks up at the teleport the step score is on",
+            f"{_MATCHES} {num_points}.. run tellraw @a {message(f'all {num_points} teleports are done, /function {NAMESPACE}:reset starts over')}",
+            f"{_MATCHES} ..{last} run function {NAMESPACE}:tick",
+        ],
+        "tick": [
+            f"# One teleport, then the next {settings.ticks_per_tp} ticks later until all {num_points} are done",
+            f"function {NAMESPACE}:{root}",
+            f"scoreboard players add {STEP} {OBJECTIVE} 1",
+            f"title {settings.player} actionbar {progress}",
+            f"{_MATCHES} ..{last} run schedule function {NAMESPACE}:tick {settings.ticks_per_tp}t replace",
+            f"{_MATCHES} {num_points}.. run function {NAMESPACE}:done",
+        ],
+        "stop": [
+            f"schedule clear {NAMESPACE}:tick",
+            f"tellraw @a {message(f'stopped, /function {NAMESPACE}:start goes on from here')}",
+        ],
+        "reset": [
+            f"schedule clear {NAMESPACE}:tick",
+            f"scoreboard players set {STEP} {OBJECTIVE} 0",
+        ],
+        "done": [
+            f"tellraw @a {message(f'all {num_points} teleports done')}",
+        ],
+    }
+
+    for name, lines in function_lines.items():
+        yield f"{functions}/{name}.mcfunction", "\n".join(lines) + "\n"
+
+    for leaf in range(levels[0]):
+        start, stop = leaf * FAN_OUT, min((leaf + 1) * FAN_OUT, num_points)
+        points = zip(range(start, stop), plan.x[start:stop].tolist(), plan.z[start:stop].tolist())
+        lines = (
+            f"{_MATCHES} {index} in {settings.dimension} run tp {settings.player} {x} {settings.height} {z}\n"
+            for index, x, z in points
+        )
+
+        yield f"{functions}/{_step_function(0, leaf)}.mcfunction", "".join(lines)
+
+    for level in range(1, len(levels)):
+        # Steps covered by every function of the level below
+        span = FAN_OUT ** level
+
+        for node in range(levels[level]):
+            children = range(node * FAN_OUT, min((node + 1) * FAN_OUT, levels[level - 1]))
+            lines = (
+                f"{_MATCHES} {child * span}..{min((child + 1) * span, num_points) - 1} "
+                f"run function {NAMESPACE}:{_step_function(level - 1, child)}\n"
+                for child in children
+            )
+
+            yield f"{functions}/{_step_function(level, node)}.mcfunction", "".join(lines)
+
+
+def _is_datapack(path: Path) -> bool:
+    try:
+        description = json.loads((path / "pack.mcmeta").read_text())["pack"]["description"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+    return isinstance(description, str) and description.startswith(DESCRIPTION_PREFIX)
+
+
+def datapack_write(path: Path, plan: TeleportPlan, settings: DatapackSettings) -> int:
+    """
+    Writes the datapack into the folder at path, replacing a LOD Hopper datapack already there.
+    Returns how many files it took.
+    """
+    path = Path(path)
+
+    if len(plan) == 0:
+        raise DatapackError("there are no teleports to put in it")
+
+    if re.search(r"\s", settings.player):
+        raise DatapackError(f"{settings.player!r} can't have spaces in a tp command")
+
+    if path.exists() and any(path.iterdir()):
+        if not _is_datapack(path):
+            raise DatapackError(f"{path} already exists, and isn't a LOD Hopper datapack")
+
+        shutil.rmtree(path)
+
+    num_files = 0
+
+    for name, contents in datapack_files(plan, settings):
+        file_path = path / name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(contents, newline="\n")
+        num_files += 1
+
+    return num_files
+
+
+def datapack_read(path: Path) -> DatapackRun:
+    """
+    Follows the datapack's functions the way the server would, step by step from the tick
+    function down to every teleport, making sure each step makes exactly one.
+    """
+    path = Path(path)
+
+    try:
+        pack_format = json.loads((path / "pack.mcmeta").read_text())["pack"]["pack_format"]
+    except (ValueError, KeyError, TypeError) as error:
+        raise DatapackError(f"{path / 'pack.mcmeta'} isn't valid: {error}")
+
+    functions = path / "data" / NAMESPACE / _function_folder(pack_format)
+
+    def read_lines(name: str) -> List[str]:
+        try:
+            text = (functions / f"{name}.mcfunction").read_text()
+        except FileNotFoundError:
+            raise DatapackError(f"{NAMESPACE}:{name} is missing")
+
+        lines = (line.strip() for line in text.splitlines())
+        return [line for line in lines if line and not line.startswith("#")]
+
+    tick = read_lines("tick")
+    roots = [match.group(1) for match in map(_ROOT_LINE.fullmatch, tick) if match]
+    schedules = [match for match in map(_SCHEDULE_LINE.fullmatch, tick) if match]
+
+    if len(roots) != 1 or len(schedules) != 1:
+        raise DatapackError(f"{NAMESPACE}:tick doesn't run one step and schedule the next")
+
+    x, y, z = [], [], []
+    players, dimensions = set(), set()
+
+    def walk(name: str, first: int, last: int) -> None:
+        expected = first
+
+        for line in read_lines(name):
+            node = _NODE_LINE.fullmatch(line)
+            leaf = _LEAF_LINE.fullmatch(line)
+
+            if node is not None and int(node.group(1)) == expected:
+                walk(node.group(3), expected, int(node.group(2)))
+                expected = int(node.group(2)) + 1
+            elif leaf is not None and int(leaf.group(1)) == expected:
+                dimensions.add(leaf.group(2))
+                players.add(leaf.group(3))
+                x.append(int(leaf.group(4)))
+                y.append(int(leaf.group(5)))
+                z.append(int(leaf.group(6)))
+                expected += 1
+            else:
+                raise DatapackError(f"{NAMESPACE}:{name} expected step {expected}, got {line!r}")
+
+        if expected != last + 1:
+            raise DatapackError(f"{NAMESPACE}:{name} stops at step {expected - 1}, not {last}")
+
+    walk(roots[0], 0, int(schedules[0].group(1)))
+
+    return DatapackRun(
+        ticks_per_tp=int(schedules[0].group(2)),
+        x=np.array(x, dtype=np.int64),
+        y=np.array(y, dtype=np.int64),
+        z=np.array(z, dtype=np.int64),
+        players=players,
+        dimensions=dimensions,
+    )
+
+
+def datapack_verify(path: Path, plan: TeleportPlan, settings: DatapackSettings) -> DatapackRun:
+    """Reads the datapack back, raising at the first way it differs from the plan and settings."""
+    run = datapack_read(path)
+
+    if len(run.x) != len(plan):
+        raise DatapackError(f"it makes {len(run.x)} teleports, the plan has {len(plan)}")
+
+    different = np.flatnonzero((run.x != plan.x) | (run.z != plan.z) | (run.y != settings.height))
+    if len(different):
+        index = int(different[0])
+        raise DatapackError(
+            f"teleport {index} goes to {run.x[index]} {run.y[index]} {run.z[index]}, "
+            f"not {plan.x[index]} {settings.height} {plan.z[index]}"
+        )
+
+    if run.players != {settings.player} or run.dimensions != {settings.dimension}:
+        raise DatapackError(
+            f"it teleports {', '.join(sorted(run.players))} in {', '.join(sorted(run.dimensions))}, "
+            f"not {settings.player} in {settings.dimension}"
+        )
+
+    if run.ticks_per_tp != settings.ticks_per_tp:
+        raise DatapackError(f"it waits {run.ticks_per_tp} ticks, not {settings.ticks_per_tp}")
+
+    return run
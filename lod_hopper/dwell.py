@@ -0,0 +1,173 @@
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Generator, List, Optional, Pattern
+
+# Yields how long to sleep before the next look, returns how long it waited in all
+DwellSteps = Generator[float, None, float]
+
+# Lines in the client, server or Distant Horizons logs that mean chunks are still being worked on
+DEFAULT_ACTIVITY_PATTERN = r"(?i)chunk|generat|DistantHorizons|\bLOD\b|Preparing spawn"
+
+
+@dataclass
+class LogTail:
+    """Reads lines appended to a log file, following truncation and rotation."""
+    path: Path
+    position: int = 0
+    file_id: Optional[int] = None
+    partial_line: str = ""
+
+
+def log_tail_open(path: Path) -> LogTail:
+    """Starts tailing at the current end of the file, so only new lines are read."""
+    stat = os.stat(path)
+
+    return LogTail(path=Path(path), position=stat.st_size, file_id=stat.st_ino)
+
+
+def log_tail_read_lines(tail: LogTail) -> List[str]:
+    """Every complete line written since the last read."""
+    try:
+        stat = os.stat(tail.path)
+    except FileNotFoundError:
+        # Mid-rotation, the new file just isn't there yet
+        return []
+
+    if stat.st_ino != tail.file_id or stat.st_size < tail.position:
+        # The log was rotated or truncated, start over at the top of the new one
+        tail.file_id = stat.st_ino
+        tail.position = 0
+        tail.partial_line = ""
+
+    if stat.st_size == tail.position:
+        return []
+
+    with open(tail.path, "rb") as log_file:
+        log_file.seek(tail.position)
+        data = log_file.read()
+
+    tail.position += len(data)
+
+    *lines, tail.partial_line = (tail.partial_line + data.decode("utf-8", errors="replace")).split("\n")
+
+    return lines
+
+
+@dataclass
+class FixedDwell:
+    """Always waits the same amount of time, like --seconds-per-tp."""
+    seconds: float
+    sleep: Callable[[float], None] = time.sleep
+
+    def steps(self) -> DwellSteps:
+        yield self.seconds
+
+        return self.seconds
+
+    def wait(self) -> float:
+        return dwell_wait(self.steps(), self.sleep)
+
+
+@dataclass
+class LogDwell:
+    """
+    Waits until the log has shown no chunk activity for quiet_seconds,
+    but never less than min_seconds or more than max_seconds.
+    Falls back to the fixed wait whenever the log can't be read.
+    """
+    tail: Optional[LogTail]
+    fallback: FixedDwell
+    min_seconds: float = 0.5
+    max_seconds: float = 10
+    quiet_seconds: float = 1
+    poll_seconds: float = 0.1
+    pattern: Pattern = field(default_factory=lambda: re.compile(DEFAULT_ACTIVITY_PATTERN))
+    sleep: Callable[[float], None] = time.sleep
+    monotonic: Callable[[], float] = time.monotonic
+
+    def steps(self) -> DwellSteps:
+        if self.tail is None:
+            return (yield from self.fallback.steps())
+
+        start = self.monotonic()
+        last_activity = start
+
+        while True:
+            yield self.poll_seconds
+            now = self.monotonic()
+
+            try:
+                lines = log_tail_read_lines(self.tail)
+            except OSError:
+                self.tail = None
+                return now - start + (yield from self.fallback.steps())
+
+            if any(self.pattern.search(line) for line in lines):
+                last_activity = now
+
+            waited = now - start
+            if waited >= self.max_seconds:
+                return waited
+
+            if waited >= self.min_seconds and now - last_activity >= self.quiet_seconds:
+                return waited
+
+    def wait(self) -> float:
+        if self.tail is None:
+            return self.fallback.wait()
+
+        return dwell_wait(self.steps(), self.sleep)
+
+
+def dwell_wait(steps: DwellSteps, sleep: Callable[[float], None]) -> float:
+    """Runs a dwell's steps, blocking in sleep between them."""
+    try:
+        while True:
+            sleep(next(steps))
+    except StopIteration as done:
+        return done.value
+
+
+async def dwell_wait_async(steps: DwellSteps, sleep: Callable[[float], Awaitable[bool]]) -> None:
+    """
+    Runs a dwell's steps on an event loop. sleep returns False when the wait was cut short,
+    which ends the whole dwell.
+    """
+    try:
+        while True:
+            if not await sleep(next(steps)):
+                steps.close()
+                return
+    except StopIteration:
+        return
+
+
+def log_dwell_open(
+    log_path: Path,
+    fallback: FixedDwell,
+    min_seconds: float,
+    max_seconds: float,
+    quiet_seconds: float,
+    pattern: str = DEFAULT_ACTIVITY_PATTERN,
+    sleep: Callable[[float], None] = time.sleep,
+    monotonic: Callable[[], float] = time.monotonic,
+) -> LogDwell:
+    """Adaptive dwell on the given log, or the fixed wait if the log doesn't exist."""
+    try:
+        tail = log_tail_open(log_path)
+    except OSError:
+        tail = None
+
+    return LogDwell(
+        tail=tail,
+        fallback=fallback,
+        min_seconds=min_seconds,
+        max_seconds=max_seconds,
+        quiet_seconds=quiet_seconds,
+        pattern=re.compile(pattern),
+        sleep=sleep,
+        monotonic=monotonic,
+    )
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional
+
+CHUNK_SIZE = 16
+
+# How many of the latest teleports the rate is measured over
+RATE_WINDOW = 32
+
+
+class RunClock:
+    """Monotonic clock that stands still while the run is paused."""
+
+    def __init__(self, paused: bool = False, monotonic: Callable[[], float] = time.monotonic):
+        self._monotonic = monotonic
+        self._lock = threading.Lock()
+        self._paused_total = 0.0
+        self._paused_since: Optional[float] = monotonic() if paused else None
+
+    def pause(self) -> None:
+        with self._lock:
+            if self._paused_since is None:
+                self._paused_since = self._monotonic()
+
+    def resume(self) -> None:
+        with self._lock:
+            if self._paused_since is not None:
+                self._paused_total += self._monotonic() - self._paused_since
+                self._paused_since = None
+
+    def now(self) -> float:
+        with self._lock:
+            now = self._paused_since if self._paused_since is not None else self._monotonic()
+
+            return now - self._paused_total
+
+
+class RateEstimator:
+    """
+    Time left and throughput, from when the latest teleports actually finished
+    (by any number of workers) rather than from how long each one should take.
+    """
+
+    def __init__(
+        self,
+        remaining: int,
+        seconds_per_teleport: float,
+        chunks_per_teleport: float,
+        clock: RunClock,
+        window: int = RATE_WINDOW,
+    ):
+        self.remaining = remaining
+        # Used until there are enough teleports to measure
+        self._guess = seconds_per_teleport
+        self._chunks_per_teleport = chunks_per_teleport
+        self._clock = clock
+        self._finished: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self) -> None:
+        """Counts one more finished teleport."""
+        with self._lock:
+            self._finished.append(self._clock.now())
+            self.remaining = max(self.remaining - 1, 0)
+
+    def seconds_per_teleport(self) -> float:
+        with self._lock:
+            if len(self._finished) < 2:
+                return self._guess
+
+            return (self._finished[-1] - self._finished[0]) / (len(self._finished) - 1)
+
+    def seconds_left(self) -> float:
+        return self.remaining * self.seconds_per_teleport()
+
+    def teleports_per_minute(self) -> float:
+        return 60 / max(self.seconds_per_teleport(), 1e-9)
+
+    def chunks_per_minute(self) -> float:
+        return self.teleports_per_minute() * self._chunks_per_teleport
+
+
+def chunks_per_teleport(cell_size: int) -> float:
+    """New chunks each teleport is responsible for, with teleports cell_size blocks apart."""
+    return (cell_size / CHUNK_SIZE) ** 2
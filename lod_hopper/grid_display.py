@@ -1,21 +1,45 @@
 import numpy as np
-from typing import Tuple, Dict
+from typing import List, Optional, Sequence, Tuple
 from dataclasses import dataclass
-from lod_hopper.schemas import Coordinate, Blocks
-from typing import Iterator
+from lod_hopper.schemas import Blocks, Coordinate
 import math
 
 # Constants to represent the states in the grid
 EXCLUDED = 0
 VISITED = 1
 UNVISITED = 2
+# Only drawn on top of the grid, never stored in it
+PLAYER = 3
+# Visited, but the world still doesn't have all of its chunks
+MISSING = 4
+# Only drawn above level 0, for blocks of cells with less than half or at least half visited
+SOME_VISITED = 5
+HALF_VISITED = 6
+
+
+@dataclass
+class GridPyramid:
+    """
+    The grid at every coarser level, for maps bigger than the terminal. Cell (r, c) of level k
+    covers the 2^k by 2^k block of grid cells starting at (r * 2^k, c * 2^k), and counts how many
+    of them are planned, visited and missing. Element k - 1 of each list is level k, up to one cell.
+    """
+    planned: List[np.ndarray]
+    visited: List[np.ndarray]
+    missing: List[np.ndarray]
 
 
 @dataclass
 class GridData:
     grid: np.ndarray
-    order: Tuple[Coordinate, ...]
-    coord_to_index: Dict[Coordinate, Tuple[int, int]]
+    # Coordinates of the plan, in visiting order. These are shared with the plan, not copied.
+    x: np.ndarray
+    z: np.ndarray
+    x_max: Blocks
+    z_max: Blocks
+    blocks_per_tp: Blocks
+    # Built the first time the map is drawn above level 0, kept up to date after that
+    pyramid: Optional[GridPyramid] = None
 
     # Used for testing
     def __eq__(self, other):
@@ -25,8 +49,11 @@ class GridData:
         # Compare the grid using np.array_equal, and other attributes directly
         return all([
             np.array_equal(self.grid, other.grid),
-            self.order == other.order,
-            self.coord_to_index == other.coord_to_index,
+            np.array_equal(self.x, other.x),
+            np.array_equal(self.z, other.z),
+            self.x_max == other.x_max,
+            self.z_max == other.z_max,
+            self.blocks_per_tp == other.blocks_per_tp,
         ])
 
 @dataclass
@@ -34,53 +61,276 @@ class Span:
     min: Blocks
     max: Blocks
 
-def grid_data_initialize(coordinates: Tuple[Coordinate, ...], blocks_per_tp: Blocks) -> GridData:
-    x_span = Span(min(coord.x for coord in coordinates), max(coord.x for coord in coordinates))
-    z_span = Span(min(coord.z for coord in coordinates), max(coord.z for coord in coordinates))
+def grid_data_initialize(x: np.ndarray, z: np.ndarray, blocks_per_tp: Blocks) -> GridData:
+    x = np.asarray(x)
+    z = np.asarray(z)
+
+    x_span = Span(int(x.min()), int(x.max()))
+    z_span = Span(int(z.min()), int(z.max()))
 
     # Calculate grid dimensions
     grid_width = math.ceil((x_span.max - x_span.min + 1) / blocks_per_tp)
     grid_height = math.ceil((z_span.max - z_span.min + 1) / blocks_per_tp)
 
     # Initialize grid as EMPTY
-    grid = np.full((grid_height, grid_width), EXCLUDED, dtype=int)
+    grid = np.full((grid_height, grid_width), EXCLUDED, dtype=np.uint8)
 
-    coord_to_index = {}
+    grid_data = GridData(
+        grid=grid,
+        x=x,
+        z=z,
+        x_max=x_span.max,
+        z_max=z_span.max,
+        blocks_per_tp=blocks_per_tp,
+    )
+
+    # Every planned coordinate in one scatter
+    rows, cols = grid_data_cells(grid_data, 0, len(x))
+    grid[rows, cols] = UNVISITED
 
-    for coord in coordinates:
-        col = (x_span.max - coord.x) // blocks_per_tp
-        row = (z_span.max - coord.z) // blocks_per_tp
+    return grid_data
 
-        grid[row, col] = UNVISITED
-        coord_to_index[coord] = (row, col)
+
+def grid_data_from_grid(x: np.ndarray, z: np.ndarray, grid: np.ndarray, blocks_per_tp: Blocks) -> GridData:
+    """Same as `grid_data_initialize`, with its grid already drawn (like one saved along with the plan)."""
+    x = np.asarray(x)
+    z = np.asarray(z)
 
     return GridData(
-        grid=grid,
-        order=coordinates,
-        coord_to_index=coord_to_index,
+        grid=np.array(grid, dtype=np.uint8),
+        x=x,
+        z=z,
+        x_max=int(x.max()),
+        z_max=int(z.max()),
+        blocks_per_tp=blocks_per_tp,
     )
 
 
+def grid_data_cells(grid_data: GridData, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows and columns of the plan indices start..stop, computed from the coordinates."""
+    x = grid_data.x[start:stop].astype(np.int64)
+    z = grid_data.z[start:stop].astype(np.int64)
+
+    cols = (grid_data.x_max - x) // grid_data.blocks_per_tp
+    rows = (grid_data.z_max - z) // grid_data.blocks_per_tp
+
+    return rows, cols
+
+
+def grid_data_cell(grid_data: GridData, index: int) -> Tuple[int, int]:
+    """Row and column of a single plan index."""
+    row = (grid_data.z_max - int(grid_data.z[index])) // grid_data.blocks_per_tp
+    col = (grid_data.x_max - int(grid_data.x[index])) // grid_data.blocks_per_tp
+
+    return row, col
+
+
 def grid_data_add_visited(grid_data: GridData, current_index: int) -> None:
     """Updates a single cell in the to mark it as LIT based on current_index."""
-    if current_index >= len(grid_data.order):
+    if current_index >= len(grid_data.x):
         return  # Prevent out-of-bounds updates
 
-    coord = grid_data.order[current_index]
-    row, col = grid_data.coord_to_index[coord]
+    row, col = grid_data_cell(grid_data, current_index)
+
+    # Called for every teleport, so one cell skips the array work of grid_data_set_cells
+    if grid_data.pyramid is not None:
+        _pyramid_update_cell(grid_data.pyramid, int(grid_data.grid[row, col]), VISITED, row, col)
 
     grid_data.grid[row, col] = VISITED
 
 
+def grid_data_add_visited_range(grid_data: GridData, start: int, stop: int) -> None:
+    """Marks every plan index from start up to (not including) stop as visited."""
+    stop = min(stop, len(grid_data.x))
+    if start >= stop:
+        return
+
+    rows, cols = grid_data_cells(grid_data, start, stop)
+    grid_data_set_cells(grid_data, rows, cols, VISITED)
+
+
+def grid_data_add_visited_indices(grid_data: GridData, indices: Sequence[int]) -> None:
+    """Marks every given plan index as visited in one vectorized update."""
+    grid_data_set_indices(grid_data, indices, VISITED)
+
+
+def grid_data_add_missing_indices(grid_data: GridData, indices: Sequence[int]) -> None:
+    """Marks every given plan index as a hole the world is still missing."""
+    grid_data_set_indices(grid_data, indices, MISSING)
+
+
+def grid_data_set_indices(grid_data: GridData, indices: Sequence[int], state: int) -> None:
+    indices = np.asarray(indices, dtype=np.int64)
+    indices = indices[indices < len(grid_data.x)]
+
+    rows = (grid_data.z_max - grid_data.z[indices].astype(np.int64)) // grid_data.blocks_per_tp
+    cols = (grid_data.x_max - grid_data.x[indices].astype(np.int64)) // grid_data.blocks_per_tp
+    grid_data_set_cells(grid_data, rows, cols, state)
+
+
+def grid_data_set_cells(grid_data: GridData, rows: np.ndarray, cols: np.ndarray, state: int) -> None:
+    """Every change to the grid goes through here, so the pyramid (once there is one) follows along."""
+    if grid_data.pyramid is not None:
+        _pyramid_update(grid_data.pyramid, grid_data.grid, rows, cols, state)
+
+    grid_data.grid[rows, cols] = state
+
+
+def _downsample(counts: np.ndarray) -> np.ndarray:
+    """Sums of every 2 by 2 block, padding odd sizes with zeros."""
+    height, width = counts.shape
+    padded = np.zeros((height + height % 2, width + width % 2), dtype=counts.dtype)
+    padded[:height, :width] = counts
+
+    return padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).sum(axis=(1, 3), dtype=counts.dtype)
+
+
+def pyramid_build(grid: np.ndarray) -> GridPyramid:
+    pyramid = GridPyramid(planned=[], visited=[], missing=[])
+    planned = (grid != EXCLUDED).astype(np.int32)
+    visited = (grid == VISITED).astype(np.int32)
+    missing = (grid == MISSING).astype(np.int32)
+
+    while planned.shape[0] > 1 or planned.shape[1] > 1:
+        planned, visited, missing = _downsample(planned), _downsample(visited), _downsample(missing)
+        pyramid.planned.append(planned)
+        pyramid.visited.append(visited)
+        pyramid.missing.append(missing)
+
+    return pyramid
+
+
+def _pyramid_update(pyramid: GridPyramid, grid: np.ndarray, rows: np.ndarray, cols: np.ndarray, state: int) -> None:
+    """Adjusts the counts of every level for the cells about to be set to state, O(levels) per cell."""
+    # A cell can come up more than once (ring corners are planned twice)
+    cells = np.unique(np.asarray(rows, dtype=np.int64) * grid.shape[1] + np.asarray(cols, dtype=np.int64))
+    rows, cols = np.divmod(cells, grid.shape[1])
+
+    old = grid[rows, cols]
+    changed = old != state
+    rows, cols, old = rows[changed], cols[changed], old[changed]
+
+    if len(rows) == 0:
+        return
+
+    deltas = [
+        (pyramid.planned, int(state != EXCLUDED) - (old != EXCLUDED)),
+        (pyramid.visited, int(state == VISITED) - (old == VISITED)),
+        (pyramid.missing, int(state == MISSING) - (old == MISSING)),
+    ]
+    deltas = [(counts, delta.astype(np.int32)) for counts, delta in deltas if delta.any()]
+
+    for level in range(1, len(pyramid.planned) + 1):
+        for counts, delta in deltas:
+            np.add.at(counts[level - 1], (rows >> level, cols >> level), delta)
+
+
+def _pyramid_update_cell(pyramid: GridPyramid, old: int, state: int, row: int, col: int) -> None:
+    """_pyramid_update for a single cell."""
+    deltas = (
+        (pyramid.planned, int(state != EXCLUDED) - int(old != EXCLUDED)),
+        (pyramid.visited, int(state == VISITED) - int(old == VISITED)),
+        (pyramid.missing, int(state == MISSING) - int(old == MISSING)),
+    )
+
+    for counts, delta in deltas:
+        if delta:
+            for level, level_counts in enumerate(counts, start=1):
+                level_counts[row >> level, col >> level] += delta
+
+
+def grid_data_pyramid(grid_data: GridData) -> GridPyramid:
+    if grid_data.pyramid is None:
+        grid_data.pyramid = pyramid_build(grid_data.grid)
+
+    return grid_data.pyramid
+
+
+def _level_shape(shape: Tuple[int, int], level: int) -> Tuple[int, int]:
+    return ((shape[0] - 1) >> level) + 1, ((shape[1] - 1) >> level) + 1
+
+
+def grid_data_fit_level(grid_data: GridData, max_rows: int, max_cells: int) -> int:
+    """The most detailed level whose whole map fits in max_rows by max_cells, or the single cell top one."""
+    shape = grid_data.grid.shape
+    level = 0
+
+    while _level_shape(shape, level) != (1, 1):
+        rows, cells = _level_shape(shape, level)
+        if rows <= max_rows and cells <= max_cells:
+            break
+
+        level += 1
+
+    return level
+
+
 ascii_map = {
     EXCLUDED: "  ", 
     VISITED: "⬜", 
-    UNVISITED: "⬛"
+    UNVISITED: "⬛",
+    PLAYER: "🟦",
+    MISSING: "🟥",
 }
 
 
+# Above level 0 a cell stands for a block of grid cells, shaded by how much of it is visited
+shaded_map = {
+    EXCLUDED: "  ",
+    VISITED: "██",
+    UNVISITED: "░░",
+    PLAYER: "🟦",
+    MISSING: "🟥",
+    SOME_VISITED: "▒▒",
+    HALF_VISITED: "▓▓",
+}
+
+
+def _pyramid_states(pyramid: GridPyramid, level: int, max_rows: Optional[int], max_cells: Optional[int]) -> np.ndarray:
+    planned = pyramid.planned[level - 1][:max_rows, :max_cells]
+    visited = pyramid.visited[level - 1][:max_rows, :max_cells]
+    missing = pyramid.missing[level - 1][:max_rows, :max_cells]
+
+    return np.select(
+        [planned == 0, missing > 0, visited == planned, visited == 0, 2 * visited < planned],
+        [EXCLUDED, MISSING, VISITED, UNVISITED, SOME_VISITED],
+        default=HALF_VISITED,
+    ).astype(np.uint8)
+
+
+def grid_data_to_lines(
+    grid_data: GridData,
+    max_rows: Optional[int] = None,
+    max_cells: Optional[int] = None,
+    players: Sequence[Coordinate] = (),
+    level: int = 0,
+) -> List[str]:
+    """
+    Converts the visible part of the NumPy array grid to display lines, with players drawn on top.
+    Above level 0, each cell stands for 2^level by 2^level cells of the grid.
+    """
+    if level == 0:
+        visible = grid_data.grid[:max_rows, :max_cells]
+        glyph_map = ascii_map
+    else:
+        visible = _pyramid_states(grid_data_pyramid(grid_data), level, max_rows, max_cells)
+        glyph_map = shaded_map
+
+    if players:
+        visible = visible.copy() if level == 0 else visible
+
+        for coordinate in players:
+            row = (grid_data.z_max - coordinate.z) // grid_data.blocks_per_tp >> level
+            col = (grid_data.x_max - coordinate.x) // grid_data.blocks_per_tp >> level
+
+            if 0 <= row < visible.shape[0] and 0 <= col < visible.shape[1]:
+                visible[row, col] = PLAYER
+
+    glyphs = np.array([glyph_map.get(state, "  ") for state in range(max(glyph_map) + 1)])
+
+    return ["".join(row) for row in glyphs[visible].tolist()]
+
+
 def grid_data_to_string(grid_data: GridData) -> str:
     """Converts the NumPy array grid to a string for display."""
-    string_rows: Iterator[str] = ("".join(ascii_map[cell] for cell in row) for row in grid_data.grid)
-
-    return "\n".join(string_rows)
+    return "\n".join(grid_data_to_lines(grid_data))
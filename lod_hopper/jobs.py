@@ -0,0 +1,236 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+from lod_hopper.plan import TeleportPlan, teleport_plan_build, teleport_plan_from_points
+from lod_hopper.regions import WorldDimension
+from lod_hopper.schemas import Blocks
+from lod_hopper.shapes import (
+    Circle,
+    Polygon,
+    Region,
+    ShapeKind,
+    Square,
+    region_plan_select,
+    region_square,
+)
+
+try:
+    import tomllib
+except ModuleNotFoundError:
+    import tomli as tomllib
+
+JOB_KEYS = {"name", "radius", "exclude", "shape", "center", "polygon", "exclude_polygon", "dimension", "height", "seconds_per_tp"}
+# Settings a [defaults] table can give every job
+DEFAULT_KEYS = {"shape", "dimension", "height", "seconds_per_tp"}
+
+# Empty cells left between the maps of different dimensions
+DIMENSION_GAP_CELLS = 2
+
+
+class JobFileError(ValueError):
+    pass
+
+
+@dataclass
+class Job:
+    name: str
+    region: Region
+    dimension: WorldDimension
+    height: Blocks
+    seconds_per_tp: float
+
+
+@dataclass
+class BatchPlan:
+    # Every job's teleports one job after the other, each job a segment
+    plan: TeleportPlan
+    # In the order they are run
+    jobs: List[Job]
+    # First plan index of every job, plus the total length at the end
+    job_offsets: np.ndarray
+    # x of every teleport on the map, where each dimension gets its own stretch side by side
+    display_x: np.ndarray
+
+    def job_indices(self, job: int) -> np.ndarray:
+        return np.arange(self.job_offsets[job], self.job_offsets[job + 1])
+
+
+def job_file_load(path: Path) -> dict:
+    """The raw contents of a TOML job file, or a JSON one if it ends in .json."""
+    try:
+        if Path(path).suffix == ".json":
+            return json.loads(Path(path).read_text())
+
+        with open(path, "rb") as job_file:
+            return tomllib.load(job_file)
+    except (ValueError, tomllib.TOMLDecodeError) as error:
+        raise JobFileError(f"{path}: {error}")
+
+
+def jobs_parse(data: dict, height: Blocks, seconds_per_tp: float) -> List[Job]:
+    """
+    Jobs from a job file's contents. Settings missing from a job come from the [defaults] table,
+    then from the given height and seconds_per_tp.
+    """
+    defaults = data.get("defaults", {})
+    unknown = set(defaults) - DEFAULT_KEYS
+    if unknown:
+        raise JobFileError(f"[defaults] can't set {', '.join(sorted(unknown))}")
+
+    if not data.get("jobs"):
+        raise JobFileError("there are no [[jobs]]")
+
+    return [
+        _job_parse({**defaults, **job}, number, height, seconds_per_tp)
+        for number, job in enumerate(data["jobs"], start=1)
+    ]
+
+
+def _job_parse(job: dict, number: int, height: Blocks, seconds_per_tp: float) -> Job:
+    name = str(job.get("name", f"job {number}"))
+
+    def fail(message: str) -> JobFileError:
+        return JobFileError(f"{name}: {message}")
+
+    unknown = set(job) - JOB_KEYS
+    if unknown:
+        raise fail(f"unknown settings {', '.join(sorted(unknown))}")
+
+    try:
+        kind = ShapeKind(job.get("shape", ShapeKind.square.value))
+        dimension = WorldDimension[job.get("dimension", WorldDimension.overworld.name)]
+        center_x, center_z = (int(value) for value in job.get("center", (0, 0)))
+    except (KeyError, ValueError, TypeError):
+        raise fail("shape, dimension or center isn't valid")
+
+    def round_shape(radius: Blocks):
+        return Circle(radius, center_x, center_z) if kind == ShapeKind.circle else Square(radius, center_x, center_z)
+
+    def polygon(corners) -> Polygon:
+        vertices = np.array(corners, dtype=np.float64)
+        if vertices.ndim != 2 or vertices.shape[1] != 2 or len(vertices) < 3:
+            raise fail("a polygon needs at least 3 [x, z] corners")
+
+        return Polygon(vertices)
+
+    if ("radius" in job) == ("polygon" in job):
+        raise fail("give either a radius or a polygon")
+
+    try:
+        radius = Blocks(int(job["radius"])) if "radius" in job else None
+        exclude = Blocks(int(job.get("exclude", 0)))
+        job_height = Blocks(int(job.get("height", height)))
+        job_seconds_per_tp = float(job.get("seconds_per_tp", seconds_per_tp))
+    except (ValueError, TypeError):
+        raise fail("radius, exclude, height or seconds_per_tp isn't a number")
+
+    outer = polygon(job["polygon"]) if radius is None else round_shape(radius)
+
+    if "exclude_polygon" in job:
+        inner = polygon(job["exclude_polygon"])
+    else:
+        inner = round_shape(exclude) if exclude > 0 else None
+
+    return Job(
+        name=name,
+        region=Region(outer=outer, inner=inner),
+        dimension=dimension,
+        height=job_height,
+        seconds_per_tp=job_seconds_per_tp,
+    )
+
+
+def job_plan_build(job: Job, blocks_per_tp: int) -> TeleportPlan:
+    """
+    Rings around the job's region, cut down to it. Their center and radius are multiples of
+    blocks_per_tp, so every job's teleports fall on the same lattice and overlaps line up exactly.
+    """
+    center_x, center_z, radius = region_square(job.region, align=blocks_per_tp, step=blocks_per_tp)
+
+    return region_plan_select(job.region, teleport_plan_build(radius, 0, blocks_per_tp), blocks_per_tp, center_x, center_z)
+
+
+def jobs_order(jobs: List[Job], plans: List[TeleportPlan]) -> List[int]:
+    """
+    Every dimension once, in the order they first come up, so the player only switches
+    when one is done. Within one, the nearest job to where the last one ended goes next.
+    """
+    dimensions = list(dict.fromkeys(job.dimension for job in jobs))
+    order = []
+
+    for dimension in dimensions:
+        left = [index for index, job in enumerate(jobs) if job.dimension == dimension and len(plans[index])]
+        position = (0, 0)
+
+        while left:
+            nearest = min(left, key=lambda index: np.hypot(plans[index].x[0] - position[0], plans[index].z[0] - position[1]))
+            left.remove(nearest)
+            order.append(nearest)
+            position = (plans[nearest].x[-1], plans[nearest].z[-1])
+
+    return order
+
+
+def batch_plan_build(jobs: List[Job], blocks_per_tp: int) -> BatchPlan:
+    """
+    One plan for all the jobs, run one after the other. A teleport shared by overlapping
+    jobs of the same dimension is only made by the first of them.
+    """
+    plans = [job_plan_build(job, blocks_per_tp) for job in jobs]
+    order = jobs_order(jobs, plans)
+    jobs = [jobs[index] for index in order]
+    plans = [plans[index] for index in order]
+
+    x = np.concatenate([plan.x for plan in plans]).astype(np.int32) if plans else np.zeros(0, dtype=np.int32)
+    z = np.concatenate([plan.z for plan in plans]).astype(np.int32) if plans else np.zeros(0, dtype=np.int32)
+    job = np.repeat(np.arange(len(plans)), [len(plan) for plan in plans])
+    dimension = np.array([list(WorldDimension).index(jobs[index].dimension) for index in job], dtype=np.int64)
+
+    # First time each (dimension, x, z) comes up, in run order
+    _, first = np.unique(np.stack([dimension, x, z]), axis=1, return_index=True)
+    keep = np.zeros(len(x), dtype=bool)
+    keep[first] = True
+
+    x, z, job, dimension = x[keep], z[keep], job[keep], dimension[keep]
+
+    return BatchPlan(
+        plan=teleport_plan_from_points(x, z, job, segment_name="Job"),
+        jobs=jobs,
+        job_offsets=np.searchsorted(job, np.arange(len(jobs) + 1)),
+        display_x=_display_x(x, dimension, blocks_per_tp),
+    )
+
+
+def _display_x(x: np.ndarray, dimension: np.ndarray, cell_size: int) -> np.ndarray:
+    """Shifts every dimension after the first to the right of the one before it on the map, which runs east to west."""
+    display_x = x.astype(np.int64)
+    previous_min: Optional[int] = None
+
+    for code in dict.fromkeys(dimension.tolist()):
+        points = dimension == code
+
+        if previous_min is not None:
+            # Multiples of the cell size keep the lattice lined up with the map's cells
+            shift = (previous_min - DIMENSION_GAP_CELLS * cell_size - int(x[points].max())) // cell_size * cell_size
+            display_x[points] += shift
+
+        previous_min = int(display_x[points].min())
+
+    return display_x.astype(np.int32)
+
+
+def batch_travel(batch: BatchPlan) -> Tuple[float, int]:
+    """Blocks flown from one job to the next in the same dimension, and how often the dimension changes."""
+    segment = batch.plan.ring
+    distance = 0.0
+    switches = 0
+
+    for start in np.flatnonzero(np.diff(segment)) + 1:
+        if batch.jobs[segment[start - 1]].dimension != batch.jobs[segment[start]].dimension:
+            switches += 1
+        else:
+            distance += float(np.hypot(batch.plan.x[start] - batch.plan.x[start - 1], batch.plan.z[start] - batch.plan.z[start - 1]))
+
+    return distance, switches
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import mmap
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+import numpy as np
+from lod_hopper.journal_format import HEADER, MAGIC, VERSION, JournalMismatchError, bitset_offset, journal_header
+from lod_hopper.plan import TeleportPlan
+
+# Flush to disk after this many teleports or seconds, whichever comes first
+SYNC_EVERY_MARKS = 64
+SYNC_EVERY_SECONDS = 5
+
+
+@dataclass
+class Journal:
+    """
+    Progress of a run on disk: a header with the plan parameters and hash,
+    followed by one bit per plan index, set once that teleport is done.
+    """
+    path: Path
+    file: BinaryIO
+    mapping: mmap.mmap
+    # View into the mapped file
+    bitset: np.ndarray
+    num_points: int
+    unsynced_marks: int = 0
+    last_sync: float = 0
+
+
+def plan_hash(plan: TeleportPlan, params: dict) -> bytes:
+    digest = hashlib.sha256()
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(np.ascontiguousarray(plan.x, dtype="<i4").tobytes())
+    digest.update(np.ascontiguousarray(plan.z, dtype="<i4").tobytes())
+
+    return digest.digest()
+
+
+def journal_create(path: Path, plan: TeleportPlan, params: dict) -> Journal:
+    """Starts a new, empty journal for the plan, replacing any journal already at path."""
+    params_bytes = json.dumps(params, sort_keys=True).encode()
+    offset = bitset_offset(len(params_bytes))
+    size = offset + -(-len(plan) // 8)
+
+    header = HEADER.pack(MAGIC, VERSION, len(params_bytes), len(plan), plan_hash(plan, params))
+
+    # Written to the side and renamed, so a crash never leaves half a header behind
+    temporary_path = Path(f"{path}.tmp")
+    with open(temporary_path, "wb") as journal_file:
+        journal_file.write(header + params_bytes)
+        journal_file.truncate(max(size, 1))
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+    os.replace(temporary_path, path)
+
+    return _journal_map(Path(path), offset, len(plan))
+
+
+def journal_open(path: Path, plan: TeleportPlan, params: dict) -> Journal:
+    """Opens an existing journal, making sure it was written for this exact plan."""
+    with open(path, "rb") as journal_file:
+        num_points, saved_hash, saved_params, offset = journal_header(path, journal_file)
+
+    if num_points != len(plan) or saved_hash != plan_hash(plan, params):
+        raise JournalMismatchError(
+            f"{path} was written for a different plan ({saved_params}), "
+            f"not this one ({params})"
+        )
+
+    return _journal_map(Path(path), offset, num_points)
+
+
+def _journal_map(path: Path, offset: int, num_points: int) -> Journal:
+    journal_file = open(path, "r+b")
+    mapping = mmap.mmap(journal_file.fileno(), 0)
+    bitset = np.frombuffer(mapping, dtype=np.uint8, count=-(-num_points // 8), offset=offset)
+
+    return Journal(
+        path=path,
+        file=journal_file,
+        mapping=mapping,
+        bitset=bitset,
+        num_points=num_points,
+        last_sync=time.monotonic(),
+    )
+
+
+def journal_mark(journal: Journal, index: int) -> None:
+    """Records a finished teleport. Only every so often does this wait on the disk."""
+    journal.bitset[index >> 3] |= np.uint8(1 << (index & 7))
+    journal.unsynced_marks += 1
+
+    if journal.unsynced_marks >= SYNC_EVERY_MARKS or time.monotonic() - journal.last_sync >= SYNC_EVERY_SECONDS:
+        journal_sync(journal)
+
+
+def journal_sync(journal: Journal) -> None:
+    journal.mapping.flush()
+    journal.unsynced_marks = 0
+    journal.last_sync = time.monotonic()
+
+
+def journal_visited(journal: Journal) -> np.ndarray:
+    """Whether each plan index is done, as a bool array."""
+    return np.unpackbits(journal.bitset, count=journal.num_points, bitorder="little").astype(bool)
+
+
+def journal_close(journal: Journal) -> None:
+    """Flushes and closes the journal. Closing it again does nothing."""
+    if journal.mapping.closed:
+        return
+
+    journal_sync(journal)
+
+    # The bitset view has to go before the mapping can be closed
+    journal.bitset = None
+    journal.mapping.close()
+    journal.file.close()
@@ -0,0 +1,58 @@
+import json
+import struct
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+# Only the standard library, so the status command can read a journal without loading numpy
+
+MAGIC = b"LODHJRNL"
+VERSION = 1
+
+# Magic, version, length of the parameters, number of points, plan hash
+HEADER = struct.Struct("<8sIIQ32s")
+
+
+class JournalMismatchError(Exception):
+    pass
+
+
+class JournalSummary(NamedTuple):
+    params: dict
+    num_points: int
+    num_done: int
+
+
+def bitset_offset(params_length: int) -> int:
+    # Keep the bitset 8 byte aligned
+    return -(-(HEADER.size + params_length) // 8) * 8
+
+
+def journal_header(path: Path, journal_file: BinaryIO) -> tuple:
+    """Number of points, plan hash, parameters and where the bitset starts, as written in the header."""
+    header = journal_file.read(HEADER.size)
+
+    if len(header) < HEADER.size:
+        raise JournalMismatchError(f"{path} is not a LOD Hopper journal")
+
+    magic, version, params_length, num_points, saved_hash = HEADER.unpack(header)
+
+    if magic != MAGIC or version != VERSION:
+        raise JournalMismatchError(f"{path} is not a LOD Hopper journal")
+
+    params = json.loads(journal_file.read(params_length) or b"{}")
+
+    return num_points, saved_hash, params, bitset_offset(params_length)
+
+
+def journal_summary(path: Path) -> JournalSummary:
+    """What a journal was written for and how much of it is done, without needing its plan."""
+    with open(path, "rb") as journal_file:
+        num_points, _, params, offset = journal_header(path, journal_file)
+
+        journal_file.seek(offset)
+        bitset = journal_file.read(-(-num_points // 8))
+
+    # Bits past the last point are never set, the whole bitset counts as one number
+    num_done = bin(int.from_bytes(bitset, "little")).count("1")
+
+    return JournalSummary(params=params, num_points=num_points, num_done=num_done)
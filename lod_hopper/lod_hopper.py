@@ -1,15 +1,15 @@
-import pyautogui
-from time import sleep
-from typing import Iterator
+from time import monotonic
+from typing import Callable, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+from pathlib import Path
 import numpy
 from datetime import timedelta
-from pynput import keyboard
+import asyncio
 import threading
+import tempfile
 import os
-import argparse
-from threading import Event
-from queue import Queue
-from dataclasses import dataclass
+import shutil
+from contextlib import ExitStack
+from dataclasses import dataclass, replace
 from lod_hopper.schemas import (
     Coordinate,
     SideInfo,
@@ -18,22 +18,111 @@ from lod_hopper.schemas import (
     Side,
     TeleporationRing,
 )
+from lod_hopper.plan import (
+    TeleportPlan,
+    teleport_plan_point,
+)
 from lod_hopper.grid_display import (
     GridData,
+    grid_data_from_grid,
+    grid_data_fit_level,
     grid_data_initialize,
-    grid_data_to_string,
-    grid_data_add_visited,
+    grid_data_to_lines,
+    grid_data_add_visited_indices,
+    grid_data_add_missing_indices,
+)
+from lod_hopper.mailbox import LatestMailbox
+from lod_hopper.dwell import (
+    FixedDwell,
+    LogDwell,
+    log_dwell_open,
+)
+from lod_hopper.rcon import (
+    RconClient,
+    RconTeleporter,
+    parse_address,
+    tp_command,
+)
+from lod_hopper.workers import Dwell, Teleporter, run_workers
+from lod_hopper.eta import RateEstimator, RunClock, chunks_per_teleport
+from lod_hopper.calibration import (
+    CalibrationError,
+    ProbeRow,
+    calibration_lines,
+    calibration_pick,
+    calibration_spacings,
+    calibration_to_profile,
+    probe_rows,
+    spacing_result,
+)
+from lod_hopper.profiles import profile_dir, profile_path, profile_save
+from lod_hopper.clock import Clock, SystemClock, VirtualClock, VirtualEventLoop
+from lod_hopper.control import RunControl, RunStopped
+from lod_hopper.simulate import (
+    RecordingInputSink,
+    parse_pause,
+    schedule_key_presses,
+    trace_commands,
+    trace_write,
+)
+from lod_hopper.metrics import (
+    Metrics,
+    TimedDwell,
+    TimedTeleporter,
+    metrics_export,
+    metrics_export_forever,
+    metrics_summary_lines,
+)
+from lod_hopper.regions import (
+    DIMENSION_IDS,
+    WorldDimension,
+    region_dir_for,
+    scan_for_points,
+    all_chunks_present,
+)
+from lod_hopper.jobs import BatchPlan
+from lod_hopper.shapes import region_square
+from lod_hopper.planning import (
+    get_region,
+    get_batch,
+    get_batch_params,
+    get_cached_plan,
+    get_seconds_per_point,
+    plan_main,
+)
+from lod_hopper.verify import verify_plan, retry_plan_build
+from lod_hopper.journal import (
+    Journal,
+    JournalMismatchError,
+    journal_create,
+    journal_open,
+    journal_mark,
+    journal_visited,
+    journal_close,
+)
+from lod_hopper.status_server import HOST, StatusBoard, status_server_start
+from lod_hopper.cli import main as cli_main
+from lod_hopper.renderer import (
+    renderer_initialize,
+    render_frame,
 )
-
-# Disable pyautogui failsafe
-pyautogui.FAILSAFE = False
 
 # Global state
-teleportation_paused = True
-ctrl_pressed = False
+# Waiting on anything in the game goes through this clock, and keys and text go to the input sink,
+# so a simulation can swap both out. The sink is pyautogui unless set.
+clock: Clock = SystemClock()
+input_sink = None
+
+# Timed by whichever clock is in use when measuring, the virtual one in simulations
+metrics = Metrics(monotonic=lambda: clock.monotonic())
+
+# How long the pause menu is left open for the game to save
+SINGLEPLAYER_SAVE_SECONDS = 5
 
-screen_update_queue = Queue()
-screen_update_event = Event()
+# Time to switch to the game window before calibrating in chat
+CALIBRATE_COUNTDOWN_SECONDS = 10
+
+screen_mailbox: LatestMailbox["ScreenUpdate"] = LatestMailbox()
 
 
 @dataclass(frozen=True)
@@ -48,74 +137,128 @@ class ScreenUpdate:
     coordinates_in_side: int
     coordinate: Coordinate
 
-    side_info: SideInfo
+    side_info: Optional[SideInfo]
     grid_data: GridData
 
     times_teleported: int
+    num_coordinates: int
     is_visualization_on: bool
+    command_latency: Optional[float]
+    player_positions: Tuple["PlayerPosition", ...] = ()
+    segment_name: str = "Ring"
+    teleports_per_minute: Optional[float] = None
+    chunks_per_minute: Optional[float] = None
+    # Added to the x of every coordinate to find it on the map, where a batch draws each dimension to one side
+    map_offset_x: Blocks = 0
+
+
+class PlayerPosition(NamedTuple):
+    name: str
+    coordinate: Optional[Coordinate]
+    times_teleported: int
 
 
-def update_screen(num_coordinates: int):
-    screen_update = None
-    num_hyphens = 100
-    shift_amount = 30  # Width for the name padding
+async def update_screen(control: RunControl, frames_per_second: float, stream: Optional[TextIO] = None, board: Optional[StatusBoard] = None):
+    renderer = renderer_initialize(stream)
+    frame_interval = 1 / frames_per_second
+    loop = asyncio.get_running_loop()
 
     while True:
-        # Wait for the screen update event to be triggered
-        screen_update_event.wait()
-        screen_update_event.clear()
-
-        if not screen_update_queue.empty():
-            screen_update: ScreenUpdate = screen_update_queue.get()
-
-        clear_screen()
+        # Wait for anything new from the run or the controls
+        screen_update, visited = await screen_mailbox.take_async()
+        frame_start = loop.time()
 
         if not screen_update:
-            print("Loading...")
+            render_frame(renderer, ["Loading..."])
             continue
 
-        status = "PAUSED" if teleportation_paused else "RUNNING"
-        print(bold("Progress") + f'{f"({status})":>{num_hyphens - 8}}')
-        print("-" * num_hyphens)
+        grid_data_add_visited_indices(screen_update.grid_data, visited)
+
+        if board is not None:
+            board.post(screen_update, control.paused)
+
+        with metrics.timer("render"):
+            render_frame(renderer, screen_lines(screen_update, control.paused))
+
+        # Cap the frame rate. Anything posted meanwhile is picked up by the next frame.
+        await asyncio.sleep(max(frame_interval - (loop.time() - frame_start), 0))
+
+
+def screen_lines(screen_update: ScreenUpdate, paused: bool = False) -> List[str]:
+    """Every line of one frame of the status screen."""
+    num_hyphens = 100
+    shift_amount = 30  # Width for the name padding
+    lines = []
 
-        # Total bar
-        bar = create_progress_bar(width=num_hyphens - shift_amount - 2, max=num_coordinates, current_index=screen_update.times_teleported, shift_amount=shift_amount, num_hyphens=num_hyphens)
-        print_wrapped(f"Total ({screen_update.time_estimate} left)", bar, shift_amount, num_hyphens)
+    status = "PAUSED" if paused else "RUNNING"
+    lines.append(bold("Progress") + f'{f"({status})":>{num_hyphens - 8}}')
+    lines.append("-" * num_hyphens)
 
-        print()
+    # Total bar
+    bar = create_progress_bar(width=num_hyphens - shift_amount - 2, max=screen_update.num_coordinates, current_index=screen_update.times_teleported, shift_amount=shift_amount, num_hyphens=num_hyphens)
+    lines += wrap_bar(f"Total ({screen_update.estimate_string} left)", bar, shift_amount, num_hyphens)
 
-        # Ring bar
-        bar = create_progress_bar(width=screen_update.total_rings, max=screen_update.total_rings, current_index=screen_update.ring_index, shift_amount=shift_amount, num_hyphens=num_hyphens)
-        print_wrapped("Ring", bar, shift_amount, num_hyphens)
+    lines.append("")
 
-        # Side bar
-        side_info = screen_update.side_info
+    # Ring bar (or rows, regions... for plans that aren't walked in rings)
+    bar = create_progress_bar(width=screen_update.total_rings, max=screen_update.total_rings, current_index=screen_update.ring_index, shift_amount=shift_amount, num_hyphens=num_hyphens)
+    lines += wrap_bar(screen_update.segment_name, bar, shift_amount, num_hyphens)
+
+    # Side bar
+    side_info = screen_update.side_info
+    if side_info is not None:
         bar = create_progress_bar(width=4, max=4, current_index=screen_update.side_index, shift_amount=shift_amount, num_hyphens=num_hyphens)
         sign = "+" if side_info.direction == Direction.positive else "-"
-        print_wrapped(f"Side  ({side_info.name.capitalize()}, Moving {sign}{side_info.dimension_moving_in.name.upper()}/{side_info.clockwise_moving.capitalize()})", bar, shift_amount, num_hyphens)
+        lines += wrap_bar(f"Side  ({side_info.name.capitalize()}, Moving {sign}{side_info.dimension_moving_in.name.upper()}/{side_info.clockwise_moving.capitalize()})", bar, shift_amount, num_hyphens)
 
-        # Coordinate bar
-        bar = create_progress_bar(
-            width=screen_update.coordinates_in_side, max=screen_update.coordinates_in_side, current_index=screen_update.coordinate_index, shift_amount=shift_amount, num_hyphens=num_hyphens
-        )
-        print_wrapped(f"Coord (x: {screen_update.coordinate.x},  z: {screen_update.coordinate.z})", bar, shift_amount, num_hyphens)
+    # Coordinate bar
+    bar = create_progress_bar(
+        width=screen_update.coordinates_in_side, max=screen_update.coordinates_in_side, current_index=screen_update.coordinate_index, shift_amount=shift_amount, num_hyphens=num_hyphens
+    )
+    lines += wrap_bar(f"Coord (x: {screen_update.coordinate.x},  z: {screen_update.coordinate.z})", bar, shift_amount, num_hyphens)
 
-        grid_data_add_visited(
-            screen_update.grid_data,
-            current_index=screen_update.times_teleported,
-        )
+    for player in screen_update.player_positions:
+        where = f"(x: {player.coordinate.x},  z: {player.coordinate.z})" if player.coordinate else "(starting)"
+        lines.append(f"{player.name + ' ' + where:<{shift_amount}}{player.times_teleported} teleports")
+
+    if screen_update.teleports_per_minute is not None:
+        lines.append(f"{'Speed':<{shift_amount}}{screen_update.teleports_per_minute:.1f} teleports/min, {screen_update.chunks_per_minute:,.0f} chunks/min")
+
+    if screen_update.command_latency is not None:
+        lines.append(f"{'Last command took':<{shift_amount}}{screen_update.command_latency * 1000:.0f} ms")
 
-        if screen_update.is_visualization_on:
-            print()
-            print(bold("Visualization"))
-            print("-" * num_hyphens)
-            print(grid_data_to_string(screen_update.grid_data))
-            print()
-            print("The visualization can be pretty big. Pause (CTRL+P) and scroll up for more info!")
-            print("It can also be turned off with -nov")
+    footer = ["", bold("CTRL+P to Pause, CTRL+N to Skip the Wait, CTRL+X to Stop")]
 
-        print()
-        print(bold("CTRL+P to Pause"))
+    if screen_update.is_visualization_on:
+        lines += ["", bold("Visualization"), "-" * num_hyphens]
+        # Only build the rows and cells the terminal can actually show
+        terminal_size = shutil.get_terminal_size()
+        # The legend under the map takes 3 lines
+        max_rows = max(terminal_size.lines - 1 - len(lines) - 3 - len(footer), 0)
+        max_cells = terminal_size.columns // 2
+        # Zoomed out as far as it takes for the whole map to fit
+        level = grid_data_fit_level(screen_update.grid_data, max_rows, max_cells)
+
+        with metrics.timer("grid"):
+            lines += grid_data_to_lines(
+                screen_update.grid_data,
+                max_rows=max_rows,
+                max_cells=max_cells,
+                players=[
+                    Coordinate(x=player.coordinate.x + screen_update.map_offset_x, z=player.coordinate.z)
+                    for player in screen_update.player_positions
+                    if player.coordinate
+                ],
+                level=level,
+            )
+
+        size = 2 ** level
+        legend = f"Each square is {size}x{size} teleports: ░ none done, ▒ some, ▓ half or more, █ all" if level else "Each square is one teleport"
+        hint = ["", legend, "It can also be turned off with -nov"]
+
+        lines += hint
+
+    return lines + footer
 
 
 def create_progress_bar(width: int, max: int, current_index: int, shift_amount: int, num_hyphens: int) -> str:
@@ -126,9 +269,9 @@ def create_progress_bar(width: int, max: int, current_index: int, shift_amount:
     return f"|{bar}|"
 
 
-def print_wrapped(name: str, bar: str, shift_amount: int, num_hyphens: int) -> None:
+def wrap_bar(name: str, bar: str, shift_amount: int, num_hyphens: int) -> List[str]:
     """
-    Prints the progress bar, wrapping to the next line if it's too long.
+    Lays out the progress bar, wrapping to the next line if it's too long.
     Wrapped lines will be aligned with the start of the bar.
     The last line will include the ending delimiter '|' if the bar has delimiters.
     """
@@ -157,14 +300,14 @@ def print_wrapped(name: str, bar: str, shift_amount: int, num_hyphens: int) -> N
 
     # Add ending delimiter if it's the last line
     end_char = end_delim if is_last_line else ''
-    print(f"{name:<{shift_amount}}{start_delim}{first_part}{end_char}")
+    lines = [f"{name:<{shift_amount}}{start_delim}{first_part}{end_char}"]
 
     # For wrapped lines, align with the start of the bar
     bar_indent = shift_amount + len(start_delim)
     # Calculate available width for wrapped lines
     available_width_wrapped = num_hyphens - bar_indent - len(end_delim)
 
-    # Continue printing wrapped lines
+    # Continue adding wrapped lines
     while bar_content:
         # Get the next segment of the bar content
         chunk_to_print = bar_content[:available_width_wrapped]
@@ -176,35 +319,50 @@ def print_wrapped(name: str, bar: str, shift_amount: int, num_hyphens: int) -> N
         # Add ending delimiter if it's the last line
         end_char = end_delim if is_last_line else ''
 
-        # Print the bar segment aligned with the bar start
-        print(f"{'':<{bar_indent}}{chunk_to_print}{end_char}")
+        # Add the bar segment aligned with the bar start
+        lines.append(f"{'':<{bar_indent}}{chunk_to_print}{end_char}")
+
+    return lines
 
 
 def bold(string):
     return f"\033[1m{string}\033[0m"
 
 
-def on_press(key):
-    global ctrl_pressed
-    global teleportation_paused
-    if key == keyboard.Key.ctrl_l:
-        ctrl_pressed = True
+async def listen_for_keys(control: RunControl) -> None:
+    """
+    CTRL+P pauses and resumes, CTRL+N skips the wait and CTRL+X stops, until cancelled.
+    pynput calls back on its own thread, which only hands the call to the loop.
+    """
+    from pynput import keyboard
+
+    loop = asyncio.get_running_loop()
+    hotkeys = {"p": control.toggle_pause, "n": control.skip, "x": control.stop}
+    ctrl_pressed = False
+
+    def on_press(key):
+        nonlocal ctrl_pressed
 
-    if ctrl_pressed and hasattr(key, "char") and key.char == "p":
-        screen_update_event.set()
-        teleportation_paused = not teleportation_paused
+        if key == keyboard.Key.ctrl_l:
+            ctrl_pressed = True
 
+        action = hotkeys.get(getattr(key, "char", None))
+        if ctrl_pressed and action is not None:
+            loop.call_soon_threadsafe(action)
 
-def on_release(key):
-    global ctrl_pressed
+    def on_release(key):
+        nonlocal ctrl_pressed
 
-    if key == keyboard.Key.ctrl_l:
-        ctrl_pressed = False
+        if key == keyboard.Key.ctrl_l:
+            ctrl_pressed = False
 
+    listener = keyboard.Listener(on_press=on_press, on_release=on_release)
+    listener.start()
 
-def listen_for_key():
-    with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
-        listener.join()
+    try:
+        await loop.create_future()
+    finally:
+        listener.stop()
 
 
 def clear_screen():
@@ -212,15 +370,14 @@ def clear_screen():
 
 
 def get_estimate_string(time_estimate: timedelta) -> str:
-    hours, minutes, seconds = (float(num) for num in (str(time_estimate).split(":")))
-
-    return (
-        f"{hours + minutes / 60:.1f} {'hours' if hours > 1 else 'hour'}"
-        if hours != 0
-        else f"{minutes + seconds / 60:.0f} {'minutes' if minutes > 1 else 'minute'}"
-        if minutes != 0
-        else f"{seconds:.0f} {'seconds' if seconds > 1 else 'second'}"
-    )
+    total_seconds = max(time_estimate.total_seconds(), 0)
+
+    # Biggest unit there is at least one of
+    for unit, unit_seconds, decimals in (("day", 86400, 1), ("hour", 3600, 1), ("minute", 60, 0), ("second", 1, 0)):
+        if total_seconds >= unit_seconds or unit == "second":
+            amount = f"{total_seconds / unit_seconds:.{decimals}f}"
+
+            return f"{amount} {unit if float(amount) == 1 else unit + 's'}"
 
 
 def get_all_teleporation_rings(
@@ -260,20 +417,86 @@ def get_all_teleporation_rings(
         current_ring_radius -= blocks_per_tp
 
 
+def get_input_sink():
+    global input_sink
+
+    if input_sink is None:
+        import pyautogui
+
+        # Disable pyautogui failsafe
+        pyautogui.FAILSAFE = False
+        input_sink = pyautogui
+
+    return input_sink
+
+
 def write_chat_message(message: str):
-    pyautogui.press("t")
-    sleep(0.1)
+    sink = get_input_sink()
+
+    sink.press("t")
+    clock.sleep(0.1)
 
-    pyautogui.typewrite(message)
-    sleep(0.1)
+    sink.typewrite(message)
+    clock.sleep(0.1)
 
-    pyautogui.press("enter")
+    sink.press("enter")
 
 
 def teleport(x: Blocks, y: Blocks, z: Blocks):
     write_chat_message(message=f"/tp {x} {y} {z}")
 
 
+@dataclass
+class ChatTeleporter:
+    """Teleports by typing the command into the focused game window."""
+    # Dimension id to teleport into, or None to stay in the current one
+    dimension: Optional[str] = None
+
+    def teleport(self, x: Blocks, y: Blocks, z: Blocks) -> float:
+        """Returns how long typing the command took."""
+        start = clock.monotonic()
+
+        if self.dimension is None:
+            teleport(x=x, y=y, z=z)
+        else:
+            write_chat_message(message="/" + tp_command("@s", x, y, z, self.dimension))
+
+        return clock.monotonic() - start
+
+    def save_world(self) -> None:
+        """Singleplayer worlds are saved whenever the game is paused."""
+        get_input_sink().press("esc")
+        clock.sleep(SINGLEPLAYER_SAVE_SECONDS)
+        get_input_sink().press("esc")
+
+
+def get_players(args) -> List[str]:
+    if args.players:
+        if args.rcon is None:
+            raise SystemExit("--players needs --rcon, since only one player can be typed for in chat")
+
+        return [name.strip() for name in args.players.split(",") if name.strip()]
+
+    return [args.player] if args.player else []
+
+
+def get_teleporter(args, player: Optional[str]) -> Union[ChatTeleporter, RconTeleporter]:
+    if args.rcon is None:
+        return ChatTeleporter()
+
+    if not player:
+        raise SystemExit("--rcon needs the name of the player to teleport, given with --player")
+
+    password = args.rcon_password or os.environ.get("LOD_HOPPER_RCON_PASSWORD", "")
+    host, port = parse_address(args.rcon)
+
+    # Every player gets their own connection, so their commands don't wait on each other
+    client = RconClient(host=host, port=port, password=password)
+    client.connect()
+
+    return RconTeleporter(client=client, player=player)
+
+
 def load_line(
     start_coord: Blocks,
     end_coord: Blocks,
@@ -288,147 +511,593 @@ def load_line(
     return tuple(map(int, coordinate_values))
 
 
-def command_line_parsing():
-    """Command line arguments"""
-    parser = argparse.ArgumentParser(
-        description="""
-        Script for loading a wide area in Minecraft. 
-        Created for the purpose of generating "LODs" for the
-        "Distant Horizons" mod on servers.
-        """
-    )
+def get_generated(args, plan: TeleportPlan, cell_size: Blocks, batch: Optional[BatchPlan] = None) -> numpy.ndarray:
+    """Which teleports can be skipped, because the world already has every chunk around them."""
+    generated = numpy.zeros(len(plan), dtype=bool)
 
-    parser.add_argument(
-        "-r",
-        "--desired-radius",
-        type=int,
-        required=True,
-        help="Desired radius to be loaded (required)",
-    )
+    if args.world is None or len(plan) == 0:
+        return generated
 
-    parser.add_argument(
-        "-e",
-        "--exclude",
-        type=int,
-        default=0,
-        help="Exclude any inner radius already completed (default: 0)",
-    )
+    # A batch has every job checked against its own dimension
+    if batch is None:
+        dimensions = {WorldDimension[args.dimension]: numpy.arange(len(plan))}
+    else:
+        job_dimensions = numpy.array([list(WorldDimension).index(job.dimension) for job in batch.jobs])
+        point_dimensions = job_dimensions[plan.ring]
+        dimensions = {dimension: numpy.flatnonzero(point_dimensions == code) for code, dimension in enumerate(WorldDimension)}
 
-    parser.add_argument(
-        "-s",
-        "--seconds-per-tp",
-        type=int,
-        default=3,
-        help="Seconds to wait per teleport - shorter if you have a faster PC (default: 3)",
-    )
+    half_width = cell_size // 2
 
-    parser.add_argument(
-        "-b",
-        "--blocks-per-tp",
-        type=int,
-        default=100,
-        help="Radius of blocks loaded per teleport jump (default: 100)",
-    )
+    for dimension, indices in dimensions.items():
+        if len(indices) == 0:
+            continue
 
-    parser.add_argument(
-        "-y",
-        "--height",
-        type=int,
-        default=180,  # Just below the clouds
-        help="Your Y axis coordinate each time you teleport (default: 180)",
-    )
+        region_dir = region_dir_for(args.world, dimension)
+        start = monotonic()
 
-    parser.add_argument(
-        "-nov",
-        "--no-visualization",
-        action="store_true",
-        help="Will turn off map visualization, which is enabled by default.",
-    )
+        x, z = plan.x[indices], plan.z[indices]
+        presence = scan_for_points(region_dir, x, z, half_width)
+        generated[indices] = all_chunks_present(presence, x, z, half_width)
+
+        print(
+            f"Skipping {int(generated[indices].sum())} of {len(indices)} teleports already generated in {region_dir} "
+            f"({presence.region_files_read} region files read in {monotonic() - start:.2f}s)"
+        )
+
+    return generated
+
+
+def get_journal(args, plan: TeleportPlan, params: dict) -> Journal:
+    if not args.resume:
+        # A forgotten --resume would otherwise throw away everything the last run did
+        if args.journal.exists() and not args.fresh:
+            raise SystemExit(f"{args.journal} has the progress of an earlier run, add --resume to continue it or --fresh to start over")
 
-    return parser.parse_args()
+        return journal_create(args.journal, plan, params)
+
+    try:
+        return journal_open(args.journal, plan, params)
+    except FileNotFoundError:
+        raise SystemExit(f"There is no journal at {args.journal} to resume from")
+    except JournalMismatchError as error:
+        raise SystemExit(f"Can't resume: {error}")
+
+
+def get_dwell_policy(args, run_clock: RunClock, seconds_per_tp: Optional[float] = None) -> Union[FixedDwell, LogDwell]:
+    fixed_dwell = FixedDwell(seconds=args.seconds_per_tp if seconds_per_tp is None else seconds_per_tp, sleep=clock.sleep)
+
+    if args.log_file is None:
+        return fixed_dwell
+
+    return log_dwell_open(
+        log_path=args.log_file,
+        fallback=fixed_dwell,
+        min_seconds=args.min_dwell,
+        max_seconds=args.max_dwell,
+        quiet_seconds=args.quiet_period,
+        pattern=args.log_pattern,
+        sleep=clock.sleep,
+        # Paused time doesn't count towards the dwell
+        monotonic=run_clock.now,
+    )
 
 
 def main():
-    args = command_line_parsing()
+    cli_main()
+
+
+def run_main(args):
+    """The run and simulate commands."""
+    if args.verify and args.world is None:
+        raise SystemExit("--verify needs --world, to know where the region files are")
+
+    if args.jobs is not None and args.verify:
+        raise SystemExit("--jobs can't be used with --verify yet")
+
+    if args.export_plan is not None:
+        plan_main(args)
+        return
+
+    simulation = simulation_start(args) if args.simulate else None
+    control = RunControl(paused=True, monotonic=clock.monotonic, on_change=screen_mailbox.notify, metrics=metrics)
 
-    desired_radius = Blocks(args.desired_radius)
-    radius_done = Blocks(args.exclude)
-    seconds_per_teleport = args.seconds_per_tp
-    blocks_per_tp = args.blocks_per_tp
-    teleportation_height = args.height
     is_visualization_on = not args.no_visualization
+    players = get_players(args)
+    teleporter = get_teleporter(args, players[0] if players else None)
 
     """Set things up"""
-    keyboard_listener = threading.Thread(target=listen_for_key, daemon=True)
-    keyboard_listener.start()
+    if simulation is None:
+        clear_screen()
 
-    clear_screen()
-    print("Make sure your world is open with no GUIs up.")
-    print('Press "CTRL+P" to start and stop!')
+    if isinstance(teleporter, ChatTeleporter):
+        print("Make sure your world is open with no GUIs up.")
+    print('Press "CTRL+P" to start and stop, "CTRL+N" to skip the wait and "CTRL+X" to end the run!')
 
-    ring_list = tuple(get_all_teleporation_rings(desired_radius, radius_done, blocks_per_tp))
+    if args.jobs is None:
+        batch = None
+        cached = get_cached_plan(args)
+        plan, cell_size = cached.plan, cached.cell_size
+        grid_data = grid_data_from_grid(plan.x, plan.z, cached.grid, cell_size)
+        journal = get_journal(args, plan, cached.params)
+    else:
+        batch = get_batch(args)
+        plan, cell_size = batch.plan, args.blocks_per_tp
+        # Every dimension side by side on one map
+        grid_data = grid_data_initialize(batch.display_x, plan.z, cell_size)
+        journal = get_journal(args, plan, get_batch_params(args, batch))
 
-    coordinates_list = tuple(coordinates for ring in ring_list for side in ring for coordinates in side.coordinates)
+    visited = journal_visited(journal) | get_generated(args, plan, cell_size, batch)
+    grid_data_add_visited_indices(grid_data, numpy.flatnonzero(visited))
 
-    grid_data = grid_data_initialize(coordinates_list, blocks_per_tp)
-    num_coordinates = len(coordinates_list)
+    """Timing estimate stuff"""
+    total_seconds = numpy.sum(get_seconds_per_point(args, plan, batch)[~visited]) / max(len(players), 1)
 
-    screen_thread = threading.Thread(
-        target=update_screen,
-        args=(num_coordinates,),
-        daemon=True,
-    )
-    screen_thread.start()
+    print(f"\nTime to Complete: {timedelta(seconds=total_seconds)}")
 
-    """Timing estimate stuff"""
-    total_seconds = num_coordinates * seconds_per_teleport
-    original_time_estimate = timedelta(seconds=total_seconds)
-
-    print(f"\nTime to Complete: {original_time_estimate}")
-
-    time_estimate = original_time_estimate
-
-    """Main process loop"""
-    times_teleported = 0
-
-    # Triple for loop so that we can track where we are in relation to each part
-    # (so we can know which ring we're on, which side we're at, and which coordinate of the side we're at)
-    for ring_i, ring in enumerate(ring_list):
-        for side_i, side in enumerate(ring):
-            for coordinate_i, coordinate in enumerate(side.coordinates):
-                # Wait for the chunks to render.
-                sleep(seconds_per_teleport)
-
-                time_estimate -= timedelta(seconds=seconds_per_teleport)
-
-                estimate_string = get_estimate_string(time_estimate)
-
-                while teleportation_paused:
-                    # If it's paused, we just chill here.
-                    sleep(1)
-
-                screen_update = ScreenUpdate(
-                    time_estimate=time_estimate,
-                    estimate_string=estimate_string,
-                    ring_index=ring_i,
-                    side_index=side_i,
-                    coordinate_index=coordinate_i,
-                    total_rings=len(ring_list),
-                    coordinates_in_side=len(side.coordinates),
-                    coordinate=coordinate,
-                    side_info=side.side_info,
-                    grid_data=grid_data,
-                    times_teleported=times_teleported,
-                    is_visualization_on=is_visualization_on,
+    teleporters = [teleporter] + [get_teleporter(args, player) for player in players[1:]]
+    teleporters = [TimedTeleporter(teleporter, metrics) for teleporter in teleporters]
+    # Every player waits on the chunks around themselves
+    dwells = [TimedDwell(get_dwell_policy(args, control.clock), metrics, monotonic=control.clock.now) for _ in teleporters]
+
+    if args.metrics_dir is not None:
+        args.metrics_dir.mkdir(parents=True, exist_ok=True)
+        threading.Thread(target=metrics_export_forever, args=(metrics, args.metrics_dir), daemon=True).start()
+
+    if simulation is None:
+        loop = asyncio.new_event_loop()
+    else:
+        loop = simulation.loop
+        schedule_key_presses(simulation.clock, simulation.sink, simulation.pauses, lambda: loop.call_soon_threadsafe(control.toggle_pause))
+
+    board, status_server = None, None
+    if args.status_port is not None:
+        board = StatusBoard(metrics)
+
+        # The server's threads hand pause and resume to the loop, like the keyboard's
+        try:
+            status_server = status_server_start(
+                args.status_port,
+                board,
+                on_pause=lambda: loop.call_soon_threadsafe(control.pause),
+                on_resume=lambda: loop.call_soon_threadsafe(control.resume),
+            )
+        except OSError as error:
+            loop.close()
+            raise SystemExit(f"Can't serve the status on port {args.status_port}: {error}")
+
+        print(f"Status at http://{HOST}:{status_server.server_address[1]}/")
+
+    try:
+        loop.run_until_complete(run(args, control, simulation, batch, plan, grid_data, cell_size, players, teleporters, dwells, is_visualization_on, visited, journal, board))
+    finally:
+        if status_server is not None:
+            status_server.shutdown()
+            status_server.server_close()
+
+        loop.close()
+        print_metrics(args)
+
+        if simulation is not None:
+            simulation_finish(args, simulation)
+
+
+async def run(
+    args,
+    control: RunControl,
+    simulation: Optional["Simulation"],
+    batch: Optional[BatchPlan],
+    plan: TeleportPlan,
+    grid_data: GridData,
+    cell_size: Blocks,
+    players: List[str],
+    teleporters: List[Teleporter],
+    dwells: List[Dwell],
+    is_visualization_on: bool,
+    visited: numpy.ndarray,
+    journal: Journal,
+    board: Optional[StatusBoard] = None,
+) -> None:
+    """The whole run, with the screen and the keyboard as tasks beside it."""
+    with ExitStack() as stack:
+        # A simulation still draws every frame, just not to the terminal
+        stream = stack.enter_context(open(os.devnull, "w")) if simulation else None
+        tasks = [asyncio.ensure_future(update_screen(control, args.fps, stream, board))]
+
+        if simulation is None:
+            tasks.append(asyncio.ensure_future(listen_for_keys(control)))
+
+        try:
+            if batch is None:
+                await run_plan(
+                    args,
+                    plan,
+                    grid_data,
+                    players,
+                    teleporters,
+                    dwells,
+                    is_visualization_on,
+                    visited,
+                    on_loaded=lambda index: journal_mark(journal, index),
+                    control=control,
                 )
+            else:
+                await run_batch(args, batch, grid_data, players, teleporters, is_visualization_on, visited, journal, control)
+
+            if args.verify:
+                await verify_run(args, plan, grid_data, cell_size, players, teleporters, dwells, is_visualization_on, control)
+        except RunStopped:
+            print("\nStopped, --resume picks up from here")
+        finally:
+            # Verifying never marks the journal, so it stays open until everything is done
+            journal_close(journal)
+
+            for task in tasks:
+                task.cancel()
+
+            # Cancelled tasks still have to run their finally blocks, like stopping the key listener's thread
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class Simulation(NamedTuple):
+    clock: VirtualClock
+    loop: VirtualEventLoop
+    sink: RecordingInputSink
+    pauses: List[Tuple[float, float]]
+    started: float
+    # Holds the copy of the journal. Removed when the simulation finishes, or when it's collected if it never does
+    directory: Optional[tempfile.TemporaryDirectory] = None
+
+
+def simulation_start(args) -> Simulation:
+    """Points the clock, the input and the journal (of commands that keep one) somewhere harmless."""
+    global clock, input_sink
+
+    if args.rcon is not None:
+        raise SystemExit("--simulate stands in for the game window, it can't be used with --rcon")
+
+    try:
+        pauses = [parse_pause(spec) for spec in args.simulate_pause]
+    except ValueError as error:
+        raise SystemExit(f"--simulate-pause: {error}")
+
+    clock = VirtualClock()
+    input_sink = RecordingInputSink(clock)
+
+    # Never touch the real journal, but do start from it when resuming
+    directory = None
+    if getattr(args, "journal", None) is not None:
+        directory = tempfile.TemporaryDirectory(prefix="lod_hopper-")
+        journal = Path(directory.name) / args.journal.name
+        if args.resume and args.journal.exists():
+            shutil.copyfile(args.journal, journal)
+        args.journal = journal
+
+    return Simulation(clock=clock, loop=VirtualEventLoop(clock), sink=input_sink, pauses=pauses, started=monotonic(), directory=directory)
+
+
+def simulation_finish(args, simulation: Simulation) -> None:
+    commands = trace_commands(simulation.sink.trace)
+    simulated = timedelta(seconds=round(simulation.clock.monotonic()))
+
+    print(f"\nSimulated {len(commands)} commands over {simulated} in {monotonic() - simulation.started:.2f}s")
+
+    if args.trace is not None:
+        trace_write(args.trace, simulation.sink.trace)
+        print(f"Trace written to {args.trace}")
+
+    if simulation.directory is not None:
+        simulation.directory.cleanup()
+
+
+def print_metrics(args) -> None:
+    """Where the time went, printed once the run ends (or is stopped)."""
+    histograms = metrics.snapshot()
+
+    if args.metrics_dir is not None:
+        metrics_export(metrics, args.metrics_dir)
+
+    if histograms:
+        print("\n" + "\n".join(metrics_summary_lines(histograms)))
+
+
+async def run_plan(
+    args,
+    plan: TeleportPlan,
+    grid_data: GridData,
+    players: List[str],
+    teleporters: List[Teleporter],
+    dwells: List[Dwell],
+    is_visualization_on: bool,
+    visited: numpy.ndarray,
+    on_loaded: Callable[[int], None],
+    control: RunControl,
+    height: Optional[Blocks] = None,
+    indices: Optional[numpy.ndarray] = None,
+    estimator: Optional[RateEstimator] = None,
+    map_offset_x: Blocks = 0,
+) -> None:
+    """
+    Teleports through every point of the plan that isn't visited yet (or just the given indices),
+    every player through their own slice of it at the same time.
+    on_loaded(index) is called once the chunks around a teleport had time to load.
+    """
+    if estimator is None:
+        estimator = RateEstimator(
+            remaining=int(numpy.count_nonzero(~visited)),
+            seconds_per_teleport=args.seconds_per_tp / max(len(players), 1),
+            chunks_per_teleport=chunks_per_teleport(grid_data.blocks_per_tp),
+            clock=control.clock,
+        )
+    times_teleported = int(visited.sum())
+    positions = [PlayerPosition(name=name, coordinate=None, times_teleported=0) for name in players]
+
+    def on_teleport(worker: int, index: int, command_latency: float) -> None:
+        nonlocal times_teleported
+
+        # The plan keeps track of where we are in relation to each part
+        # (so we can know which ring we're on, which side we're at, and which coordinate of the side we're at)
+        point = teleport_plan_point(plan, index)
+        times_teleported += 1
+
+        if len(positions) > 1:
+            positions[worker] = PlayerPosition(
+                name=players[worker],
+                coordinate=point.coordinate,
+                times_teleported=positions[worker].times_teleported + 1,
+            )
+
+        estimator.record()
+        time_estimate = timedelta(seconds=round(estimator.seconds_left()))
+
+        screen_update = ScreenUpdate(
+            time_estimate=time_estimate,
+            estimate_string=get_estimate_string(time_estimate),
+            ring_index=point.ring_index,
+            side_index=point.side_index,
+            coordinate_index=point.coordinate_index,
+            total_rings=plan.num_rings,
+            coordinates_in_side=point.coordinates_in_side,
+            coordinate=point.coordinate,
+            side_info=point.side_info,
+            grid_data=grid_data,
+            times_teleported=times_teleported,
+            num_coordinates=len(plan),
+            is_visualization_on=is_visualization_on,
+            command_latency=command_latency,
+            player_positions=tuple(positions) if len(positions) > 1 else (),
+            segment_name=plan.segment_name,
+            teleports_per_minute=estimator.teleports_per_minute(),
+            chunks_per_minute=estimator.chunks_per_minute(),
+            map_offset_x=map_offset_x,
+        )
+
+        # Hand the latest state to the screen, never waiting on it.
+        screen_mailbox.post(screen_update, visited_index=index)
+
+    await run_workers(
+        plan=plan,
+        teleporters=teleporters,
+        dwells=dwells,
+        height=args.height if height is None else height,
+        on_teleport=on_teleport,
+        wait_running=control.wait_running,
+        sleep=control.sleep,
+        indices=numpy.flatnonzero(~visited) if indices is None else indices,
+        on_loaded=lambda worker, index: on_loaded(index),
+    )
+
+
+async def run_batch(
+    args,
+    batch: BatchPlan,
+    grid_data: GridData,
+    players: List[str],
+    teleporters: List[TimedTeleporter],
+    is_visualization_on: bool,
+    visited: numpy.ndarray,
+    journal: Journal,
+    control: RunControl,
+) -> None:
+    """Runs the jobs one after the other as a single run: the map, progress and time left cover all of them."""
+    seconds_per_point = get_seconds_per_point(args, batch.plan, batch)
+    estimator = RateEstimator(
+        remaining=int(numpy.count_nonzero(~visited)),
+        seconds_per_teleport=float(numpy.mean(seconds_per_point[~visited])) / max(len(players), 1) if not visited.all() else args.seconds_per_tp,
+        chunks_per_teleport=chunks_per_teleport(grid_data.blocks_per_tp),
+        clock=control.clock,
+    )
+
+    def on_loaded(index: int) -> None:
+        # Later jobs count the earlier ones as done
+        visited[index] = True
+        journal_mark(journal, index)
+
+    for number, job in enumerate(batch.jobs):
+        indices = batch.job_indices(number)
+        indices = indices[~visited[indices]]
+        if len(indices) == 0:
+            continue
+
+        # Every command of a batch names its dimension, wherever the player is
+        dimension = DIMENSION_IDS[job.dimension]
+        job_teleporters = [replace(teleporter, teleporter=replace(teleporter.teleporter, dimension=dimension)) for teleporter in teleporters]
+        # A job keeps to one dimension, and the map shifts a whole dimension at once
+        map_offset_x = int(batch.display_x[indices[0]]) - int(batch.plan.x[indices[0]])
+
+        await run_plan(
+            args,
+            replace(batch.plan, segment_name=f"Job ({job.name})"),
+            grid_data,
+            players,
+            job_teleporters,
+            [TimedDwell(get_dwell_policy(args, control.clock, job.seconds_per_tp), metrics, monotonic=control.clock.now) for _ in teleporters],
+            is_visualization_on,
+            visited,
+            on_loaded=on_loaded,
+            control=control,
+            height=job.height,
+            indices=indices,
+            estimator=estimator,
+            map_offset_x=map_offset_x,
+        )
+
+
+async def verify_run(
+    args,
+    plan: TeleportPlan,
+    grid_data: GridData,
+    cell_size: Blocks,
+    players: List[str],
+    teleporters: List[Teleporter],
+    dwells: List[Dwell],
+    is_visualization_on: bool,
+    control: RunControl,
+) -> None:
+    """Checks the world for holes the run left, then flies over just those, up to --retries times."""
+    region_dir = region_dir_for(args.world, WorldDimension[args.dimension])
+    half_width = cell_size // 2
+    checked = None
+
+    for attempt in range(args.retries + 1):
+        # Chunks only show up in the region files once they are saved
+        await control.wait_running()
+        await asyncio.to_thread(teleporters[0].save_world)
+
+        verification = await asyncio.to_thread(verify_plan, region_dir, plan, half_width, checked)
+        grid_data_add_missing_indices(grid_data, numpy.flatnonzero(verification.missing))
+        screen_mailbox.notify()
+
+        print(
+            f"\nVerified {len(plan) if checked is None else len(checked)} teleports against {verification.region_files_read} region files: "
+            f"{verification.num_missing} left {verification.chunks_missing} chunks ungenerated"
+        )
+
+        if verification.num_missing == 0 or attempt == args.retries:
+            return
+
+        retry = retry_plan_build(plan, verification.missing, cell_size)
+        print(f"Retry pass {attempt + 1} of {args.retries}: {len(retry.plan)} teleports")
+
+        # Same grid, seen through the retry plan's indices
+        retry_grid_data = replace(grid_data, x=retry.plan.x, z=retry.plan.z)
+
+        await run_plan(
+            args,
+            retry.plan,
+            retry_grid_data,
+            players,
+            teleporters,
+            dwells,
+            is_visualization_on,
+            numpy.zeros(len(retry.plan), dtype=bool),
+            on_loaded=lambda index: None,
+            control=control,
+        )
+
+        # Only the holes need checking again
+        checked = retry.indices
+
+
+def calibrate_main(args):
+    """
+    The calibrate command: a row of probe teleports at every spacing, timed with the log and
+    checked for holes in the region files, then the fastest spacing and wait saved to the profile.
+    """
+    if args.log_file is None and args.world is None:
+        raise SystemExit("calibrate needs --log-file to time chunk loading, --world to check for holes, or both")
+
+    if args.probes < 2:
+        raise SystemExit("--probes needs at least 2 teleports per spacing, to see the chunks between them")
+
+    simulation = simulation_start(args) if args.simulate else None
+    players = get_players(args)
+    teleporter = get_teleporter(args, players[0] if players else None)
+    if args.dimension != WorldDimension.overworld.name:
+        teleporter = replace(teleporter, dimension=DIMENSION_IDS[WorldDimension[args.dimension]])
+
+    # Starting in the area's corner, so the probes load chunks the run needs anyway
+    center_x, center_z, radius = region_square(get_region(args))
+    spacings = calibration_spacings(args.blocks_per_tp, checked=args.world is not None)
+    rows = probe_rows(spacings, args.probes, center_x - radius, center_z - radius)
+    region_dir = None if args.world is None else region_dir_for(args.world, WorldDimension[args.dimension])
+
+    if region_dir is not None:
+        generated = [row.spacing for row in rows if calibration_row_covered(region_dir, row).any()]
+        if generated:
+            raise SystemExit(
+                f"Chunks at the probes for spacings {', '.join(map(str, generated))} are already generated, "
+                "so they can't be timed. Calibrate with an area whose corner is still ungenerated"
+            )
+
+    print(f"Calibrating profile {args.profile!r}: {args.probes} teleports at each of {len(spacings)} spacings")
+
+    if isinstance(teleporter, ChatTeleporter) and simulation is None:
+        print(f"Switch to the game with no GUIs up, the first teleport is in {CALIBRATE_COUNTDOWN_SECONDS} seconds")
+        clock.sleep(CALIBRATE_COUNTDOWN_SECONDS)
+
+    dwell = get_dwell_policy(args, RunClock(monotonic=clock.monotonic))
+    probed = []
+
+    for row in rows:
+        settle_seconds, command_seconds = [], []
+
+        for x, z in zip(row.x.tolist(), row.z.tolist()):
+            command_seconds.append(teleporter.teleport(x=x, y=args.height, z=z))
+            waited = dwell.wait()
+
+            # The log went quiet this long before the wait ended, unless it never did
+            settled = isinstance(dwell, LogDwell) and dwell.tail is not None and waited < args.max_dwell
+            settle_seconds.append(max(waited - args.quiet_period, 0) if settled else waited)
+
+        print(f"Spacing {row.spacing}: waited {', '.join(f'{seconds:.1f}s' for seconds in settle_seconds)}")
+        probed.append((row, settle_seconds, command_seconds))
+
+    measured = isinstance(dwell, LogDwell) and dwell.tail is not None
+    if measured and all(seconds == 0 for _, settle_seconds, _ in probed for seconds in settle_seconds):
+        raise SystemExit("The log showed no chunk loading after any teleport, check --log-file and --log-pattern")
+
+    if region_dir is not None:
+        # Chunks only show up in the region files once they are saved
+        teleporter.save_world()
+
+    results = [
+        spacing_result(
+            row.spacing,
+            settle_seconds,
+            command_seconds,
+            covered=None if region_dir is None else bool(calibration_row_covered(region_dir, row).all()),
+            measured=measured,
+        )
+        for row, settle_seconds, command_seconds in probed
+    ]
+
+    try:
+        calibration = calibration_pick(results)
+    except CalibrationError as error:
+        raise SystemExit(f"Can't calibrate: {error}")
+
+    path = profile_path(profile_dir(), args.profile)
+    profile_save(path, calibration_to_profile(
+        calibration,
+        world=None if args.world is None else str(args.world),
+        rcon=args.rcon,
+        dimension=args.dimension,
+        log_file=None if args.log_file is None else str(args.log_file),
+    ))
+
+    print("\n" + "\n".join(calibration_lines(calibration)))
+    print(f"\nBest: --blocks-per-tp {calibration.blocks_per_tp} --seconds-per-tp {calibration.seconds_per_tp:g}")
+    print(f"Saved to {path}, use them with --profile {args.profile}")
+
+    if simulation is not None:
+        simulation_finish(args, simulation)
 
-                # Send signal to the update_screen thread.
-                screen_update_queue.put(screen_update)
-                screen_update_event.set()
 
-                teleport(x=coordinate.x, y=teleportation_height, z=coordinate.z)
+def calibration_row_covered(region_dir: Path, row: ProbeRow) -> numpy.ndarray:
+    """Whether every chunk a run with the row's spacing leaves to each probe is generated."""
+    presence = scan_for_points(region_dir, row.x, row.z, row.spacing // 2)
 
-                times_teleported += 1
+    return all_chunks_present(presence, row.x, row.z, row.spacing // 2)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LatestMailbox(Generic[T]):
+    """
+    Single slot for handing state to the screen.
+    Posting never blocks: a newer state replaces an unread one, while visited
+    indices pile up until taken so no grid cell is skipped.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._state: Optional[T] = None
+        self._visited: List[int] = []
+        self._has_news = False
+        # Set by an event loop reader waiting in take_async
+        self._waiter: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = None
+
+    def post(self, state: Optional[T] = None, visited_index: Optional[int] = None) -> None:
+        with self._condition:
+            if state is not None:
+                self._state = state
+
+            if visited_index is not None:
+                self._visited.append(visited_index)
+
+            self._has_news = True
+            self._condition.notify()
+
+            if self._waiter is not None:
+                loop, event = self._waiter
+                self._waiter = None
+                loop.call_soon_threadsafe(event.set)
+
+    def notify(self) -> None:
+        """Wakes the reader without new state, e.g. when pausing changes what is shown."""
+        self.post()
+
+    def take(self, timeout: Optional[float] = None) -> Tuple[Optional[T], List[int]]:
+        """
+        Waits for news and returns the latest state with every index visited since the last take.
+        The state is kept, so it is returned again on the next take if nothing newer was posted.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._has_news, timeout=timeout)
+
+            return self._take_news()
+
+    async def take_async(self) -> Tuple[Optional[T], List[int]]:
+        """take for a reader on an event loop, woken by posts from any thread."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            with self._condition:
+                if self._has_news:
+                    return self._take_news()
+
+                event = asyncio.Event()
+                self._waiter = (loop, event)
+
+            await event.wait()
+
+    def _take_news(self) -> Tuple[Optional[T], List[int]]:
+        visited = self._visited
+        self._visited = []
+        self._has_news = False
+
+        return self._state, visited
@@ -0,0 +1,197 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+from lod_hopper.dwell import DwellSteps
+from lod_hopper.workers import Dwell, Teleporter
+
+# Upper bounds of the histogram buckets in seconds, from a fast RCON reply up to a long dwell
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_NAME = "lod_hopper_phase_seconds"
+JSON_LINES_NAME = "lod_hopper_metrics.jsonl"
+PROMETHEUS_NAME = "lod_hopper.prom"
+
+# How often metrics are written out while running
+EXPORT_EVERY_SECONDS = 15
+
+
+@dataclass
+class Histogram:
+    # One count per bucket, plus one for anything slower than the last bound
+    counts: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+    count: int = 0
+    sum: float = 0
+    max: float = 0
+
+
+class Metrics:
+    """Time spent in each phase of a run. Cheap enough to leave on: one lock and a bisect per measurement."""
+
+    def __init__(self, monotonic: Callable[[], float] = time.perf_counter):
+        # The run's clock, so simulated runs are measured in simulated time
+        self.monotonic = monotonic
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def observe(self, phase: str, seconds: float) -> None:
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+
+        with self._lock:
+            histogram = self._histograms.get(phase)
+            if histogram is None:
+                histogram = self._histograms[phase] = Histogram()
+
+            histogram.counts[bucket] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+            histogram.max = max(histogram.max, seconds)
+
+    @contextmanager
+    def timer(self, phase: str, monotonic: Optional[Callable[[], float]] = None) -> Iterator[None]:
+        """Times the block by the metrics' clock, or by monotonic when given."""
+        monotonic = monotonic or self.monotonic
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.observe(phase, monotonic() - start)
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        """Copy of every histogram, safe to format while the run goes on."""
+        with self._lock:
+            return {
+                phase: Histogram(counts=list(histogram.counts), count=histogram.count, sum=histogram.sum, max=histogram.max)
+                for phase, histogram in sorted(self._histograms.items())
+            }
+
+
+@dataclass
+class TimedTeleporter:
+    """Any teleporter, with every command it sends timed."""
+    teleporter: Teleporter
+    metrics: Metrics
+    phase: str = "command"
+
+    def teleport(self, x: int, y: int, z: int) -> float:
+        with self.metrics.timer(self.phase):
+            return self.teleporter.teleport(x=x, y=y, z=z)
+
+    def save_world(self) -> None:
+        self.teleporter.save_world()
+
+
+@dataclass
+class TimedDwell:
+    dwell: Dwell
+    metrics: Metrics
+    phase: str = "dwell"
+    # Clock that stands still while paused, so pauses only count as "pause"
+    monotonic: Optional[Callable[[], float]] = None
+
+    def steps(self) -> DwellSteps:
+        with self.metrics.timer(self.phase, self.monotonic):
+            return (yield from self.dwell.steps())
+
+    def wait(self) -> float:
+        with self.metrics.timer(self.phase, self.monotonic):
+            return self.dwell.wait()
+
+
+def histogram_quantile(histogram: Histogram, quantile: float) -> float:
+    """Estimated from the buckets, interpolating inside the one the quantile falls in."""
+    if histogram.count == 0:
+        return 0
+
+    rank = quantile * histogram.count
+    seen = 0
+
+    for bucket, count in enumerate(histogram.counts):
+        if seen + count >= rank and count:
+            lower = BUCKETS[bucket - 1] if bucket > 0 else 0
+            upper = BUCKETS[bucket] if bucket < len(BUCKETS) else histogram.max
+
+            return min(lower + (upper - lower) * (rank - seen) / count, histogram.max)
+
+        seen += count
+
+    return histogram.max
+
+
+def metrics_to_json_line(histograms: Dict[str, Histogram], timestamp: float) -> str:
+    return json.dumps({
+        "time": round(timestamp, 3),
+        "buckets": list(BUCKETS),
+        "phases": {
+            phase: {"count": histogram.count, "sum": round(histogram.sum, 6), "max": round(histogram.max, 6), "counts": histogram.counts}
+            for phase, histogram in histograms.items()
+        },
+    })
+
+
+def metrics_to_prometheus(histograms: Dict[str, Histogram]) -> str:
+    """Prometheus text format, for node_exporter's textfile collector."""
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each phase of a LOD Hopper run.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+
+    for phase, histogram in histograms.items():
+        cumulative = 0
+
+        for bound, count in zip(list(BUCKETS) + ["+Inf"], histogram.counts):
+            cumulative += count
+            lines.append(f'{METRIC_NAME}_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+
+        lines.append(f'{METRIC_NAME}_sum{{phase="{phase}"}} {histogram.sum:.6f}')
+        lines.append(f'{METRIC_NAME}_count{{phase="{phase}"}} {histogram.count}')
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_summary_lines(histograms: Dict[str, Histogram]) -> List[str]:
+    """Table of where the time went, one phase per row."""
+    total = sum(histogram.sum for histogram in histograms.values()) or 1
+    lines = [f"{'Phase':<10}{'Count':>8}{'Total':>12}{'Share':>8}{'Mean':>10}{'p50':>10}{'p95':>10}{'Max':>10}"]
+
+    for phase, histogram in histograms.items():
+        mean = histogram.sum / max(histogram.count, 1)
+        lines.append(
+            f"{phase:<10}{histogram.count:>8}{histogram.sum:>11.1f}s{histogram.sum / total:>8.0%}"
+            f"{format_seconds(mean):>10}{format_seconds(histogram_quantile(histogram, 0.5)):>10}"
+            f"{format_seconds(histogram_quantile(histogram, 0.95)):>10}{format_seconds(histogram.max):>10}"
+        )
+
+    return lines
+
+
+def format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Scrapers never see a half written file."""
+    temporary_path = Path(f"{path}.tmp")
+    temporary_path.write_text(text)
+    os.replace(temporary_path, path)
+
+
+def metrics_export(metrics: Metrics, directory: Path, timestamp: Optional[float] = None) -> None:
+    histograms = metrics.snapshot()
+
+    with open(Path(directory) / JSON_LINES_NAME, "a") as json_lines:
+        json_lines.write(metrics_to_json_line(histograms, time.time() if timestamp is None else timestamp) + "\n")
+
+    write_atomic(Path(directory) / PROMETHEUS_NAME, metrics_to_prometheus(histograms))
+
+
+def metrics_export_forever(metrics: Metrics, directory: Path, interval: float = EXPORT_EVERY_SECONDS) -> None:
+    """Meant for a daemon thread."""
+    while True:
+        time.sleep(interval)
+        metrics_export(metrics, directory)
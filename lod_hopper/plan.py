@@ -0,0 +1,164 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+from lod_hopper.schemas import Coordinate, Blocks, SideInfo
+
+# Ring sides in the order they are walked
+SIDE_ORDER = (SideInfo.north, SideInfo.west, SideInfo.south, SideInfo.east)
+
+class PlanPoint(NamedTuple):
+    index: int
+    coordinate: Coordinate
+    ring_index: int
+    side_index: int
+    coordinate_index: int
+    coordinates_in_side: int
+    # None when the plan isn't made of rings
+    side_info: Optional[SideInfo]
+
+
+@dataclass
+class TeleportPlan:
+    x: np.ndarray
+    z: np.ndarray
+    ring: np.ndarray
+    side: np.ndarray
+    num_rings: int
+    # Start index of every (ring, side) block, plus the total length at the end
+    side_offsets: np.ndarray
+    # Plans that aren't walked in rings use `ring` for whatever groups their points (rows, regions...),
+    # with every point on side 0
+    ring_based: bool = True
+    segment_name: str = "Ring"
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    # Used for testing
+    def __eq__(self, other):
+        if not isinstance(other, TeleportPlan):
+            return False
+
+        return all([
+            np.array_equal(self.x, other.x),
+            np.array_equal(self.z, other.z),
+            np.array_equal(self.ring, other.ring),
+            np.array_equal(self.side, other.side),
+            self.num_rings == other.num_rings,
+            self.ring_based == other.ring_based,
+        ])
+
+
+def get_ring_radii(desired_radius: Blocks, radius_done: Blocks, blocks_per_tp: int) -> np.ndarray:
+    """Radius of every ring, outermost first. Same rings as `get_all_teleporation_rings`."""
+    num_rings = max(0, -(-(desired_radius + blocks_per_tp - radius_done) // blocks_per_tp))
+
+    return desired_radius - blocks_per_tp * np.arange(num_rings, dtype=np.int64)
+
+
+def teleport_plan_build(desired_radius: Blocks, radius_done: Blocks, blocks_per_tp: int) -> TeleportPlan:
+    """
+    Builds the same outside-in square rings as `get_all_teleporation_rings`,
+    but as flat int32 arrays, without creating a Python object per coordinate.
+    """
+    radii = get_ring_radii(desired_radius, radius_done, blocks_per_tp)
+
+    # Same spacing as `load_line(-radius, radius, blocks_per_tp)`
+    points_per_side = np.abs(2 * radii) // blocks_per_tp + 1
+
+    block_lengths = np.repeat(points_per_side, len(SIDE_ORDER))
+    side_offsets = np.zeros(len(block_lengths) + 1, dtype=np.int64)
+    np.cumsum(block_lengths, out=side_offsets[1:])
+
+    block = np.repeat(np.arange(len(block_lengths)), block_lengths)
+    ring = block // len(SIDE_ORDER)
+    side = block % len(SIDE_ORDER)
+    position = np.arange(side_offsets[-1]) - side_offsets[block]
+
+    count = points_per_side[ring]
+    radius = radii[ring]
+
+    # North and east walk the line forwards, west and south walk it backwards
+    is_reversed = (side == 1) | (side == 2)
+    step = np.where(is_reversed, count - 1 - position, position)
+    line = _linspace_values(start=-radius, stop=radius, count=count, step=step)
+
+    x = np.select([side == 0, side == 1, side == 2], [line, radius, line], default=-radius)
+    z = np.select([side == 0, side == 1, side == 2], [radius, line, -radius], default=line)
+
+    return TeleportPlan(
+        x=x.astype(np.int32),
+        z=z.astype(np.int32),
+        ring=ring.astype(np.int32),
+        side=side.astype(np.int32),
+        num_rings=len(radii),
+        side_offsets=side_offsets,
+    )
+
+
+def _linspace_values(start: np.ndarray, stop: np.ndarray, count: np.ndarray, step: np.ndarray) -> np.ndarray:
+    """Element-wise `int(numpy.linspace(start, stop, count)[step])`, matching `load_line` exactly."""
+    divisor = np.maximum(count - 1, 1)
+    delta = (stop - start).astype(np.float64)
+
+    values = step * (delta / divisor) + start
+    values = np.where((step == count - 1) & (count > 1), stop, values)
+
+    # int() truncates towards zero
+    return np.trunc(values).astype(np.int64)
+
+
+def teleport_plan_from_points(x: np.ndarray, z: np.ndarray, segment: np.ndarray, segment_name: str) -> TeleportPlan:
+    """
+    Plan visiting the points in the given order, grouped by segment instead of rings and sides.
+    Segments have to be numbered from 0 in the order they are visited.
+    """
+    num_segments = int(segment.max()) + 1 if len(segment) else 0
+    block = segment.astype(np.int64) * len(SIDE_ORDER)
+
+    return TeleportPlan(
+        x=x.astype(np.int32),
+        z=z.astype(np.int32),
+        ring=segment.astype(np.int32),
+        side=np.zeros(len(x), dtype=np.int32),
+        num_rings=num_segments,
+        side_offsets=np.searchsorted(block, np.arange(num_segments * len(SIDE_ORDER) + 1)),
+        ring_based=False,
+        segment_name=segment_name,
+    )
+
+
+def teleport_plan_select(plan: TeleportPlan, keep: np.ndarray) -> TeleportPlan:
+    """Only the kept points, in the same order and on the same sides. Rings left empty are dropped."""
+    _, ring = np.unique(plan.ring[keep], return_inverse=True)
+    num_rings = int(ring.max()) + 1 if len(ring) else 0
+    block = ring.astype(np.int64) * len(SIDE_ORDER) + plan.side[keep]
+
+    return TeleportPlan(
+        x=plan.x[keep],
+        z=plan.z[keep],
+        ring=ring.astype(np.int32),
+        side=plan.side[keep],
+        num_rings=num_rings,
+        side_offsets=np.searchsorted(block, np.arange(num_rings * len(SIDE_ORDER) + 1)),
+        ring_based=plan.ring_based,
+        segment_name=plan.segment_name,
+    )
+
+
+def teleport_plan_point(plan: TeleportPlan, index: int) -> PlanPoint:
+    """O(1) lookup of everything the main loop needs for one index of the plan."""
+    ring = int(plan.ring[index])
+    side = int(plan.side[index])
+    block = ring * len(SIDE_ORDER) + side
+    side_start = int(plan.side_offsets[block])
+
+    return PlanPoint(
+        index=index,
+        coordinate=Coordinate(x=Blocks(int(plan.x[index])), z=Blocks(int(plan.z[index]))),
+        ring_index=ring,
+        side_index=side,
+        coordinate_index=index - side_start,
+        coordinates_in_side=int(plan.side_offsets[block + 1]) - side_start,
+        side_info=SIDE_ORDER[side] if plan.ring_based else None,
+    )
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from lod_hopper.plan import TeleportPlan
+from lod_hopper.schemas import Blocks
+
+# Bump whenever a change to the planner makes the same parameters plan different teleports,
+# so plans cached by older versions are built again
+PLANNER_VERSION = 1
+
+ARRAYS = ("x", "z", "ring", "side", "side_offsets")
+
+
+class PlanFileError(Exception):
+    pass
+
+
+@dataclass
+class CachedPlan:
+    """A finished plan with the map grid drawn from it, and the parameters it was planned from."""
+    plan: TeleportPlan
+    cell_size: Blocks
+    # Map grid with every planned cell unvisited, before any progress is added
+    grid: np.ndarray
+    params: dict
+
+    # Used for testing
+    def __eq__(self, other):
+        if not isinstance(other, CachedPlan):
+            return False
+
+        return all([
+            self.plan == other.plan,
+            self.cell_size == other.cell_size,
+            np.array_equal(self.grid, other.grid),
+            self.params == other.params,
+        ])
+
+
+def plan_cache_dir() -> Path:
+    """$XDG_CACHE_HOME/lod_hopper, or ~/.cache/lod_hopper."""
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "lod_hopper"
+
+
+def plan_cache_key(params: dict) -> str:
+    params_bytes = json.dumps({"planner_version": PLANNER_VERSION, **params}, sort_keys=True).encode()
+
+    return hashlib.sha256(params_bytes).hexdigest()
+
+
+def plan_cache_path(cache_dir: Path, params: dict) -> Path:
+    return Path(cache_dir) / f"plan-{plan_cache_key(params)[:32]}.npz"
+
+
+def plan_save(path: Path, cached: CachedPlan) -> None:
+    """
+    Writes the plan as an uncompressed .npz, one .npy per array, that numpy.load reads back
+    without any parsing. Written next to path first, so a crash never leaves half a file.
+    """
+    path = Path(path)
+    temporary_path = path.with_name(path.name + ".tmp")
+    plan = cached.plan
+
+    meta = {
+        "planner_version": PLANNER_VERSION,
+        "params": cached.params,
+        "cell_size": int(cached.cell_size),
+        "num_rings": int(plan.num_rings),
+        "ring_based": plan.ring_based,
+        "segment_name": plan.segment_name,
+    }
+
+    with open(temporary_path, "wb") as plan_file:
+        np.savez(
+            plan_file,
+            meta=np.frombuffer(json.dumps(meta, sort_keys=True).encode(), dtype=np.uint8),
+            grid=cached.grid,
+            **{name: getattr(plan, name) for name in ARRAYS},
+        )
+
+    os.replace(temporary_path, path)
+
+
+def plan_load(path: Path) -> CachedPlan:
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            meta = json.loads(arrays["meta"].tobytes())
+            plan = TeleportPlan(
+                **{name: arrays[name] for name in ARRAYS},
+                num_rings=meta["num_rings"],
+                ring_based=meta["ring_based"],
+                segment_name=meta["segment_name"],
+            )
+
+            return CachedPlan(plan=plan, cell_size=Blocks(meta["cell_size"]), grid=arrays["grid"], params=meta["params"])
+    except (KeyError, ValueError, zipfile.BadZipFile) as error:
+        raise PlanFileError(f"{path} isn't a saved plan: {error}")
+
+
+def plan_cache_load(cache_dir: Path, params: dict) -> Optional[CachedPlan]:
+    """The plan cached for these parameters by this version of the planner, None if there isn't one."""
+    path = plan_cache_path(cache_dir, params)
+
+    try:
+        cached = plan_load(path)
+    except (OSError, PlanFileError):
+        return None
+
+    # Guards against the odd hash collision or a file written by another version
+    if cached.params != json.loads(json.dumps(params)):
+        return None
+
+    return cached
+
+
+def plan_cache_store(cache_dir: Path, cached: CachedPlan) -> Path:
+    path = plan_cache_path(cache_dir, cached.params)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    plan_save(path, cached)
+
+    return path
@@ -0,0 +1,247 @@
+from datetime import timedelta
+from typing import Optional, Tuple
+import numpy
+from lod_hopper.schemas import Blocks
+from lod_hopper.plan import TeleportPlan, teleport_plan_build
+from lod_hopper.grid_display import grid_data_initialize
+from lod_hopper.coverage import CHUNK_SIZE, Packing, coverage_plan_build
+from lod_hopper.shapes import (
+    Region,
+    ShapeKind,
+    polygon_load,
+    region_is_square,
+    region_plan_select,
+    region_square,
+    shape_of_kind,
+)
+from lod_hopper.traversal import Traversal, traversal_reorder, traversal_stats
+from lod_hopper.jobs import (
+    BatchPlan,
+    JobFileError,
+    batch_plan_build,
+    batch_travel,
+    job_file_load,
+    jobs_parse,
+)
+from lod_hopper.plan_cache import (
+    CachedPlan,
+    PlanFileError,
+    plan_cache_dir,
+    plan_cache_load,
+    plan_cache_store,
+    plan_load,
+    plan_save,
+)
+from lod_hopper.datapack import (
+    NAMESPACE,
+    TICKS_PER_SECOND,
+    DatapackError,
+    DatapackSettings,
+    datapack_verify,
+    datapack_write,
+)
+from lod_hopper.regions import DIMENSION_IDS, WorldDimension
+
+
+def get_plan_params(args) -> dict:
+    """Everything that decides which teleports are planned, and in which order."""
+    params = {
+        "desired_radius": args.desired_radius,
+        "exclude": args.exclude,
+        "blocks_per_tp": args.blocks_per_tp,
+        "view_distance": args.view_distance,
+        "packing": args.packing,
+        "order": args.order,
+    }
+
+    # Only when it isn't the plain square, so journals of square runs still resume
+    region = get_region(args)
+    if not region_is_square(region):
+        params["shape"] = args.shape
+        params["polygon"] = region.outer.vertices.tolist() if args.polygon else None
+        params["exclude_polygon"] = region.inner.vertices.tolist() if args.exclude_polygon else None
+
+    return params
+
+
+def get_region(args) -> Region:
+    """The area to load, from the radius and shape or the polygon files."""
+    kind = ShapeKind(args.shape)
+
+    try:
+        outer = polygon_load(args.polygon) if args.polygon else shape_of_kind(kind, args.desired_radius)
+
+        if args.exclude_polygon:
+            inner = polygon_load(args.exclude_polygon)
+        else:
+            inner = shape_of_kind(kind, args.exclude) if args.exclude > 0 else None
+    except (OSError, ValueError) as error:
+        raise SystemExit(f"Can't read the area: {error}")
+
+    return Region(outer=outer, inner=inner)
+
+
+def get_batch_params(args, batch: BatchPlan) -> dict:
+    """A batch's teleports are all in the plan itself, which leaves the dimension each job is in."""
+    return {
+        "jobs": [[job.name, job.dimension.name] for job in batch.jobs],
+        "blocks_per_tp": args.blocks_per_tp,
+    }
+
+
+def get_batch(args) -> BatchPlan:
+    if args.view_distance is not None:
+        raise SystemExit("--jobs can't be used with --view-distance yet")
+
+    try:
+        jobs = jobs_parse(job_file_load(args.jobs), height=args.height, seconds_per_tp=args.seconds_per_tp)
+    except (OSError, JobFileError) as error:
+        raise SystemExit(f"Can't read the jobs: {error}")
+
+    batch = batch_plan_build(jobs, args.blocks_per_tp)
+    travel, switches = batch_travel(batch)
+
+    for number, job in enumerate(batch.jobs):
+        print(f"Job {number + 1}: {job.name} in the {job.dimension.name}, {len(batch.job_indices(number))} teleports")
+
+    print(
+        f"{len(batch.plan)} teleports in all, overlaps counted once, "
+        f"flying {travel / 1000:.1f} km between jobs and switching dimension {switches} times"
+    )
+
+    return batch
+
+
+def get_plan(args) -> Tuple[TeleportPlan, Blocks]:
+    """The teleport plan and the size of one map cell in blocks."""
+    region = get_region(args)
+    is_square = region_is_square(region)
+
+    # Anything but the plain square is cut out of the square around it, centered on a chunk
+    if is_square:
+        center_x, center_z, radius, radius_done = 0, 0, args.desired_radius, args.exclude
+    else:
+        step = args.blocks_per_tp if args.view_distance is None else 1
+        center_x, center_z, radius = region_square(region, align=CHUNK_SIZE, step=step)
+        radius_done = 0
+
+    if args.view_distance is None:
+        plan, cell_size = teleport_plan_build(radius, radius_done, args.blocks_per_tp), args.blocks_per_tp
+    else:
+        coverage = coverage_plan_build(
+            desired_radius=radius,
+            radius_done=radius_done,
+            view_distance=args.view_distance,
+            packing=Packing(args.packing),
+            blocks_per_tp=args.blocks_per_tp,
+        )
+
+        print(
+            f"Covering {coverage.coverage_ratio:.1%} of the area with {len(coverage.plan)} teleports "
+            f"({coverage.teleports_saved} fewer than {coverage.ring_plan_teleports} with --blocks-per-tp {args.blocks_per_tp})"
+        )
+
+        plan, cell_size = coverage.plan, coverage.spacing
+
+    if not is_square:
+        square_teleports = len(plan)
+        plan = region_plan_select(region, plan, cell_size, center_x, center_z)
+
+        print(f"Area: {len(plan)} teleports, {square_teleports - len(plan)} fewer than the square around it")
+
+    planned_stats = traversal_stats(plan)
+    plan = traversal_reorder(plan, Traversal(args.order), cell_size)
+    stats = traversal_stats(plan)
+
+    print(
+        f"Order: {args.order}, flying {stats.path_length / 1000:.1f} km and switching region files {stats.region_switches} times "
+        f"(as planned: {planned_stats.path_length / 1000:.1f} km, {planned_stats.region_switches} switches)"
+    )
+
+    return plan, cell_size
+
+
+def get_cached_plan(args) -> CachedPlan:
+    """The plan from --import-plan or the plan cache, planned (and cached) only if it is in neither."""
+    if args.import_plan is not None:
+        try:
+            cached = plan_load(args.import_plan)
+        except (OSError, PlanFileError) as error:
+            raise SystemExit(f"Can't import the plan: {error}")
+
+        print(f"Imported {len(cached.plan)} teleports from {args.import_plan}")
+        return cached
+
+    params = get_plan_params(args)
+    cache_dir = args.plan_cache or plan_cache_dir()
+    cached = None if args.no_plan_cache else plan_cache_load(cache_dir, params)
+
+    if cached is not None:
+        print(f"Loaded {len(cached.plan)} teleports from the plan cache")
+        return cached
+
+    plan, cell_size = get_plan(args)
+    cached = CachedPlan(plan=plan, cell_size=cell_size, grid=grid_data_initialize(plan.x, plan.z, cell_size).grid, params=params)
+
+    if not args.no_plan_cache:
+        try:
+            plan_cache_store(cache_dir, cached)
+        except OSError as error:
+            print(f"Couldn't cache the plan: {error}")
+
+    return cached
+
+
+def get_seconds_per_point(args, plan: TeleportPlan, batch: Optional[BatchPlan]) -> numpy.ndarray:
+    """How long each teleport waits, which differs between the jobs of a batch."""
+    if batch is None:
+        return numpy.full(len(plan), float(args.seconds_per_tp))
+
+    return numpy.array([job.seconds_per_tp for job in batch.jobs], dtype=numpy.float64)[plan.ring]
+
+
+def plan_main(args) -> None:
+    """The plan and export commands: plans (or loads) the plan, and saves it if there's somewhere to."""
+    batch = cached = None
+
+    if args.jobs is None:
+        cached = get_cached_plan(args)
+        plan = cached.plan
+    else:
+        batch = get_batch(args)
+        plan = batch.plan
+
+    total_seconds = numpy.sum(get_seconds_per_point(args, plan, batch))
+
+    print(f"\n{len(plan)} teleports, Time to Complete: {timedelta(seconds=float(total_seconds))}")
+
+    if args.export_plan is not None:
+        plan_save(args.export_plan, cached)
+        print(f"Saved {len(plan)} teleports to {args.export_plan}")
+
+
+def datapack_main(args) -> None:
+    """The datapack command: writes the plan as a datapack (unless --check), then reads it back to check it."""
+    plan = get_cached_plan(args).plan
+    settings = DatapackSettings(
+        player=args.player,
+        dimension=DIMENSION_IDS[WorldDimension[args.dimension]],
+        height=args.height,
+        ticks_per_tp=args.ticks_per_tp or max(round(args.seconds_per_tp * TICKS_PER_SECOND), 1),
+        pack_format=args.pack_format,
+    )
+
+    try:
+        if not args.check:
+            num_files = datapack_write(args.directory, plan, settings)
+            print(f"Wrote {len(plan)} teleports to {args.directory} in {num_files} files")
+
+        datapack_verify(args.directory, plan, settings)
+    except (OSError, DatapackError) as error:
+        raise SystemExit(f"Datapack {args.directory}: {error}")
+
+    run_time = timedelta(seconds=len(plan) * settings.ticks_per_tp / TICKS_PER_SECOND)
+    print(f"Checked: it teleports {args.player} to all {len(plan)} planned points, {settings.ticks_per_tp} ticks apart ({run_time} in all)")
+
+    if not args.check:
+        print(f"Copy it into the world's datapacks folder, then run /reload and /function {NAMESPACE}:start")
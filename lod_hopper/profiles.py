@@ -0,0 +1,57 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+# Settings a calibrated profile gives every command it's used with, unless given on the command line
+PROFILE_SETTINGS = ("blocks_per_tp", "seconds_per_tp")
+
+DEFAULT_PROFILE = "default"
+
+_NAME = re.compile(r"[\w.-]+")
+
+
+class ProfileError(Exception):
+    pass
+
+
+def profile_dir() -> Path:
+    """$XDG_CONFIG_HOME/lod_hopper/profiles, or ~/.config/lod_hopper/profiles."""
+    return Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config") / "lod_hopper" / "profiles"
+
+
+def profile_path(directory: Path, name: str) -> Path:
+    if not _NAME.fullmatch(name) or name.startswith("."):
+        raise ProfileError(f"{name!r} can only have letters, digits, '.', '-' and '_' in it")
+
+    return Path(directory) / f"{name}.json"
+
+
+def profile_load(path: Path) -> Optional[dict]:
+    """The saved profile, None if there isn't one."""
+    try:
+        profile = json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as error:
+        raise ProfileError(f"{path} isn't a profile: {error}")
+
+    if not isinstance(profile, dict) or any(name not in profile for name in PROFILE_SETTINGS):
+        raise ProfileError(f"{path} isn't a profile: it doesn't have {', '.join(PROFILE_SETTINGS)}")
+
+    return profile
+
+
+def profile_save(path: Path, profile: dict) -> None:
+    """Written next to path first, so a crash never leaves half a profile."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_text(json.dumps(profile, indent=2) + "\n")
+    os.replace(temporary_path, path)
+
+
+def profile_settings(profile: dict) -> dict:
+    """The profile's settings, by the name of their command line argument."""
+    return {name: profile[name] for name in PROFILE_SETTINGS}
@@ -0,0 +1,203 @@
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from lod_hopper.schemas import Blocks
+
+# Packet types of the Minecraft RCON protocol
+LOGIN = 3
+COMMAND = 2
+RESPONSE = 0
+
+AUTH_FAILED_ID = -1
+
+# Length, request id and type, then the body and two null bytes
+HEADER = struct.Struct("<iii")
+MAX_REQUEST_ID = 2**31 - 1
+
+
+class RconError(Exception):
+    pass
+
+
+class RconAuthError(RconError):
+    pass
+
+
+class RconResponse(NamedTuple):
+    request_id: int
+    body: str
+    latency: float
+
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    body_bytes = body.encode("utf-8") + b"\x00\x00"
+
+    return HEADER.pack(HEADER.size - 4 + len(body_bytes), request_id, packet_type) + body_bytes
+
+
+def decode_packets(buffer: bytearray) -> List[tuple]:
+    """Pops every complete (request id, type, body) packet off the front of the buffer."""
+    packets = []
+
+    while len(buffer) >= 4:
+        (length,) = struct.unpack_from("<i", buffer)
+        if len(buffer) < 4 + length:
+            break
+
+        _, request_id, packet_type = HEADER.unpack_from(buffer)
+        body = bytes(buffer[HEADER.size:4 + length - 2]).decode("utf-8", errors="replace")
+        del buffer[:4 + length]
+
+        packets.append((request_id, packet_type, body))
+
+    return packets
+
+
+class RconClient:
+    """
+    One persistent RCON connection, reconnecting and logging back in on its own.
+    Several commands can be written at once and their responses matched up by request id.
+    """
+
+    def __init__(self, host: str, port: int, password: str, timeout: float = 5, reconnect_attempts: int = 3):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.reconnect_attempts = reconnect_attempts
+
+        self._socket: Optional[socket.socket] = None
+        self._buffer = bytearray()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.last_latency: Optional[float] = None
+
+    def connect(self) -> None:
+        self.close()
+
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        login_id = self._new_request_id()
+        self._socket.sendall(encode_packet(login_id, LOGIN, self.password))
+
+        # Servers answer a login with its id, or with -1 for a wrong password
+        while True:
+            for request_id, packet_type, _ in self._read_packets():
+                if request_id == AUTH_FAILED_ID:
+                    self.close()
+                    raise RconAuthError(f"RCON login to {self.host}:{self.port} was refused, check the password")
+
+                if request_id == login_id and packet_type == COMMAND:
+                    return
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+
+        self._socket = None
+        self._buffer.clear()
+
+    def command(self, command: str) -> RconResponse:
+        return self.commands([command])[0]
+
+    def commands(self, commands: Sequence[str]) -> List[RconResponse]:
+        """
+        Writes every command before reading any response, so the round trips overlap.
+        After a lost connection only the commands still without a response are sent again.
+        """
+        # Response to each command by its index, kept across reconnects
+        responses: Dict[int, RconResponse] = {}
+
+        with self._lock:
+            for attempt in range(self.reconnect_attempts + 1):
+                try:
+                    if self._socket is None:
+                        self.connect()
+
+                    self._send_pipelined(commands, responses)
+                    break
+                except RconAuthError:
+                    raise
+                except OSError as error:
+                    self.close()
+
+                    if attempt == self.reconnect_attempts:
+                        raise RconError(f"Lost the RCON connection to {self.host}:{self.port}") from error
+
+                    time.sleep(min(2 ** attempt * 0.1, 2))
+
+        self.last_latency = responses[len(commands) - 1].latency
+
+        return [responses[index] for index in range(len(commands))]
+
+    def _send_pipelined(self, commands: Sequence[str], responses: Dict[int, RconResponse]) -> None:
+        """Sends the commands that have no response yet, adding theirs to responses as they come."""
+        # Index of the command behind each request id still waiting for its response
+        pending: Dict[int, int] = {}
+
+        packets = bytearray()
+        for index, command in enumerate(commands):
+            if index not in responses:
+                request_id = self._new_request_id()
+                pending[request_id] = index
+                packets += encode_packet(request_id, COMMAND, command)
+
+        send_time = time.perf_counter()
+        self._socket.sendall(packets)
+
+        while pending:
+            for request_id, packet_type, body in self._read_packets():
+                # Anything else is left over from an earlier, abandoned exchange
+                if request_id in pending and packet_type == RESPONSE:
+                    latency = time.perf_counter() - send_time
+                    responses[pending.pop(request_id)] = RconResponse(request_id=request_id, body=body, latency=latency)
+
+    def _read_packets(self) -> List[tuple]:
+        data = self._socket.recv(4096)
+        if not data:
+            raise ConnectionResetError("RCON server closed the connection")
+
+        self._buffer += data
+
+        return decode_packets(self._buffer)
+
+    def _new_request_id(self) -> int:
+        self._next_id = self._next_id % MAX_REQUEST_ID + 1
+
+        return self._next_id
+
+
+@dataclass
+class RconTeleporter:
+    """Teleports a player with server commands, no game window needed."""
+    client: RconClient
+    player: str
+    # Dimension id to teleport into, or None to stay in the player's current one
+    dimension: Optional[str] = None
+
+    def teleport(self, x: Blocks, y: Blocks, z: Blocks) -> float:
+        """Returns how long the server took to answer."""
+        return self.client.command(tp_command(self.player, x, y, z, self.dimension)).latency
+
+    def save_world(self) -> None:
+        """Writes every loaded chunk to the region files, waiting until it's done."""
+        self.client.command("save-all flush")
+
+
+def tp_command(target: str, x: Blocks, y: Blocks, z: Blocks, dimension: Optional[str] = None) -> str:
+    command = f"tp {target} {x} {y} {z}"
+
+    return command if dimension is None else f"execute in {dimension} run {command}"
+
+
+def parse_address(address: str, default_port: int = 25575) -> tuple:
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, default_port
+
+    return host, int(port)
@@ -0,0 +1,172 @@
+import mmap
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+from lod_hopper.schemas import Blocks
+
+CHUNK_SIZE = 16
+REGION_CHUNKS = 32
+
+# 1024 big-endian chunk locations, then 1024 big-endian timestamps
+LOCATIONS_SIZE = 4096
+HEADER_SIZE = 8192
+
+REGION_FILE_PATTERN = re.compile(r"^r\.(-?\d+)\.(-?\d+)\.mca$")
+
+
+class WorldDimension(Enum):
+    overworld = "region"
+    nether = "DIM-1/region"
+    end = "DIM1/region"
+
+
+# What commands like /execute in call each dimension
+DIMENSION_IDS = {
+    WorldDimension.overworld: "minecraft:overworld",
+    WorldDimension.nether: "minecraft:the_nether",
+    WorldDimension.end: "minecraft:the_end",
+}
+
+
+@dataclass
+class ChunkPresence:
+    """Which chunks of a rectangle of the world have been generated."""
+    # Indexed [chunk z - min_chunk_z, chunk x - min_chunk_x]
+    present: np.ndarray
+    min_chunk_x: int
+    min_chunk_z: int
+    region_files_read: int = 0
+
+
+def region_dir_for(world: Path, dimension: WorldDimension) -> Path:
+    return Path(world) / dimension.value
+
+
+def read_region_header(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generated chunks and their last save time (seconds since the epoch) of a region file,
+    both as 32x32 arrays indexed [local z, local x]. Only the header is read.
+    """
+    with open(path, "rb") as region_file:
+        size = os.fstat(region_file.fileno()).st_size
+
+        # Region files are created empty and get their header with the first chunk
+        if size < HEADER_SIZE:
+            empty = np.zeros((REGION_CHUNKS, REGION_CHUNKS), dtype=np.uint32)
+            return empty.astype(bool), empty
+
+        with mmap.mmap(region_file.fileno(), HEADER_SIZE, access=mmap.ACCESS_READ) as header:
+            locations = np.frombuffer(header, dtype=">u4", count=1024).astype(np.uint32)
+            timestamps = np.frombuffer(header, dtype=">u4", count=1024, offset=LOCATIONS_SIZE).astype(np.uint32)
+
+    # A location of zero means the chunk was never saved
+    return (locations != 0).reshape(REGION_CHUNKS, REGION_CHUNKS), timestamps.reshape(REGION_CHUNKS, REGION_CHUNKS)
+
+
+def list_region_files(region_dir: Path) -> List[Tuple[int, int, Path]]:
+    """(region x, region z, path) of every region file in the directory."""
+    region_files = []
+
+    with os.scandir(region_dir) as entries:
+        for entry in entries:
+            match = REGION_FILE_PATTERN.match(entry.name)
+            if match:
+                region_files.append((int(match.group(1)), int(match.group(2)), Path(entry.path)))
+
+    return region_files
+
+
+def scan_region_dir(
+    region_dir: Path,
+    min_chunk_x: int,
+    min_chunk_z: int,
+    max_chunk_x: int,
+    max_chunk_z: int,
+    max_workers: Optional[int] = None,
+) -> ChunkPresence:
+    """Reads the headers of every region file overlapping the chunk rectangle, several files at a time."""
+    present = np.zeros((max_chunk_z - min_chunk_z + 1, max_chunk_x - min_chunk_x + 1), dtype=bool)
+
+    region_files = [
+        (region_x, region_z, path)
+        for region_x, region_z, path in (list_region_files(region_dir) if Path(region_dir).is_dir() else [])
+        if min_chunk_x // REGION_CHUNKS <= region_x <= max_chunk_x // REGION_CHUNKS
+        and min_chunk_z // REGION_CHUNKS <= region_z <= max_chunk_z // REGION_CHUNKS
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        headers = executor.map(lambda region_file: read_region_header(region_file[2]), region_files)
+
+        for (region_x, region_z, _), (region_present, _) in zip(region_files, headers):
+            # Where this region lands in the rectangle, cut to fit
+            chunk_x = region_x * REGION_CHUNKS
+            chunk_z = region_z * REGION_CHUNKS
+            x0, z0 = max(chunk_x, min_chunk_x), max(chunk_z, min_chunk_z)
+            x1 = min(chunk_x + REGION_CHUNKS - 1, max_chunk_x)
+            z1 = min(chunk_z + REGION_CHUNKS - 1, max_chunk_z)
+
+            present[z0 - min_chunk_z:z1 - min_chunk_z + 1, x0 - min_chunk_x:x1 - min_chunk_x + 1] = \
+                region_present[z0 - chunk_z:z1 - chunk_z + 1, x0 - chunk_x:x1 - chunk_x + 1]
+
+    return ChunkPresence(
+        present=present,
+        min_chunk_x=min_chunk_x,
+        min_chunk_z=min_chunk_z,
+        region_files_read=len(region_files),
+    )
+
+
+def point_chunk_windows(x: np.ndarray, z: np.ndarray, half_width: Blocks) -> Tuple[np.ndarray, ...]:
+    """First and last chunk on each axis of the square of blocks each point is responsible for."""
+    x = x.astype(np.int64)
+    z = z.astype(np.int64)
+
+    return (
+        np.floor_divide(x - half_width, CHUNK_SIZE),
+        np.floor_divide(z - half_width, CHUNK_SIZE),
+        np.floor_divide(x + half_width, CHUNK_SIZE),
+        np.floor_divide(z + half_width, CHUNK_SIZE),
+    )
+
+
+def scan_for_points(region_dir: Path, x: np.ndarray, z: np.ndarray, half_width: Blocks) -> ChunkPresence:
+    """Scans just the part of the world the points are responsible for."""
+    min_x, min_z, max_x, max_z = point_chunk_windows(x, z, half_width)
+
+    return scan_region_dir(region_dir, int(min_x.min()), int(min_z.min()), int(max_x.max()), int(max_z.max()))
+
+
+def count_present(presence: ChunkPresence, x: np.ndarray, z: np.ndarray, half_width: Blocks) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    How many chunks around each point are generated, and how many there are in total,
+    using a summed-area table so every point costs the same however big its square is.
+    """
+    height, width = presence.present.shape
+    summed = np.zeros((height + 1, width + 1), dtype=np.int32)
+    np.cumsum(presence.present, axis=0, dtype=np.int32, out=summed[1:, 1:])
+    np.cumsum(summed[1:, 1:], axis=1, out=summed[1:, 1:])
+
+    min_x, min_z, max_x, max_z = point_chunk_windows(x, z, half_width)
+    total = (max_x - min_x + 1) * (max_z - min_z + 1)
+
+    # Chunks outside the scanned rectangle were never generated
+    column0 = np.clip(min_x - presence.min_chunk_x, 0, width)
+    column1 = np.clip(max_x - presence.min_chunk_x + 1, 0, width)
+    row0 = np.clip(min_z - presence.min_chunk_z, 0, height)
+    row1 = np.clip(max_z - presence.min_chunk_z + 1, 0, height)
+
+    present = summed[row1, column1] - summed[row0, column1] - summed[row1, column0] + summed[row0, column0]
+
+    return present, total
+
+
+def all_chunks_present(presence: ChunkPresence, x: np.ndarray, z: np.ndarray, half_width: Blocks) -> np.ndarray:
+    """Whether every chunk a point is responsible for has already been generated."""
+    present, total = count_present(presence, x, z, half_width)
+
+    return present == total
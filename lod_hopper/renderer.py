@@ -0,0 +1,132 @@
+import os
+import re
+import shutil
+import sys
+import unicodedata
+from dataclasses import dataclass, field
+from typing import List, Optional, TextIO
+
+# ANSI escape sequences
+CLEAR_SCREEN = "\033[2J"
+CLEAR_TO_END_OF_LINE = "\033[K"
+ESCAPE_PATTERN = re.compile(r"\033\[[0-9;?]*[A-Za-z]")
+
+
+@dataclass
+class FrameRenderer:
+    """Remembers the last frame drawn so only what changed has to be written."""
+    stream: TextIO = field(default_factory=lambda: sys.stdout)
+    lines: List[str] = field(default_factory=list)
+    terminal_size: Optional[os.terminal_size] = None
+
+
+def renderer_initialize(stream: Optional[TextIO] = None) -> FrameRenderer:
+    if os.name == "nt":
+        # Enables ANSI escape processing in the Windows console
+        os.system("")
+
+    return FrameRenderer(stream=stream or sys.stdout)
+
+
+def move_cursor(row: int, column: int) -> str:
+    """Rows and columns start at 0 here, unlike in the escape sequence itself."""
+    return f"\033[{row + 1};{column + 1}H"
+
+
+def char_width(char: str) -> int:
+    if unicodedata.combining(char):
+        return 0
+
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def display_width(line: str) -> int:
+    """Number of terminal columns the line takes up, ignoring escape sequences."""
+    return sum(char_width(char) for char in ESCAPE_PATTERN.sub("", line))
+
+
+def clip_line(line: str, max_width: int) -> str:
+    """Cuts the line so it fits in max_width columns and never wraps."""
+    if display_width(line) <= max_width:
+        return line
+
+    width = 0
+    i = 0
+    while i < len(line):
+        escape = ESCAPE_PATTERN.match(line, i)
+        if escape:
+            i = escape.end()
+            continue
+
+        width += char_width(line[i])
+        if width > max_width:
+            # Reset styles in case the cut happened inside a styled part
+            return line[:i] + ("\033[0m" if "\033" in line else "")
+
+        i += 1
+
+    return line
+
+
+def line_diff(row: int, previous: str, current: str) -> str:
+    """Escape sequences rewriting only the part of a line that changed."""
+    if previous == current:
+        return ""
+
+    # Styled lines are short, so they are always rewritten whole
+    if "\033" in previous or "\033" in current:
+        return move_cursor(row, 0) + current + CLEAR_TO_END_OF_LINE
+
+    prefix = 0
+    shortest = min(len(previous), len(current))
+    while prefix < shortest and previous[prefix] == current[prefix]:
+        prefix += 1
+
+    column = display_width(current[:prefix])
+
+    if display_width(previous) != display_width(current):
+        return move_cursor(row, column) + current[prefix:] + CLEAR_TO_END_OF_LINE
+
+    suffix = 0
+    while suffix < shortest - prefix and previous[-1 - suffix] == current[-1 - suffix]:
+        suffix += 1
+
+    return move_cursor(row, column) + current[prefix:len(current) - suffix]
+
+
+def frame_diff(previous: List[str], current: List[str]) -> str:
+    """Escape sequences turning the previous frame into the current one."""
+    output = []
+
+    for row, line in enumerate(current):
+        old_line = previous[row] if row < len(previous) else ""
+        output.append(line_diff(row, old_line, line))
+
+    # Blank out lines the new frame no longer has
+    for row in range(len(current), len(previous)):
+        output.append(move_cursor(row, 0) + CLEAR_TO_END_OF_LINE)
+
+    return "".join(output)
+
+
+def render_frame(renderer: FrameRenderer, lines: List[str]) -> None:
+    """
+    Draws the frame, writing only the lines and cells that differ from the last one.
+    Everything is redrawn when the terminal is resized.
+    """
+    terminal_size = shutil.get_terminal_size()
+
+    # Keep the last row free so the terminal never scrolls
+    lines = [clip_line(line, terminal_size.columns) for line in lines[:max(terminal_size.lines - 1, 1)]]
+
+    if terminal_size != renderer.terminal_size:
+        output = move_cursor(0, 0) + CLEAR_SCREEN + frame_diff([], lines)
+        renderer.terminal_size = terminal_size
+    else:
+        output = frame_diff(renderer.lines, lines)
+
+    renderer.lines = lines
+
+    if output:
+        renderer.stream.write(output + move_cursor(len(lines), 0))
+        renderer.stream.flush()
@@ -0,0 +1,182 @@
+import math
+from dataclasses import dataclass, replace
+from enum import Enum
+from pathlib import Path
+from typing import Optional, Tuple, Union
+import numpy as np
+from lod_hopper.plan import TeleportPlan, teleport_plan_select
+from lod_hopper.schemas import Blocks
+
+
+class ShapeKind(Enum):
+    # Rings all the way out to the corners, like before
+    square = "square"
+    # Saves the corners a square wastes, about 21% of the teleports
+    circle = "circle"
+
+
+@dataclass(frozen=True)
+class Square:
+    radius: Blocks
+    center_x: Blocks = 0
+    center_z: Blocks = 0
+
+
+@dataclass(frozen=True)
+class Circle:
+    radius: Blocks
+    center_x: Blocks = 0
+    center_z: Blocks = 0
+
+
+@dataclass(frozen=True)
+class Polygon:
+    # (n, 2) array of x, z corners, in order around the edge
+    vertices: np.ndarray
+
+    def __eq__(self, other):
+        return isinstance(other, Polygon) and np.array_equal(self.vertices, other.vertices)
+
+
+Shape = Union[Square, Circle, Polygon]
+
+
+@dataclass(frozen=True)
+class Region:
+    """The area to load: everything in the outer shape that isn't in the inner one."""
+    outer: Shape
+    inner: Optional[Shape] = None
+
+
+def shape_of_kind(kind: ShapeKind, radius: Blocks) -> Union[Square, Circle]:
+    return Circle(radius) if kind == ShapeKind.circle else Square(radius)
+
+
+def polygon_load(path: Path) -> Polygon:
+    """
+    One corner per line as 'x,z' (or 'x z'), going around the edge.
+    Blank lines and anything after a '#' are ignored.
+    """
+    vertices = []
+
+    for number, line in enumerate(Path(path).read_text().splitlines(), start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+
+        try:
+            x, z = (float(value) for value in line.replace(",", " ").split())
+        except ValueError:
+            raise ValueError(f"{path}:{number}: {line!r} is not 'x,z'")
+
+        vertices.append((x, z))
+
+    if len(vertices) < 3:
+        raise ValueError(f"{path}: a polygon needs at least 3 corners, got {len(vertices)}")
+
+    return Polygon(np.array(vertices, dtype=np.float64))
+
+
+def shape_bounds(shape: Shape) -> Tuple[float, float, float, float]:
+    """Smallest x, largest x, smallest z and largest z of the shape."""
+    if isinstance(shape, Polygon):
+        return (
+            float(shape.vertices[:, 0].min()),
+            float(shape.vertices[:, 0].max()),
+            float(shape.vertices[:, 1].min()),
+            float(shape.vertices[:, 1].max()),
+        )
+
+    return shape.center_x - shape.radius, shape.center_x + shape.radius, shape.center_z - shape.radius, shape.center_z + shape.radius
+
+
+def shape_contains(shape: Shape, x: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Whether each point is inside the shape (or on its edge)."""
+    return shape_distance(shape, x, z) <= 0
+
+
+def shape_distance(shape: Shape, x: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Distance from each point to the edge of the shape, negative inside it."""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+
+    if isinstance(shape, Circle):
+        return np.hypot(x - shape.center_x, z - shape.center_z) - shape.radius
+
+    if isinstance(shape, Square):
+        dx = np.abs(x - shape.center_x) - shape.radius
+        dz = np.abs(z - shape.center_z) - shape.radius
+
+        outside = np.hypot(np.maximum(dx, 0), np.maximum(dz, 0))
+        return outside + np.minimum(np.maximum(dx, dz), 0)
+
+    return _polygon_distance(shape.vertices, x, z)
+
+
+def _polygon_distance(vertices: np.ndarray, x: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """One pass over the edges, each one vectorized over every point."""
+    distance_squared = np.full(x.shape, np.inf)
+    inside = np.zeros(x.shape, dtype=bool)
+
+    for (x0, z0), (x1, z1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        edge_x, edge_z = x1 - x0, z1 - z0
+        length_squared = edge_x * edge_x + edge_z * edge_z
+
+        # Closest point of the edge
+        t = np.clip(((x - x0) * edge_x + (z - z0) * edge_z) / max(length_squared, 1e-12), 0, 1)
+        distance_squared = np.minimum(distance_squared, (x - x0 - t * edge_x) ** 2 + (z - z0 - t * edge_z) ** 2)
+
+        # Even-odd rule: count the edges a ray towards +x crosses
+        crosses = (z0 > z) != (z1 > z)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = x0 + (z - z0) * edge_x / edge_z
+        inside ^= crosses & (x < crossing_x)
+
+    distance = np.sqrt(distance_squared)
+
+    return np.where(inside, -distance, distance)
+
+
+def region_mask(region: Region, x: np.ndarray, z: np.ndarray, cell_size: Blocks) -> np.ndarray:
+    """
+    Which teleports to keep, each loading the cell_size square around it: any that reach into
+    the outer shape, except those whose whole cell is in the inner one.
+    A cell's corners are within half a diagonal of its center, so that's how far it reaches.
+    """
+    reach = cell_size / 2 * math.sqrt(2)
+    keep = shape_distance(region.outer, x, z) <= reach
+
+    if region.inner is not None:
+        keep &= shape_distance(region.inner, x, z) > -reach
+
+    return keep
+
+
+def region_square(region: Region, align: int = 1, step: int = 1) -> Tuple[Blocks, Blocks, Blocks]:
+    """
+    Center x, center z and radius of the square around the outer shape, with the center a multiple
+    of align and the radius one of step. Rings step apart then line up with the map's cells.
+    """
+    min_x, max_x, min_z, max_z = shape_bounds(region.outer)
+
+    center_x = round((min_x + max_x) / 2 / align) * align
+    center_z = round((min_z + max_z) / 2 / align) * align
+    radius = max(max_x - center_x, center_x - min_x, max_z - center_z, center_z - min_z)
+    radius = math.ceil(radius / step) * step
+
+    return Blocks(center_x), Blocks(center_z), Blocks(radius)
+
+
+def region_plan_select(region: Region, plan: TeleportPlan, cell_size: Blocks, center_x: Blocks, center_z: Blocks) -> TeleportPlan:
+    """A plan built around the origin, moved to the center and cut down to the region."""
+    plan = replace(plan, x=(plan.x + center_x).astype(np.int32), z=(plan.z + center_z).astype(np.int32))
+
+    return teleport_plan_select(plan, region_mask(region, plan.x, plan.z, cell_size))
+
+
+def region_is_square(region: Region) -> bool:
+    """Square around the origin with nothing or a square taken out: the plain rings cover exactly that."""
+    def centered_square(shape: Optional[Shape]) -> bool:
+        return isinstance(shape, Square) and shape.center_x == 0 and shape.center_z == 0
+
+    return centered_square(region.outer) and (region.inner is None or centered_square(region.inner))
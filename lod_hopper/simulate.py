@@ -0,0 +1,68 @@
+import json
+import re
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Tuple
+from lod_hopper.clock import VirtualClock
+
+# pyautogui waits this long after every call it makes
+INPUT_PAUSE_SECONDS = 0.1
+
+
+class TraceEvent(NamedTuple):
+    time: float
+    action: str
+    detail: str
+
+
+class RecordingInputSink:
+    """Stands in for pyautogui: remembers every key and text it is given, taking as long as pyautogui would."""
+
+    def __init__(self, clock: VirtualClock, pause_seconds: float = INPUT_PAUSE_SECONDS):
+        self.clock = clock
+        self.pause_seconds = pause_seconds
+        self.trace: List[TraceEvent] = []
+
+    def record(self, action: str, detail: str) -> None:
+        self.trace.append(TraceEvent(time=round(self.clock.monotonic(), 6), action=action, detail=detail))
+
+    def press(self, key: str) -> None:
+        self.record("press", key)
+        self.clock.sleep(self.pause_seconds)
+
+    def typewrite(self, message: str) -> None:
+        self.record("type", message)
+        self.clock.sleep(self.pause_seconds)
+
+
+def parse_pause(spec: str) -> Tuple[float, float]:
+    """'AT:SECONDS' into when a pause starts and how long it lasts, both in simulated seconds."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*:\s*(\d+(?:\.\d+)?)\s*", spec)
+    if not match:
+        raise ValueError(f"{spec!r} is not AT:SECONDS")
+
+    return float(match.group(1)), float(match.group(2))
+
+
+def schedule_key_presses(clock: VirtualClock, sink: RecordingInputSink, pauses: List[Tuple[float, float]], toggle_pause: Callable[[], None]) -> None:
+    """CTRL+P at the start, then twice for every pause: once to stop and once to go again."""
+    def press() -> None:
+        sink.record("hotkey", "ctrl+p")
+        toggle_pause()
+
+    clock.schedule(0, press)
+
+    for at, seconds in pauses:
+        clock.schedule(at, press)
+        clock.schedule(at + seconds, press)
+
+
+def trace_commands(trace: List[TraceEvent]) -> List[TraceEvent]:
+    """Just the typed chat commands."""
+    return [event for event in trace if event.action == "type"]
+
+
+def trace_write(path: Path, trace: List[TraceEvent]) -> None:
+    """One JSON object per line, in the order things happened."""
+    with open(path, "w") as trace_file:
+        for event in trace:
+            trace_file.write(json.dumps(event._asdict()) + "\n")
@@ -0,0 +1,16 @@
+from lod_hopper.journal_format import JournalMismatchError, journal_summary
+
+
+def status_main(args) -> None:
+    """The status command: how much of the plan a journal has done."""
+    try:
+        summary = journal_summary(args.journal)
+    except FileNotFoundError:
+        raise SystemExit(f"There is no journal at {args.journal}")
+    except JournalMismatchError as error:
+        raise SystemExit(str(error))
+
+    done = summary.num_done / summary.num_points if summary.num_points else 1
+
+    print(f"{args.journal}: {summary.num_done} of {summary.num_points} teleports done ({done:.1%})")
+    print(", ".join(f"{name}={value}" for name, value in summary.params.items() if value is not None))
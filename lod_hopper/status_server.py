@@ -0,0 +1,259 @@
+import json
+import struct
+import threading
+import zlib
+from dataclasses import fields
+from datetime import timedelta
+from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence
+import numpy as np
+from lod_hopper.grid_display import EXCLUDED, MISSING, PLAYER, UNVISITED, VISITED
+from lod_hopper.metrics import Metrics
+from lod_hopper.schemas import Coordinate
+
+# Only reachable from this machine: anyone who can reach it can pause the run
+HOST = "127.0.0.1"
+
+# Names a request for this machine comes in under. Anything else is another site
+# (or a DNS rebinding one) getting a browser to pause the run
+LOCAL_NAMES = ("127.0.0.1", "localhost")
+
+# RGB of every grid state. Excluded cells are see-through
+PALETTE = {
+    EXCLUDED: (0, 0, 0),
+    VISITED: (235, 235, 235),
+    UNVISITED: (45, 45, 45),
+    PLAYER: (60, 120, 255),
+    MISSING: (220, 40, 40),
+}
+
+# Small maps are scaled up to about this many pixels across
+MIN_PNG_PIXELS = 512
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><meta http-equiv="refresh" content="5"><title>LOD Hopper</title></head>
+<body style="background: #222; color: #eee; font-family: monospace">
+<form method="post" action="/pause" style="display: inline"><button>Pause</button></form>
+<form method="post" action="/resume" style="display: inline"><button>Resume</button></form>
+<pre>{status}</pre>
+<img src="/map.png" style="image-rendering: pixelated; max-width: 100%">
+</body>
+</html>
+"""
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def png_encode(indexed: np.ndarray, palette: Dict[int, tuple], transparent: Sequence[int] = ()) -> bytes:
+    """
+    An 8 bit palette PNG with one pixel per element of indexed, whose values are the palette keys.
+    The array's bytes go into the image as they are, with only a filter byte added to every row.
+    """
+    height, width = indexed.shape
+    colors = max(palette) + 1
+    plte = bytearray(3 * colors)
+    for value, rgb in palette.items():
+        plte[3 * value:3 * value + 3] = bytes(rgb)
+
+    rows = np.zeros((height, width + 1), dtype=np.uint8)
+    rows[:, 1:] = indexed
+
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)),
+        _png_chunk(b"PLTE", bytes(plte)),
+        _png_chunk(b"tRNS", bytes(0 if value in transparent else 255 for value in range(colors))),
+        _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)),
+        _png_chunk(b"IEND", b""),
+    ])
+
+
+def grid_png(grid: np.ndarray, players: Sequence[tuple] = ()) -> bytes:
+    """The map as a PNG, one square of pixels per cell, with players (row and column) drawn on top."""
+    indexed = grid.copy()
+
+    for row, col in players:
+        if 0 <= row < indexed.shape[0] and 0 <= col < indexed.shape[1]:
+            indexed[row, col] = PLAYER
+
+    scale = max(MIN_PNG_PIXELS // max(max(indexed.shape), 1), 1)
+    if scale > 1:
+        indexed = np.repeat(np.repeat(indexed, scale, axis=0), scale, axis=1)
+
+    return png_encode(indexed, PALETTE, transparent=(EXCLUDED,))
+
+
+def _jsonable(value):
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Enum):
+        return value.name
+    if hasattr(value, "_asdict"):
+        return {name: _jsonable(item) for name, item in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+
+    return value
+
+
+class StatusBoard:
+    """
+    The latest state of the run for the status server, posted by the screen task and read
+    from the server's threads. The map is only turned into a PNG when asked for, once per frame.
+    """
+
+    def __init__(self, metrics: Optional[Metrics] = None):
+        self._lock = threading.Lock()
+        self._metrics = metrics
+        self._screen_update = None
+        self._paused = False
+        # Goes up with every frame, so a PNG made for an older one is made again
+        self._frame = 0
+        self._png: Optional[bytes] = None
+        self._png_frame = -1
+
+    def post(self, screen_update, paused: bool) -> None:
+        with self._lock:
+            self._screen_update = screen_update
+            self._paused = paused
+            self._frame += 1
+
+    def status(self) -> dict:
+        """Every field of the latest screen update but the grid, plus where the time went so far."""
+        with self._lock:
+            screen_update, paused = self._screen_update, self._paused
+
+        status = {"paused": paused, "started": screen_update is not None}
+
+        if screen_update is not None:
+            status.update({
+                field.name: _jsonable(getattr(screen_update, field.name))
+                for field in fields(screen_update)
+                if field.name != "grid_data"
+            })
+
+        if self._metrics is not None:
+            status["phases"] = {
+                phase: {"count": histogram.count, "seconds": histogram.sum, "max_seconds": histogram.max}
+                for phase, histogram in self._metrics.snapshot().items()
+            }
+
+        return status
+
+    def png(self) -> Optional[bytes]:
+        with self._lock:
+            screen_update, frame = self._screen_update, self._frame
+
+            if screen_update is None:
+                return None
+            if self._png_frame == frame:
+                return self._png
+
+        # Made outside the lock (and off the event loop), the grid is only read
+        grid_data = screen_update.grid_data
+        coordinates = [screen_update.coordinate] + [player.coordinate for player in screen_update.player_positions if player.coordinate]
+        # Where they are on the map, which a batch shifts for every dimension
+        offset = screen_update.map_offset_x
+        players = [
+            ((grid_data.z_max - coordinate.z) // grid_data.blocks_per_tp, (grid_data.x_max - coordinate.x - offset) // grid_data.blocks_per_tp)
+            for coordinate in coordinates
+            if isinstance(coordinate, Coordinate)
+        ]
+        png = grid_png(grid_data.grid, players)
+
+        with self._lock:
+            if frame > self._png_frame:
+                self._png, self._png_frame = png, frame
+
+        return png
+
+
+def _request_is_local(host: Optional[str], origin: Optional[str]) -> bool:
+    """Whether a request was addressed to this machine, and came from its own page or from no page at all."""
+    if host is None:
+        return False
+
+    name, _, port = host.rpartition(":")
+    if not port.isdigit():
+        name = host
+
+    if name not in LOCAL_NAMES:
+        return False
+
+    # Scripts send no Origin, browsers always do on a POST
+    return origin is None or origin == f"http://{host}"
+
+
+def status_server_start(
+    port: int,
+    board: StatusBoard,
+    on_pause: Callable[[], None],
+    on_resume: Callable[[], None],
+    host: str = HOST,
+) -> ThreadingHTTPServer:
+    """
+    Serves the board on its own thread until shutdown():
+    GET / (a page that refreshes itself), /status.json and /map.png, POST /pause and /resume.
+    """
+    actions = {"/pause": on_pause, "/resume": on_resume}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+
+            if path == "/status.json":
+                self.reply(200, "application/json", json.dumps(board.status()).encode())
+            elif path == "/map.png":
+                png = board.png()
+                if png is None:
+                    self.reply(503, "text/plain", b"The run hasn't started yet\n")
+                else:
+                    self.reply(200, "image/png", png)
+            elif path == "/":
+                status = json.dumps(board.status(), indent=2).replace("&", "&amp;").replace("<", "&lt;")
+                self.reply(200, "text/html; charset=utf-8", PAGE.format(status=status).encode())
+            else:
+                self.reply(404, "text/plain", b"Not found\n")
+
+        def do_POST(self):
+            if not _request_is_local(self.headers.get("Host"), self.headers.get("Origin")):
+                self.reply(403, "text/plain", b"Only the status page on this machine can control the run\n")
+                return
+
+            action = actions.get(self.path.split("?")[0])
+            if action is None:
+                self.reply(404, "text/plain", b"Not found\n")
+                return
+
+            action()
+
+            # Forms go back to the page, anything else gets the status
+            if "text/html" in self.headers.get("Accept", ""):
+                self.send_response(303)
+                self.send_header("Location", "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            else:
+                self.reply(200, "application/json", json.dumps({"ok": True}).encode())
+
+        def reply(self, code: int, content_type: str, body: bytes) -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # The status screen owns the terminal
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
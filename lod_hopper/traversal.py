@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Tuple
+import numpy as np
+from lod_hopper.plan import TeleportPlan, teleport_plan_from_points
+from lod_hopper.schemas import Blocks
+
+# Minecraft stores 32x32 chunks per .mca region file
+REGION_SIZE = 512
+
+
+class Traversal(Enum):
+    # Outside-in square rings, as planned
+    rings = "rings"
+    # Hilbert curve, which stays close to where it has just been at every scale
+    hilbert = "hilbert"
+    # Rows walked back and forth
+    serpentine = "serpentine"
+    # Every point of one region file before moving on to the next
+    region = "region"
+
+
+@dataclass
+class TraversalStats:
+    # Total distance flown between teleports, in blocks
+    path_length: float
+    # How often consecutive teleports are in different region files
+    region_switches: int
+
+
+def region_of(x: np.ndarray, z: np.ndarray):
+    return np.floor_divide(x, REGION_SIZE), np.floor_divide(z, REGION_SIZE)
+
+
+def traversal_stats(plan: TeleportPlan) -> TraversalStats:
+    x = plan.x.astype(np.int64)
+    z = plan.z.astype(np.int64)
+    region_x, region_z = region_of(x, z)
+
+    return TraversalStats(
+        path_length=float(np.sum(np.hypot(np.diff(x), np.diff(z)))),
+        region_switches=int(np.count_nonzero((np.diff(region_x) != 0) | (np.diff(region_z) != 0))),
+    )
+
+
+def hilbert_index(column: np.ndarray, row: np.ndarray) -> np.ndarray:
+    """Distance along a Hilbert curve through every cell of the smallest power of two square holding them."""
+    column = column.astype(np.int64).copy()
+    row = row.astype(np.int64).copy()
+    size = 1 << int(max(column.max(initial=0), row.max(initial=0), 1)).bit_length()
+
+    distance = np.zeros(len(column), dtype=np.int64)
+    step = size // 2
+
+    while step > 0:
+        column_bit = (column & step) > 0
+        row_bit = (row & step) > 0
+        distance += step * step * ((3 * column_bit) ^ row_bit)
+
+        # Rotate the quadrant so the curve inside it starts and ends in the right corners
+        flip = ~row_bit & column_bit
+        column = np.where(flip, size - 1 - column, column)
+        row = np.where(flip, size - 1 - row, row)
+
+        swap = ~row_bit
+        column, row = np.where(swap, row, column), np.where(swap, column, row)
+
+        step //= 2
+
+    return distance
+
+
+def serpentine_key(row: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Sort key walking every other row backwards."""
+    return np.where(row % 2 == 1, -x, x)
+
+
+def traversal_reorder(plan: TeleportPlan, traversal: Traversal, cell_size: Blocks) -> TeleportPlan:
+    """
+    Visits the plan's points in a different order. Points planned more than once
+    (like shared ring corners) are only visited once.
+    """
+    if traversal == Traversal.rings or len(plan) == 0:
+        return plan
+
+    return traversal_points(plan.x, plan.z, traversal, cell_size)[0]
+
+
+def traversal_points(x: np.ndarray, z: np.ndarray, traversal: Traversal, cell_size: Blocks) -> Tuple[TeleportPlan, np.ndarray]:
+    """
+    Plan visiting the distinct points in the traversal's order (anything but rings),
+    and where each of its points came from in x and z.
+    """
+    points, source = np.unique(np.stack([x, z], axis=1), axis=0, return_index=True)
+    x = points[:, 0].astype(np.int64)
+    z = points[:, 1].astype(np.int64)
+
+    row = (z - z.min()) // cell_size
+    region_x, region_z = region_of(x, z)
+
+    if traversal == Traversal.hilbert:
+        # The curve runs through whole region files, with a smaller curve inside each of them
+        region_curve = hilbert_index(region_x - region_x.min(), region_z - region_z.min())
+        inner_curve = hilbert_index((x - region_x * REGION_SIZE) // cell_size, (z - region_z * REGION_SIZE) // cell_size)
+        order = np.lexsort((inner_curve, region_curve))
+    elif traversal == Traversal.serpentine:
+        order = np.lexsort((serpentine_key(row, x), row))
+    else:
+        # Regions are walked in serpentine rows too, and so is every region's inside
+        order = np.lexsort((serpentine_key(row, x), row, serpentine_key(region_z, region_x), region_z))
+
+    x, z, row = x[order], z[order], row[order]
+    region_x, region_z = region_x[order], region_z[order]
+
+    if traversal == Traversal.serpentine:
+        segment = np.unique(row, return_inverse=True)[1]
+        segment_name = "Row"
+    else:
+        # A new segment every time the path moves into another region file
+        changed = (np.diff(region_x) != 0) | (np.diff(region_z) != 0)
+        segment = np.concatenate([[0], np.cumsum(changed)])
+        segment_name = "Region"
+
+    return teleport_plan_from_points(x=x, z=z, segment=segment, segment_name=segment_name), source[order]
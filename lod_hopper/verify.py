@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from lod_hopper.plan import TeleportPlan, teleport_plan_from_points
+from lod_hopper.regions import scan_for_points, count_present
+from lod_hopper.schemas import Blocks
+from lod_hopper.traversal import Traversal, traversal_points, traversal_stats
+
+
+@dataclass
+class Verification:
+    # Whether each plan index still has chunks the world doesn't
+    missing: np.ndarray
+    # Chunks not generated around the missing points (shared chunks are counted once per point)
+    chunks_missing: int
+    region_files_read: int
+
+    @property
+    def num_missing(self) -> int:
+        return int(np.count_nonzero(self.missing))
+
+
+@dataclass
+class RetryPlan:
+    plan: TeleportPlan
+    # Index in the verified plan of every retry point
+    indices: np.ndarray
+
+
+def verify_plan(region_dir: Path, plan: TeleportPlan, half_width: Blocks, checked: Optional[np.ndarray] = None) -> Verification:
+    """Checks the world's region files for every plan index (or just the checked ones) the run should have generated."""
+    checked = np.arange(len(plan)) if checked is None else np.asarray(checked, dtype=np.int64)
+    missing = np.zeros(len(plan), dtype=bool)
+
+    if len(checked) == 0:
+        return Verification(missing=missing, chunks_missing=0, region_files_read=0)
+
+    x, z = plan.x[checked], plan.z[checked]
+    presence = scan_for_points(region_dir, x, z, half_width)
+    present, total = count_present(presence, x, z, half_width)
+
+    missing[checked] = present < total
+
+    return Verification(
+        missing=missing,
+        chunks_missing=int(np.sum(total - present)),
+        region_files_read=presence.region_files_read,
+    )
+
+
+def retry_plan_build(plan: TeleportPlan, missing: np.ndarray, cell_size: Blocks) -> RetryPlan:
+    """
+    Plan flying over just the missing points, each once. Every visiting order is tried
+    (the plan's own one too), since whichever is shortest depends on the shape of the holes.
+    """
+    indices = np.flatnonzero(missing)
+
+    if len(indices) == 0:
+        return RetryPlan(plan=teleport_plan_from_points(x=indices, z=indices, segment=indices, segment_name="Region"), indices=indices)
+
+    candidates = [retry_plan_in_order(plan, indices)]
+
+    for traversal in Traversal:
+        if traversal != Traversal.rings:
+            retry, source = traversal_points(plan.x[indices], plan.z[indices], traversal, cell_size)
+            candidates.append(RetryPlan(plan=retry, indices=indices[source]))
+
+    return min(candidates, key=lambda candidate: traversal_stats(candidate.plan).path_length)
+
+
+def retry_plan_in_order(plan: TeleportPlan, indices: np.ndarray) -> RetryPlan:
+    """The missing points in the order the plan visits them, grouped like the plan groups them."""
+    _, first = np.unique(np.stack([plan.x[indices], plan.z[indices]], axis=1), axis=0, return_index=True)
+    indices = indices[np.sort(first)]
+
+    segment = np.unique(plan.ring[indices], return_inverse=True)[1]
+    retry = teleport_plan_from_points(x=plan.x[indices], z=plan.z[indices], segment=segment, segment_name=plan.segment_name)
+
+    return RetryPlan(plan=retry, indices=indices)
+
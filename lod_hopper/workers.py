@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Protocol, Sequence
+import numpy as np
+from lod_hopper.plan import TeleportPlan
+from lod_hopper.schemas import Blocks
+from lod_hopper.dwell import DwellSteps, dwell_wait_async
+
+
+class Teleporter(Protocol):
+    def teleport(self, x: Blocks, y: Blocks, z: Blocks) -> float:
+        ...
+
+
+class Dwell(Protocol):
+    def steps(self) -> DwellSteps:
+        ...
+
+    def wait(self) -> float:
+        ...
+
+
+def partition_plan(plan: TeleportPlan, num_partitions: int, indices: Optional[np.ndarray] = None) -> List[np.ndarray]:
+    """
+    Splits the plan indices (all of them, or just the given ones) into equally sized pie slices around their middle.
+    Each slice keeps the plan's own order, so every worker still walks its rings outside-in.
+    """
+    if indices is None:
+        indices = np.arange(len(plan))
+
+    # Around the middle of the points themselves, since plans (like jobs with a center, or polygons) can be anywhere
+    x = plan.x[indices].astype(np.float64)
+    z = plan.z[indices].astype(np.float64)
+    angles = np.arctan2(z - z.mean(), x - x.mean()) if len(indices) else z
+    by_angle = indices[np.argsort(angles, kind="stable")]
+
+    return [np.sort(part) for part in np.array_split(by_angle, num_partitions)]
+
+
+class WorkStealingQueue:
+    """
+    One queue of plan indices per worker. A worker that runs out takes the far
+    half of whichever queue has the most left, so both keep moving through nearby points.
+    """
+
+    def __init__(self, partitions: Sequence[np.ndarray]):
+        self._queues: List[Deque[int]] = [deque(part.tolist()) for part in partitions]
+        self._lock = threading.Lock()
+
+    def take(self, worker: int) -> Optional[int]:
+        with self._lock:
+            own = self._queues[worker]
+
+            if not own:
+                victim = max(self._queues, key=len)
+                steal_count = (len(victim) + 1) // 2
+
+                stolen = [victim.pop() for _ in range(steal_count)]
+                own.extend(reversed(stolen))
+
+            return own.popleft() if own else None
+
+    def remaining(self, worker: int) -> int:
+        with self._lock:
+            return len(self._queues[worker])
+
+
+async def run_workers(
+    plan: TeleportPlan,
+    teleporters: Sequence[Teleporter],
+    dwells: Sequence[Dwell],
+    height: Blocks,
+    on_teleport: Callable[[int, int, float], None],
+    wait_running: Callable[[], Awaitable[None]],
+    sleep: Callable[[float], Awaitable[bool]],
+    indices: Optional[np.ndarray] = None,
+    on_loaded: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    """
+    Runs one task per teleporter over the plan (or just the given indices of it),
+    each with its own dwell timing, and returns once every index was visited.
+    Commands go out from worker threads, so a slow backend never holds up the others.
+    on_teleport(worker, index, command latency) is called after each teleport,
+    and on_loaded(worker, index) once the dwell after it is over.
+    Dwells wait through sleep, and nothing is sent until wait_running returns.
+    """
+    queue = WorkStealingQueue(partition_plan(plan, len(teleporters), indices))
+
+    async def work(worker: int) -> None:
+        previous = None
+
+        while True:
+            index = queue.take(worker)
+            if index is None and previous is None:
+                return
+
+            await dwell_wait_async(dwells[worker].steps(), sleep)
+
+            if previous is not None and on_loaded is not None:
+                on_loaded(worker, previous)
+
+            if index is None:
+                return
+
+            await wait_running()
+
+            latency = await asyncio.to_thread(teleporters[worker].teleport, x=int(plan.x[index]), y=height, z=int(plan.z[index]))
+            on_teleport(worker, index, latency)
+            previous = index
+
+    tasks = [asyncio.ensure_future(work(worker)) for worker in range(len(teleporters))]
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # One worker failing or being stopped takes the rest down with it
+        for task in tasks:
+            task.cancel()
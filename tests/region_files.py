@@ -0,0 +1,20 @@
+import struct
+from lod_hopper.regions import REGION_CHUNKS
+
+
+def write_region(region_dir, region_x, region_z, chunks, timestamp=1700000000):
+    """Region file with the given (local x, local z) chunks saved, and nothing but a header otherwise."""
+    locations = bytearray(4096)
+    timestamps = bytearray(4096)
+
+    for sector, (local_x, local_z) in enumerate(sorted(chunks), start=2):
+        entry = local_x + local_z * REGION_CHUNKS
+        struct.pack_into(">I", locations, entry * 4, (sector << 8) | 1)
+        struct.pack_into(">I", timestamps, entry * 4, timestamp)
+
+    region_dir.mkdir(parents=True, exist_ok=True)
+    (region_dir / f"r.{region_x}.{region_z}.mca").write_bytes(bytes(locations + timestamps) + bytes(4096 * len(chunks)))
+
+
+def full_region(region_dir, region_x, region_z):
+    write_region(region_dir, region_x, region_z, {(x, z) for x in range(REGION_CHUNKS) for z in range(REGION_CHUNKS)})
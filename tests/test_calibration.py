@@ -0,0 +1,142 @@
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy as np
+import pytest
+import lod_hopper.lod_hopper as lod_hopper
+from lod_hopper.calibration import (
+    ROW_GAP,
+    CalibrationError,
+    calibration_pick,
+    calibration_spacings,
+    probe_rows,
+    recommended_dwell,
+    spacing_result,
+)
+from lod_hopper.cli import command_line_parsing, main
+from lod_hopper.profiles import ProfileError, profile_dir, profile_load, profile_path, profile_save
+from lod_hopper.regions import REGION_CHUNKS
+from region_files import write_region
+
+
+def test_calibration_spacings():
+    assert calibration_spacings(100, checked=True) == [48, 80, 96, 128, 144, 192]
+    # Nothing wider than asked for without region files to catch the holes
+    assert calibration_spacings(100, checked=False) == [48, 80, 96]
+    assert calibration_spacings(16, checked=True) == [16, 32]
+
+
+def test_probe_rows():
+    rows = probe_rows([48, 128], 3, -1000, -1000)
+
+    assert [row.spacing for row in rows] == [48, 128]
+    assert np.diff(rows[0].x).tolist() == [48, 48]
+    assert np.diff(rows[1].x).tolist() == [128, 128]
+    # Chunk middles
+    assert all((row.x % 16 == 8).all() and (row.z % 16 == 8).all() for row in rows)
+    assert rows[1].z[0] - rows[0].z[0] >= ROW_GAP
+
+
+def test_recommended_dwell():
+    assert recommended_dwell([1.0] * 9 + [5.0], measured=True) == 1.8
+    assert recommended_dwell([0.5, 0.5], measured=True) == 0.7
+    assert recommended_dwell([3.0, 3.0], measured=False) == 3.0
+
+
+def test_calibration_pick():
+    results = [
+        spacing_result(64, [1.0, 1.0], [0.1, 0.1], covered=True, measured=True),
+        spacing_result(128, [2.0, 2.0], [0.1, 0.1], covered=True, measured=True),
+        spacing_result(192, [2.0, 2.0], [0.1, 0.1], covered=False, measured=True),
+    ]
+
+    calibration = calibration_pick(results)
+
+    # 64 chunks in 2.6s beats 16 in 1.35s, and 192 left holes
+    assert (calibration.blocks_per_tp, calibration.seconds_per_tp) == (128, 2.5)
+    assert results[1].chunks_per_second == pytest.approx(64 / 2.6)
+
+    with pytest.raises(CalibrationError):
+        calibration_pick(results[2:])
+
+
+def test_profiles(tmp_path):
+    path = profile_path(tmp_path, "my-server")
+
+    assert profile_load(path) is None
+    profile_save(path, {"blocks_per_tp": 144, "seconds_per_tp": 2.5, "results": []})
+    assert profile_load(path)["blocks_per_tp"] == 144
+
+    path.write_text(json.dumps({"blocks_per_tp": 144}))
+    with pytest.raises(ProfileError):
+        profile_load(path)
+
+    with pytest.raises(ProfileError):
+        profile_path(tmp_path, "../elsewhere")
+
+
+@dataclass
+class FakeGame:
+    """Generates every chunk this far around each teleport, logging it, and saves them as region files."""
+    log_path: object
+    region_dir: object
+    view_chunks: int = 5
+    chunks: set = field(default_factory=set)
+    dimension: Optional[str] = None
+
+    def teleport(self, x, y, z) -> float:
+        for dx in range(-self.view_chunks, self.view_chunks + 1):
+            for dz in range(-self.view_chunks, self.view_chunks + 1):
+                self.chunks.add((x // 16 + dx, z // 16 + dz))
+
+        with open(self.log_path, "a") as log_file:
+            log_file.write(f"[Server thread/INFO]: Generating chunks around {x} {z}\n")
+
+        return 0.05
+
+    def save_world(self) -> None:
+        regions = {}
+        for chunk_x, chunk_z in self.chunks:
+            regions.setdefault((chunk_x // REGION_CHUNKS, chunk_z // REGION_CHUNKS), set()).add((chunk_x % REGION_CHUNKS, chunk_z % REGION_CHUNKS))
+
+        for (region_x, region_z), chunks in regions.items():
+            write_region(self.region_dir, region_x, region_z, chunks)
+
+
+def test_calibrate(tmp_path, monkeypatch, capsys):
+    for name in ("clock", "input_sink"):
+        monkeypatch.setattr(lod_hopper, name, getattr(lod_hopper, name))
+
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    log_path = tmp_path / "latest.log"
+    log_path.write_text("")
+    game = FakeGame(log_path=log_path, region_dir=tmp_path / "world" / "region")
+    monkeypatch.setattr(lod_hopper, "get_teleporter", lambda args, player: game)
+
+    main(["calibrate", "-r", "3000", "--simulate", "--log-file", str(log_path), "--world", str(tmp_path / "world"), "--profile", "fake"])
+
+    # 5 chunks either way cover a spacing of 144 but not 192, and every spacing settles as fast
+    profile = profile_load(profile_path(profile_dir(), "fake"))
+    assert profile["blocks_per_tp"] == 144
+    assert profile["seconds_per_tp"] == 0.2
+    assert [result["covered"] for result in profile["results"]] == [True] * 5 + [False]
+    assert "Best: --blocks-per-tp 144 --seconds-per-tp 0.2" in capsys.readouterr().out
+
+    args = command_line_parsing(["-r", "3000", "--profile", "fake"])
+    assert (args.blocks_per_tp, args.seconds_per_tp) == (144, 0.2)
+    # What is given on the command line still wins
+    assert command_line_parsing(["plan", "-r", "3000", "--profile", "fake", "-b", "100"]).blocks_per_tp == 100
+
+    # Calibrating again starts from the profile, on ground that is already generated
+    with pytest.raises(SystemExit, match="already generated"):
+        main(["calibrate", "-r", "3000", "--simulate", "--log-file", str(log_path), "--world", str(tmp_path / "world"), "--profile", "fake"])
+
+
+def test_missing_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+
+    with pytest.raises(SystemExit):
+        command_line_parsing(["-r", "3000", "--profile", "nowhere"])
+
+    # Calibrate makes it
+    assert command_line_parsing(["calibrate", "-r", "3000"]).profile == "default"
@@ -0,0 +1,107 @@
+from lod_hopper.cli import DIMENSIONS, ORDERS, PACKINGS, SHAPES, command_line_parsing, main
+from lod_hopper.coverage import Packing
+from lod_hopper.journal import journal_close, journal_create, journal_mark
+from lod_hopper.plan_cache import plan_load
+from lod_hopper.plan import teleport_plan_build
+from lod_hopper.regions import WorldDimension
+from lod_hopper.shapes import ShapeKind
+from lod_hopper.traversal import Traversal
+from pathlib import Path
+import subprocess
+import sys
+import pytest
+
+# Loaded only by a live run, or by the commands that plan
+HEAVY_MODULES = ("numpy", "asyncio", "pyautogui", "pynput")
+
+
+def imported_modules(code: str) -> dict:
+    """Runs code in a fresh interpreter, returning how long it took and which heavy modules it loaded."""
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{code}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"print(seconds, *[name for name in {HEAVY_MODULES!r} if name in sys.modules])\n"
+    )
+    root = Path(__file__).resolve().parent.parent
+    # Anything the code prints comes before the last line
+    output = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True).stdout.splitlines()[-1].split()
+
+    return {"seconds": float(output[0]), "modules": output[1:]}
+
+
+def test_choices_match_the_enums():
+    assert SHAPES == tuple(kind.value for kind in ShapeKind)
+    assert PACKINGS == tuple(packing.value for packing in Packing)
+    assert ORDERS == tuple(traversal.value for traversal in Traversal)
+    assert DIMENSIONS == tuple(dimension.name for dimension in WorldDimension)
+
+
+def test_no_command_is_run():
+    args = command_line_parsing(["-r", "3000", "--simulate"])
+
+    assert args.command == "run"
+    assert args.desired_radius == 3000 and args.simulate and args.export_plan is None
+
+
+def test_commands():
+    assert command_line_parsing(["simulate", "-r", "300"]).simulate
+    assert command_line_parsing(["export", "plan.npz", "-r", "300"]).export_plan == Path("plan.npz")
+    assert command_line_parsing(["plan", "--polygon", "town.txt"]).export_plan is None
+    assert command_line_parsing(["status", "-j", "run.journal"]).journal == Path("run.journal")
+    assert command_line_parsing(["datapack", "pack", "-r", "300", "-p", "Steve"]).directory == Path("pack")
+    assert command_line_parsing(["run", "-r", "300", "--status-port", "8765"]).status_port == 8765
+
+
+@pytest.mark.parametrize("argv", [
+    ["plan"],
+    ["plan", "-r", "300", "--rcon", "localhost"],
+    ["export", "-r", "300"],
+    ["datapack", "pack", "-r", "300"],
+    ["run", "--jobs", "jobs.toml", "--import-plan", "plan.npz"],
+])
+def test_bad_command_lines(argv):
+    with pytest.raises(SystemExit):
+        command_line_parsing(argv)
+
+
+def test_parsing_stays_light():
+    loaded = imported_modules("from lod_hopper.cli import command_line_parsing; command_line_parsing(['plan', '-r', '100'])")
+
+    assert loaded["modules"] == []
+    assert loaded["seconds"] < 0.1
+
+
+def test_planning_loads_no_run_modules():
+    assert imported_modules("import lod_hopper.planning")["modules"] == ["numpy"]
+
+
+def test_input_backends_wait_for_a_live_run():
+    # Neither works without a display
+    assert imported_modules("import lod_hopper.lod_hopper")["modules"] == ["numpy", "asyncio"]
+
+
+def test_export_and_status(tmp_path, capsys):
+    main(["export", str(tmp_path / "plan.npz"), "-r", "300", "--plan-cache", str(tmp_path / "cache")])
+
+    plan = plan_load(tmp_path / "plan.npz").plan
+    assert plan == teleport_plan_build(300, 0, 100)
+
+    journal = journal_create(tmp_path / "run.journal", plan, {"desired_radius": 300})
+    for index in range(16):
+        journal_mark(journal, index)
+    journal_close(journal)
+
+    main(["status", "-j", str(tmp_path / "run.journal")])
+
+    output = capsys.readouterr().out
+    assert "Saved 64 teleports" in output
+    assert "16 of 64 teleports done (25.0%)" in output
+    assert "desired_radius=300" in output
+
+    # Reading the journal needs neither numpy nor asyncio
+    loaded = imported_modules(f"from lod_hopper.cli import main; main(['status', '-j', {str(tmp_path / 'run.journal')!r}])")
+
+    assert loaded["modules"] == []
+    assert loaded["seconds"] < 0.1
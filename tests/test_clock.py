@@ -0,0 +1,66 @@
+from lod_hopper.clock import VirtualClock, VirtualEventLoop
+import asyncio
+
+
+def test_sleep_jumps_ahead():
+    clock = VirtualClock()
+
+    clock.sleep(3)
+    clock.sleep(0.5)
+    clock.sleep(-1)
+
+    assert clock.monotonic() == 3.5
+
+
+def test_scheduled_callbacks_fire_at_their_time():
+    clock = VirtualClock()
+    fired = []
+
+    clock.schedule(5, lambda: fired.append(("late", clock.monotonic())))
+    clock.schedule(2, lambda: fired.append(("early", clock.monotonic())))
+    clock.schedule(2, lambda: fired.append(("early too", clock.monotonic())))
+
+    clock.sleep(1)
+    assert fired == []
+
+    clock.sleep(10)
+    assert fired == [("early", 2), ("early too", 2), ("late", 5)]
+    assert clock.monotonic() == 11
+
+
+def test_callbacks_can_sleep_and_schedule():
+    clock = VirtualClock()
+    fired = []
+
+    def first():
+        clock.schedule(clock.monotonic() + 1, lambda: fired.append(clock.monotonic()))
+        clock.sleep(0.5)
+
+    clock.schedule(1, first)
+    clock.sleep(5)
+
+    assert fired == [2]
+    assert clock.monotonic() == 5
+
+
+def test_event_loop_runs_on_the_clock():
+    clock = VirtualClock()
+    loop = VirtualEventLoop(clock)
+    pressed = []
+
+    clock.schedule(7, lambda: loop.call_soon_threadsafe(lambda: pressed.append(loop.time())))
+
+    async def scenario():
+        await asyncio.sleep(5)
+        # Work for threads runs inline, and its sleeps count
+        await asyncio.to_thread(clock.sleep, 1)
+        await asyncio.sleep(100)
+
+        return loop.time()
+
+    try:
+        assert loop.run_until_complete(scenario()) == 106
+    finally:
+        loop.close()
+
+    assert pressed == [7]
@@ -0,0 +1,95 @@
+from lod_hopper.clock import VirtualClock, VirtualEventLoop
+from lod_hopper.control import RunControl, RunStopped
+from lod_hopper.metrics import Metrics
+import asyncio
+import threading
+import time
+import pytest
+
+
+def run_virtual(coroutine_function):
+    clock = VirtualClock()
+    loop = VirtualEventLoop(clock)
+
+    try:
+        return loop.run_until_complete(coroutine_function(loop)), clock
+    finally:
+        loop.close()
+
+
+def test_sleep_holds_while_paused():
+    async def scenario(loop):
+        control = RunControl(monotonic=loop.time)
+        loop.call_at(2, control.pause)
+        loop.call_at(10, control.resume)
+
+        assert await control.sleep(5)
+
+        return loop.time(), control.clock.now()
+
+    (woke, run_time), _ = run_virtual(scenario)
+
+    # 2 seconds before the pause and 3 after it
+    assert woke == pytest.approx(13)
+    assert run_time == pytest.approx(5)
+
+
+def test_skip_cuts_sleep_short():
+    async def scenario(loop):
+        control = RunControl(monotonic=loop.time)
+        loop.call_at(1, control.skip)
+
+        skipped = not await control.sleep(60)
+
+        return skipped, loop.time(), await control.sleep(1)
+
+    (skipped, woke, next_sleep), _ = run_virtual(scenario)
+
+    assert skipped
+    assert woke == pytest.approx(1)
+    assert next_sleep
+
+
+def test_stop_wakes_everyone():
+    async def scenario(loop):
+        control = RunControl(paused=True, monotonic=loop.time)
+        loop.call_at(3, control.stop)
+
+        results = await asyncio.gather(control.wait_running(), control.sleep(10), return_exceptions=True)
+
+        return [type(result) for result in results], loop.time()
+
+    (results, stopped_at), _ = run_virtual(scenario)
+
+    assert results == [RunStopped, RunStopped]
+    assert stopped_at == pytest.approx(3)
+
+
+def test_resume_from_another_thread_is_prompt():
+    metrics = Metrics()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        control = RunControl(paused=True, metrics=metrics)
+
+        threading.Timer(0.05, loop.call_soon_threadsafe, args=(control.toggle_pause,)).start()
+        start = time.perf_counter()
+        await control.wait_running()
+
+        return time.perf_counter() - start
+
+    waited = asyncio.run(scenario())
+
+    assert 0.04 <= waited < 0.5
+    assert metrics.snapshot()["pause"].count == 1
+
+
+def test_on_change():
+    changes = []
+    control = RunControl(paused=True, on_change=lambda: changes.append(control.paused))
+
+    control.toggle_pause()
+    control.toggle_pause()
+    control.pause()
+
+    assert changes == [False, True]
@@ -0,0 +1,67 @@
+from lod_hopper.coverage import (
+    Packing,
+    coverage_plan_build,
+    ring_plan_length,
+    CHUNK_SIZE,
+)
+from lod_hopper.plan import teleport_plan_build, teleport_plan_point
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("desired_radius, radius_done, view_distance, packing", [
+    (3000, 0, 12, Packing.square),
+    (3000, 0, 12, Packing.hex),
+    (3000, 1000, 8, Packing.square),
+    (3000, 1000, 8, Packing.hex),
+    (100, 0, 2, Packing.hex),
+    (500, 0, 32, Packing.square),
+])
+def test_coverage_plan_covers_everything(desired_radius, radius_done, view_distance, packing):
+    coverage = coverage_plan_build(desired_radius, radius_done, view_distance, packing, blocks_per_tp=100)
+
+    assert coverage.coverage_ratio == 1.0
+
+
+def test_coverage_plan_points_are_chunk_aligned_and_unique():
+    plan = coverage_plan_build(3000, 0, 10, Packing.hex, blocks_per_tp=100).plan
+
+    assert np.all(plan.x % CHUNK_SIZE == CHUNK_SIZE // 2)
+    assert np.all(plan.z % CHUNK_SIZE == CHUNK_SIZE // 2)
+    assert len(set(zip(plan.x.tolist(), plan.z.tolist()))) == len(plan)
+
+
+def test_coverage_plan_saves_teleports():
+    coverage = coverage_plan_build(3000, 0, 12, Packing.square, blocks_per_tp=100)
+
+    assert coverage.ring_plan_teleports == len(teleport_plan_build(3000, 0, 100))
+    assert coverage.teleports_saved == coverage.ring_plan_teleports - len(coverage.plan)
+    assert coverage.teleports_saved > 0
+
+
+def test_coverage_plan_skips_excluded_middle():
+    everything = coverage_plan_build(3000, 0, 4, Packing.square, blocks_per_tp=100).plan
+    outside = coverage_plan_build(3000, 2000, 4, Packing.square, blocks_per_tp=100).plan
+
+    assert len(outside) < len(everything)
+    assert not np.any((np.abs(outside.x) < 1900) & (np.abs(outside.z) < 1900))
+
+
+def test_coverage_plan_rows():
+    plan = coverage_plan_build(1000, 0, 8, Packing.square, blocks_per_tp=100).plan
+    points = [teleport_plan_point(plan, index) for index in range(len(plan))]
+
+    assert not plan.ring_based
+    assert plan.segment_name == "Row"
+    assert points[0].side_info is None
+    assert points[-1].ring_index == plan.num_rings - 1
+    assert sum(point.coordinate_index == 0 for point in points) == plan.num_rings
+
+    # Serpentine rows: every hop within a row is one spacing long
+    hops = np.abs(np.diff(plan.x))[np.diff(plan.ring) == 0]
+    assert np.all(hops == hops[0])
+
+
+def test_ring_plan_length():
+    for args in [(3000, 0, 100), (250, 0, 100), (1000, 400, 30)]:
+        assert ring_plan_length(*args) == len(teleport_plan_build(*args))
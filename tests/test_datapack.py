@@ -0,0 +1,114 @@
+from lod_hopper.datapack import (
+    DatapackError,
+    DatapackSettings,
+    datapack_read,
+    datapack_verify,
+    datapack_write,
+)
+import lod_hopper.datapack as datapack
+from lod_hopper.lod_hopper import get_all_teleporation_rings
+from lod_hopper.plan import teleport_plan_build
+from pathlib import Path
+import pytest
+
+SETTINGS = DatapackSettings(player="Steve", dimension="minecraft:overworld", height=180, ticks_per_tp=60)
+
+
+def pack_files(path: Path) -> dict:
+    return {str(file.relative_to(path)): file.read_bytes() for file in sorted(path.rglob("*")) if file.is_file()}
+
+
+@pytest.fixture(params=[256, 4])
+def fan_out(request, monkeypatch):
+    # A small fan out gives even small plans a few levels of functions
+    monkeypatch.setattr(datapack, "FAN_OUT", request.param)
+    return request.param
+
+
+def test_matches_the_rings(tmp_path, fan_out):
+    plan = teleport_plan_build(500, 100, 100)
+    datapack_write(tmp_path / "pack", plan, SETTINGS)
+
+    run = datapack_read(tmp_path / "pack")
+    rings = [
+        (coordinate.x, coordinate.z)
+        for ring in get_all_teleporation_rings(500, 100, 100)
+        for side in (ring.north, ring.west, ring.south, ring.east)
+        for coordinate in side.coordinates
+    ]
+
+    assert list(zip(run.x.tolist(), run.z.tolist())) == rings
+    assert set(run.y.tolist()) == {180}
+    assert run.players == {"Steve"} and run.dimensions == {"minecraft:overworld"}
+    assert run.ticks_per_tp == 60
+
+
+def test_same_plan_same_files(tmp_path, fan_out):
+    plan = teleport_plan_build(300, 0, 100)
+    datapack_write(tmp_path / "first", plan, SETTINGS)
+    datapack_write(tmp_path / "second", plan, SETTINGS)
+
+    assert pack_files(tmp_path / "first") == pack_files(tmp_path / "second")
+
+
+def test_verify_finds_differences(tmp_path):
+    plan = teleport_plan_build(300, 0, 100)
+    path = tmp_path / "pack"
+    datapack_write(path, plan, SETTINGS)
+
+    datapack_verify(path, plan, SETTINGS)
+
+    with pytest.raises(DatapackError, match="60 ticks"):
+        datapack_verify(path, plan, DatapackSettings(**{**SETTINGS.__dict__, "ticks_per_tp": 20}))
+    with pytest.raises(DatapackError, match="Alex"):
+        datapack_verify(path, plan, DatapackSettings(**{**SETTINGS.__dict__, "player": "Alex"}))
+    with pytest.raises(DatapackError, match="plan has"):
+        datapack_verify(path, teleport_plan_build(200, 0, 100), SETTINGS)
+
+    leaf = path / "data/lod_hopper/function/steps/0/0.mcfunction"
+    leaf.write_text(leaf.read_text().replace("tp Steve -100 180 300", "tp Steve -100 180 301"))
+
+    with pytest.raises(DatapackError, match="teleport 2 goes to -100 180 301"):
+        datapack_verify(path, plan, SETTINGS)
+
+
+def test_every_step_once(tmp_path, fan_out):
+    plan = teleport_plan_build(300, 0, 100)
+    path = tmp_path / "pack"
+    datapack_write(path, plan, SETTINGS)
+
+    leaf = path / "data/lod_hopper/function/steps/0/0.mcfunction"
+    lines = leaf.read_text().splitlines(keepends=True)
+    leaf.write_text("".join(lines[:1] + lines[2:]))
+
+    with pytest.raises(DatapackError, match="expected step 1"):
+        datapack_read(path)
+
+
+def test_replaces_only_its_own_packs(tmp_path):
+    path = tmp_path / "pack"
+    datapack_write(path, teleport_plan_build(1000, 0, 100), SETTINGS)
+    datapack_write(path, teleport_plan_build(300, 0, 100), SETTINGS)
+
+    # Leaves of the bigger plan are gone
+    assert not (path / "data/lod_hopper/function/steps/0/1.mcfunction").exists()
+
+    (tmp_path / "world").mkdir()
+    (tmp_path / "world" / "level.dat").write_bytes(b"")
+
+    with pytest.raises(DatapackError, match="isn't a LOD Hopper datapack"):
+        datapack_write(tmp_path / "world", teleport_plan_build(300, 0, 100), SETTINGS)
+
+
+def test_older_pack_format(tmp_path):
+    plan = teleport_plan_build(300, 0, 100)
+    datapack_write(tmp_path / "pack", plan, DatapackSettings(**{**SETTINGS.__dict__, "pack_format": 15}))
+
+    assert (tmp_path / "pack/data/lod_hopper/functions/tick.mcfunction").exists()
+    assert (tmp_path / "pack/data/minecraft/tags/functions/load.json").exists()
+    assert len(datapack_read(tmp_path / "pack").x) == len(plan)
+
+
+def test_player_without_spaces(tmp_path):
+    with pytest.raises(DatapackError):
+        datapack_write(tmp_path / "pack", teleport_plan_build(300, 0, 100), DatapackSettings(**{**SETTINGS.__dict__, "player": "@a[tag=a, limit=1]"}))
@@ -0,0 +1,95 @@
+from lod_hopper.dwell import (
+    FixedDwell,
+    log_dwell_open,
+    log_tail_open,
+    log_tail_read_lines,
+)
+import threading
+import time
+import pytest
+
+
+def write_lines(path, lines, interval):
+    for line in lines:
+        with open(path, "a") as log_file:
+            log_file.write(line + "\n")
+        time.sleep(interval)
+
+
+@pytest.fixture()
+def log_path(tmp_path):
+    path = tmp_path / "latest.log"
+    path.write_text("[12:00:00] [Server thread/INFO]: Done (2.1s)!\n")
+
+    return path
+
+
+def test_log_tail_reads_new_lines(log_path):
+    tail = log_tail_open(log_path)
+
+    assert log_tail_read_lines(tail) == []
+
+    with open(log_path, "a") as log_file:
+        log_file.write("first\nsecond\nhalf")
+
+    assert log_tail_read_lines(tail) == ["first", "second"]
+
+    with open(log_path, "a") as log_file:
+        log_file.write(" line\n")
+
+    assert log_tail_read_lines(tail) == ["half line"]
+
+
+def test_log_tail_follows_truncation(log_path):
+    tail = log_tail_open(log_path)
+    log_path.write_text("new\n")
+
+    assert log_tail_read_lines(tail) == ["new"]
+
+
+def test_log_dwell_moves_on_when_quiet(log_path):
+    dwell = log_dwell_open(log_path, FixedDwell(seconds=5), min_seconds=0.05, max_seconds=5, quiet_seconds=0.2)
+    dwell.poll_seconds = 0.01
+
+    writer = threading.Thread(target=write_lines, args=(log_path, ["Generating chunk 1,2"] * 5, 0.05))
+    writer.start()
+
+    waited = dwell.wait()
+    writer.join()
+
+    # Five lines 0.05s apart, then 0.2s of quiet
+    assert 0.4 <= waited < 2
+
+
+def test_log_dwell_ignores_unrelated_lines(log_path):
+    dwell = log_dwell_open(log_path, FixedDwell(seconds=5), min_seconds=0.1, max_seconds=5, quiet_seconds=0.1)
+    dwell.poll_seconds = 0.01
+
+    writer = threading.Thread(target=write_lines, args=(log_path, ["<player> hello"] * 10, 0.05))
+    writer.start()
+
+    waited = dwell.wait()
+    writer.join()
+
+    assert waited < 0.4
+
+
+def test_log_dwell_capped_at_max(log_path):
+    dwell = log_dwell_open(log_path, FixedDwell(seconds=5), min_seconds=0, max_seconds=0.2, quiet_seconds=1)
+    dwell.poll_seconds = 0.01
+
+    writer = threading.Thread(target=write_lines, args=(log_path, ["Loading chunk"] * 20, 0.02))
+    writer.start()
+
+    waited = dwell.wait()
+    writer.join()
+
+    assert 0.2 <= waited < 0.4
+
+
+def test_log_dwell_falls_back_without_log(tmp_path):
+    waits = []
+    dwell = log_dwell_open(tmp_path / "missing.log", FixedDwell(seconds=3, sleep=waits.append), min_seconds=0, max_seconds=1, quiet_seconds=1)
+
+    assert dwell.wait() == 3
+    assert waits == [3]
@@ -0,0 +1,100 @@
+from lod_hopper.eta import RunClock, RateEstimator, chunks_per_teleport
+import pytest
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def fake_time():
+    return FakeTime()
+
+
+def test_run_clock_stands_still_while_paused(fake_time):
+    clock = RunClock(paused=True, monotonic=fake_time)
+    start = clock.now()
+
+    fake_time.now += 50
+    assert clock.now() == start
+
+    clock.resume()
+    fake_time.now += 2
+    assert clock.now() == start + 2
+
+    clock.pause()
+    clock.pause()
+    fake_time.now += 10
+    clock.resume()
+    fake_time.now += 1
+    assert clock.now() == start + 3
+
+
+def test_estimator_guesses_until_measured(fake_time):
+    estimator = RateEstimator(remaining=100, seconds_per_teleport=3, chunks_per_teleport=4, clock=RunClock(monotonic=fake_time))
+
+    assert estimator.seconds_left() == 300
+
+    estimator.record()
+    assert estimator.seconds_left() == 99 * 3
+
+
+def test_estimator_measures_real_speed(fake_time):
+    estimator = RateEstimator(remaining=100, seconds_per_teleport=3, chunks_per_teleport=4, clock=RunClock(monotonic=fake_time))
+
+    # Typing the command makes every teleport take a bit longer than planned
+    for _ in range(11):
+        estimator.record()
+        fake_time.now += 4
+
+    assert estimator.seconds_per_teleport() == pytest.approx(4)
+    assert estimator.seconds_left() == pytest.approx(89 * 4)
+    assert estimator.teleports_per_minute() == pytest.approx(15)
+    assert estimator.chunks_per_minute() == pytest.approx(60)
+
+
+def test_estimator_ignores_pauses(fake_time):
+    clock = RunClock(monotonic=fake_time)
+    estimator = RateEstimator(remaining=10, seconds_per_teleport=3, chunks_per_teleport=1, clock=clock)
+
+    for teleport in range(5):
+        estimator.record()
+        fake_time.now += 2
+
+        if teleport == 2:
+            clock.pause()
+            fake_time.now += 3600
+            clock.resume()
+
+    assert estimator.seconds_per_teleport() == pytest.approx(2)
+
+
+def test_estimator_window_follows_changes(fake_time):
+    estimator = RateEstimator(remaining=1000, seconds_per_teleport=3, chunks_per_teleport=1, clock=RunClock(monotonic=fake_time), window=5)
+
+    for seconds in [10] * 20 + [1] * 5:
+        estimator.record()
+        fake_time.now += seconds
+
+    assert estimator.seconds_per_teleport() == pytest.approx(1)
+
+
+def test_estimator_several_workers(fake_time):
+    estimator = RateEstimator(remaining=100, seconds_per_teleport=1.5, chunks_per_teleport=1, clock=RunClock(monotonic=fake_time))
+
+    # Two workers, each teleporting every 3 seconds, half a step apart
+    for _ in range(10):
+        estimator.record()
+        fake_time.now += 1.5
+
+    assert estimator.seconds_per_teleport() == pytest.approx(1.5)
+    assert estimator.seconds_left() == pytest.approx(90 * 1.5)
+
+
+def test_chunks_per_teleport():
+    assert chunks_per_teleport(16) == 1
+    assert chunks_per_teleport(100) == pytest.approx(39.0625)
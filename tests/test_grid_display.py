@@ -3,80 +3,55 @@ from lod_hopper.grid_display import (
     GridData,
     grid_data_add_visited,
     grid_data_to_string,
+    grid_data_cell,
+    grid_data_add_visited_range,
+    grid_data_add_visited_indices,
+    grid_data_to_lines,
+    grid_data_add_missing_indices,
+    grid_data_fit_level,
+    grid_data_pyramid,
+    pyramid_build,
 )
 from lod_hopper.schemas import Coordinate
 import pytest
 import numpy as np
 from lod_hopper.lod_hopper import get_all_teleporation_rings
 
+COORDINATES = tuple(
+    Coordinate(x=x, z=z)
+    for x in range(10, 15)
+    for z in range(10, 15)
+    if not (x == 12 and z == 12) and not (x == 11 and z == 13)
+)
+
+
 @pytest.fixture()
 def mock_grid_data():
     return GridData(
-        grid=np.array([[2, 2, 2, 2, 2], [2, 2, 2, 0, 2], [2, 2, 0, 2, 2], [2, 2, 2, 2, 2], [2, 2, 2, 2, 2]]),
-        order=(
-            Coordinate(x=10, z=10),
-            Coordinate(x=10, z=11),
-            Coordinate(x=10, z=12),
-            Coordinate(x=10, z=13),
-            Coordinate(x=10, z=14),
-            Coordinate(x=11, z=10),
-            Coordinate(x=11, z=11),
-            Coordinate(x=11, z=12),
-            Coordinate(x=11, z=14),
-            Coordinate(x=12, z=10),
-            Coordinate(x=12, z=11),
-            Coordinate(x=12, z=13),
-            Coordinate(x=12, z=14),
-            Coordinate(x=13, z=10),
-            Coordinate(x=13, z=11),
-            Coordinate(x=13, z=12),
-            Coordinate(x=13, z=13),
-            Coordinate(x=13, z=14),
-            Coordinate(x=14, z=10),
-            Coordinate(x=14, z=11),
-            Coordinate(x=14, z=12),
-            Coordinate(x=14, z=13),
-            Coordinate(x=14, z=14),
-        ),
-        coord_to_index={
-            Coordinate(x=10, z=10): (4, 4),
-            Coordinate(x=10, z=11): (3, 4),
-            Coordinate(x=10, z=12): (2, 4),
-            Coordinate(x=10, z=13): (1, 4),
-            Coordinate(x=10, z=14): (0, 4),
-            Coordinate(x=11, z=10): (4, 3),
-            Coordinate(x=11, z=11): (3, 3),
-            Coordinate(x=11, z=12): (2, 3),
-            Coordinate(x=11, z=14): (0, 3),
-            Coordinate(x=12, z=10): (4, 2),
-            Coordinate(x=12, z=11): (3, 2),
-            Coordinate(x=12, z=13): (1, 2),
-            Coordinate(x=12, z=14): (0, 2),
-            Coordinate(x=13, z=10): (4, 1),
-            Coordinate(x=13, z=11): (3, 1),
-            Coordinate(x=13, z=12): (2, 1),
-            Coordinate(x=13, z=13): (1, 1),
-            Coordinate(x=13, z=14): (0, 1),
-            Coordinate(x=14, z=10): (4, 0),
-            Coordinate(x=14, z=11): (3, 0),
-            Coordinate(x=14, z=12): (2, 0),
-            Coordinate(x=14, z=13): (1, 0),
-            Coordinate(x=14, z=14): (0, 0),
-        },
+        grid=np.array([[2, 2, 2, 2, 2], [2, 2, 2, 0, 2], [2, 2, 0, 2, 2], [2, 2, 2, 2, 2], [2, 2, 2, 2, 2]], dtype=np.uint8),
+        x=np.array([coord.x for coord in COORDINATES], dtype=np.int32),
+        z=np.array([coord.z for coord in COORDINATES], dtype=np.int32),
+        x_max=14,
+        z_max=14,
+        blocks_per_tp=1,
     )
 
 
 def test_grid_data_initialize(mock_grid_data):
-    coordinates = tuple(
-        Coordinate(x=x, z=z)
-        for x in range(10, 15)
-        for z in range(10, 15)
-        if not (x == 12 and z == 12) and not (x == 11 and z == 13)
+    grid_data = grid_data_initialize(
+        np.array([coord.x for coord in COORDINATES], dtype=np.int32),
+        np.array([coord.z for coord in COORDINATES], dtype=np.int32),
+        blocks_per_tp=1,
     )
 
-    grid_data = grid_data_initialize(coordinates, blocks_per_tp=1)
-
     assert grid_data == mock_grid_data
+    assert grid_data.grid.dtype == np.uint8
+
+
+def test_grid_data_cell(mock_grid_data):
+    assert grid_data_cell(mock_grid_data, 0) == (4, 4)
+    assert grid_data_cell(mock_grid_data, 8) == (0, 3)
+    assert grid_data_cell(mock_grid_data, 22) == (0, 0)
 
 
 def test_grid_to_string(mock_grid_data):
@@ -92,3 +67,80 @@ def test_grid_to_string(mock_grid_data):
         '⬛⬛⬛⬛⬜',
         '⬛⬛⬛⬛⬜'
     ])
+
+
+def test_grid_add_visited_range(mock_grid_data):
+    grid_data_add_visited_range(mock_grid_data, 0, 5)
+    grid_data_add_visited_range(mock_grid_data, 20, 100)
+
+    assert grid_data_to_string(mock_grid_data) == '\n'.join([
+        '⬜⬛⬛⬛⬜',
+        '⬜⬛⬛  ⬜',
+        '⬜⬛  ⬛⬜',
+        '⬛⬛⬛⬛⬜',
+        '⬛⬛⬛⬛⬜'
+    ])
+
+
+def test_grid_add_visited_indices(mock_grid_data):
+    grid_data_add_visited_indices(mock_grid_data, [0, 22, 500])
+
+    assert grid_data_to_string(mock_grid_data) == '\n'.join([
+        '⬜⬛⬛⬛⬛',
+        '⬛⬛⬛  ⬛',
+        '⬛⬛  ⬛⬛',
+        '⬛⬛⬛⬛⬛',
+        '⬛⬛⬛⬛⬜'
+    ])
+
+
+def test_grid_to_lines_with_players(mock_grid_data):
+    lines = grid_data_to_lines(mock_grid_data, max_rows=2, max_cells=3, players=[Coordinate(x=14, z=14), Coordinate(x=10, z=10)])
+
+    assert lines == ['🟦⬛⬛', '⬛⬛⬛']
+    assert mock_grid_data.grid[0, 0] == 2
+
+
+def test_pyramid_follows_updates(mock_grid_data):
+    pyramid = grid_data_pyramid(mock_grid_data)
+
+    grid_data_add_visited(mock_grid_data, 0)
+    grid_data_add_visited(mock_grid_data, 0)
+    grid_data_add_visited_range(mock_grid_data, 3, 12)
+    grid_data_add_missing_indices(mock_grid_data, [4, 12, 12, 20])
+    grid_data_add_visited_indices(mock_grid_data, [12, 22])
+
+    expected = pyramid_build(mock_grid_data.grid)
+
+    assert len(pyramid.planned) == 3
+    for counts, expected_counts in zip(pyramid.planned + pyramid.visited + pyramid.missing, expected.planned + expected.visited + expected.missing):
+        assert np.array_equal(counts, expected_counts)
+    assert pyramid.planned[-1].tolist() == [[23]]
+
+
+@pytest.mark.parametrize("max_rows, max_cells, expected", [
+    (5, 5, 0),
+    (100, 4, 1),
+    (3, 3, 1),
+    (2, 3, 2),
+    (1, 1, 3),
+    (0, 0, 3),
+])
+def test_grid_data_fit_level(mock_grid_data, max_rows, max_cells, expected):
+    assert grid_data_fit_level(mock_grid_data, max_rows, max_cells) == expected
+
+
+def test_grid_to_lines_zoomed_out(mock_grid_data):
+    grid_data_add_visited_range(mock_grid_data, 0, 6)
+    grid_data_add_visited_indices(mock_grid_data, [22])
+    grid_data_add_missing_indices(mock_grid_data, [18])
+
+    lines = grid_data_to_lines(mock_grid_data, level=1, players=[Coordinate(x=10, z=10)])
+
+    assert lines == [
+        '▒▒░░██',
+        '░░░░██',
+        '🟥▓▓🟦',
+    ]
+    assert grid_data_to_lines(mock_grid_data, level=3) == ['🟥']
+    assert grid_data_to_lines(mock_grid_data, max_rows=1, max_cells=2, level=1) == ['▒▒░░']
@@ -0,0 +1,137 @@
+from lod_hopper.jobs import (
+    JobFileError,
+    batch_plan_build,
+    batch_travel,
+    job_file_load,
+    job_plan_build,
+    jobs_parse,
+)
+from lod_hopper.regions import WorldDimension
+from lod_hopper.shapes import Circle, Polygon
+from lod_hopper.grid_display import UNVISITED, grid_data_initialize
+import json
+import numpy as np
+import pytest
+
+JOB_FILE = """
+[defaults]
+shape = "circle"
+seconds_per_tp = 2
+
+[[jobs]]
+name = "spawn"
+radius = 1000
+exclude = 200
+
+[[jobs]]
+name = "nether portal"
+dimension = "nether"
+center = [100, -40]
+radius = 400
+height = 100
+
+[[jobs]]
+name = "farm"
+shape = "square"
+polygon = [[0, 0], [500, 0], [0, 500]]
+"""
+
+
+def test_job_file_load(tmp_path):
+    toml_path = tmp_path / "jobs.toml"
+    toml_path.write_text(JOB_FILE)
+    json_path = tmp_path / "jobs.json"
+    json_path.write_text(json.dumps({"jobs": [{"radius": 100}]}))
+
+    assert job_file_load(toml_path)["defaults"]["shape"] == "circle"
+    assert job_file_load(json_path) == {"jobs": [{"radius": 100}]}
+
+    toml_path.write_text("[[jobs]\n")
+    with pytest.raises(JobFileError):
+        job_file_load(toml_path)
+
+
+def test_jobs_parse(tmp_path):
+    path = tmp_path / "jobs.toml"
+    path.write_text(JOB_FILE)
+
+    spawn, portal, farm = jobs_parse(job_file_load(path), height=180, seconds_per_tp=3)
+
+    assert spawn.region.outer == Circle(1000) and spawn.region.inner == Circle(200)
+    assert (spawn.dimension, spawn.height, spawn.seconds_per_tp) == (WorldDimension.overworld, 180, 2)
+    assert portal.region.outer == Circle(400, center_x=100, center_z=-40)
+    assert (portal.dimension, portal.height) == (WorldDimension.nether, 100)
+    assert farm.name == "farm" and isinstance(farm.region.outer, Polygon)
+
+
+@pytest.mark.parametrize("data", [
+    {},
+    {"jobs": [{"name": "both", "radius": 10, "polygon": [[0, 0], [1, 0], [0, 1]]}]},
+    {"jobs": [{"name": "neither"}]},
+    {"jobs": [{"radius": 10, "dimension": "moon"}]},
+    {"jobs": [{"radius": 10, "colour": "red"}]},
+    {"jobs": [{"polygon": [[0, 0], [1, 0]]}]},
+    {"defaults": {"radius": 10}, "jobs": [{"radius": 10}]},
+    {"jobs": [{"radius": "abc"}]},
+    {"jobs": [{"radius": 10, "exclude": "x"}]},
+    {"jobs": [{"radius": 10, "height": [1]}]},
+    {"jobs": [{"radius": 10, "seconds_per_tp": "slow"}]},
+])
+def test_jobs_parse_invalid(data):
+    with pytest.raises(JobFileError):
+        jobs_parse(data, height=180, seconds_per_tp=3)
+
+
+def jobs(*specs):
+    return jobs_parse({"jobs": list(specs)}, height=180, seconds_per_tp=3)
+
+
+def test_job_plan_on_shared_lattice():
+    plan = job_plan_build(jobs({"radius": 450, "center": [1234, -567]})[0], 100)
+
+    assert np.all(plan.x % 100 == 0) and np.all(plan.z % 100 == 0)
+    # Each teleport loads the 100 blocks around it
+    assert plan.x.min() - 50 <= 1234 - 450 and plan.x.max() + 50 >= 1234 + 450
+
+
+def test_overlapping_jobs_merge():
+    batch = batch_plan_build(jobs({"name": "a", "radius": 1000}, {"name": "b", "radius": 1000, "center": [1000, 0]}), 100)
+
+    points = set(zip(batch.plan.x.tolist(), batch.plan.z.tolist()))
+
+    # Each teleport is made once, by the first job to need it
+    assert len(points) == len(batch.plan)
+    first = job_plan_build(batch.jobs[0], 100)
+    assert len(batch.job_indices(0)) == len(set(zip(first.x.tolist(), first.z.tolist())))
+    assert len(batch.job_indices(1)) < len(batch.job_indices(0))
+
+
+def test_same_points_in_other_dimensions_are_kept():
+    batch = batch_plan_build(jobs({"radius": 300}, {"radius": 300, "dimension": "end"}), 100)
+
+    assert len(batch.job_indices(0)) == len(batch.job_indices(1))
+
+
+def test_jobs_ordered_by_dimension_then_distance():
+    batch = batch_plan_build(jobs(
+        {"name": "far", "radius": 200, "center": [10000, 0]},
+        {"name": "nether", "radius": 200, "dimension": "nether"},
+        {"name": "spawn", "radius": 200},
+        {"name": "near", "radius": 200, "center": [2000, 0]},
+    ), 100)
+
+    assert [job.name for job in batch.jobs] == ["spawn", "near", "far", "nether"]
+    assert batch_travel(batch)[1] == 1
+    assert batch.plan.ring.tolist() == sorted(batch.plan.ring.tolist())
+    assert batch.job_offsets.tolist() == [0, *np.cumsum([len(batch.job_indices(job)) for job in range(4)]).tolist()]
+
+
+def test_dimensions_side_by_side_on_the_map():
+    batch = batch_plan_build(jobs({"radius": 300}, {"radius": 300, "dimension": "nether"}), 100)
+    overworld, nether = batch.job_indices(0), batch.job_indices(1)
+
+    assert batch.display_x[overworld].tolist() == batch.plan.x[overworld].tolist()
+    assert batch.display_x[nether].max() < batch.display_x[overworld].min()
+
+    grid = grid_data_initialize(batch.display_x, batch.plan.z, 100).grid
+    assert np.count_nonzero(grid == UNVISITED) == len(batch.plan)
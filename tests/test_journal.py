@@ -0,0 +1,125 @@
+from lod_hopper.journal import (
+    JournalMismatchError,
+    journal_create,
+    journal_open,
+    journal_mark,
+    journal_visited,
+    journal_close,
+    SYNC_EVERY_MARKS,
+)
+from lod_hopper.journal_format import HEADER, MAGIC, VERSION, bitset_offset, journal_summary
+from lod_hopper.plan import teleport_plan_build
+import json
+import pytest
+
+PARAMS = {"desired_radius": 1000, "exclude": 0, "blocks_per_tp": 100}
+
+
+@pytest.fixture()
+def plan():
+    return teleport_plan_build(1000, 0, 100)
+
+
+def test_new_journal_is_empty(tmp_path, plan):
+    journal = journal_create(tmp_path / "run.journal", plan, PARAMS)
+
+    assert not journal_visited(journal).any()
+
+    journal_close(journal)
+    # Closing twice, like a run stopped while verifying, is harmless
+    journal_close(journal)
+
+
+def test_resume_where_it_stopped(tmp_path, plan):
+    path = tmp_path / "run.journal"
+    journal = journal_create(path, plan, PARAMS)
+
+    for index in list(range(0, 42)) + [50, 51]:
+        journal_mark(journal, index)
+
+    journal_close(journal)
+
+    journal = journal_open(path, plan, PARAMS)
+    visited = journal_visited(journal)
+
+    assert len(visited) == len(plan)
+    assert visited.sum() == 44
+    assert visited[:42].all() and visited[50] and visited[51]
+    assert not visited[42:50].any() and not visited[52:].any()
+
+    journal_close(journal)
+
+
+def test_marks_reach_the_file_without_closing(tmp_path, plan):
+    path = tmp_path / "run.journal"
+    journal = journal_create(path, plan, PARAMS)
+
+    for index in range(SYNC_EVERY_MARKS):
+        journal_mark(journal, index)
+
+    assert journal.unsynced_marks == 0
+
+    other = journal_open(path, plan, PARAMS)
+    assert journal_visited(other).sum() == SYNC_EVERY_MARKS
+
+    journal_close(other)
+    journal_close(journal)
+
+
+def test_all_visited(tmp_path, plan):
+    journal = journal_create(tmp_path / "run.journal", plan, PARAMS)
+
+    for index in range(len(plan)):
+        journal_mark(journal, index)
+
+    assert journal_visited(journal).all()
+
+    journal_close(journal)
+
+
+def test_different_plan_is_refused(tmp_path, plan):
+    path = tmp_path / "run.journal"
+    journal_close(journal_create(path, plan, PARAMS))
+
+    with pytest.raises(JournalMismatchError):
+        journal_open(path, teleport_plan_build(1000, 0, 50), {**PARAMS, "blocks_per_tp": 50})
+
+    with pytest.raises(JournalMismatchError):
+        journal_open(path, plan, {**PARAMS, "exclude": 100})
+
+
+def test_not_a_journal(tmp_path, plan):
+    path = tmp_path / "run.journal"
+    path.write_bytes(b"hello")
+
+    with pytest.raises(JournalMismatchError):
+        journal_open(path, plan, PARAMS)
+
+
+def test_summary_without_the_plan(tmp_path, plan):
+    path = tmp_path / "run.journal"
+    journal = journal_create(path, plan, PARAMS)
+
+    for index in (0, 1, 2, 9):
+        journal_mark(journal, index)
+
+    journal_close(journal)
+
+    assert journal_summary(path) == (PARAMS, len(plan), 4)
+
+    (tmp_path / "other").write_bytes(b"nope")
+    with pytest.raises(JournalMismatchError):
+        journal_summary(tmp_path / "other")
+
+
+def test_summary_reads_the_bitset_where_the_header_says(tmp_path):
+    # Parameters written with other formatting than this version's json.dumps
+    params_bytes = b'{ "desired_radius" :  300 }'
+    offset = bitset_offset(len(params_bytes))
+    assert offset != bitset_offset(len(json.dumps({"desired_radius": 300}).encode()))
+
+    header = HEADER.pack(MAGIC, VERSION, len(params_bytes), 16, bytes(32)) + params_bytes
+    path = tmp_path / "run.journal"
+    path.write_bytes(header.ljust(offset, b"\x00") + bytes([0b1011, 0b1]))
+
+    assert journal_summary(path) == ({"desired_radius": 300}, 16, 4)
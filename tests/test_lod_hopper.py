@@ -1,4 +1,13 @@
-from lod_hopper.lod_hopper import load_line
+import lod_hopper.lod_hopper as lod_hopper
+from lod_hopper.lod_hopper import load_line, get_estimate_string
+from lod_hopper.cli import command_line_parsing, main
+from lod_hopper.journal import journal_close, journal_create, journal_mark, journal_visited
+from lod_hopper.plan import teleport_plan_build
+import asyncio
+import json
+import sys
+import tempfile
+from datetime import timedelta
 import pytest
 
 @pytest.mark.parametrize("start, end", [
@@ -16,3 +25,101 @@ def test_load_line(start, end):
     
     assert result[0] == start
     assert result[-1] == end
+
+
+@pytest.mark.parametrize("seconds, expected", [
+    (1, "1 second"),
+    (45, "45 seconds"),
+    (90, "2 minutes"),
+    (3600, "1.0 hour"),
+    (3600 + 1800, "1.5 hours"),
+    (5 * 3600, "5.0 hours"),
+    (86400 + 12 * 3600, "1.5 days"),
+    (3 * 86400 + 3600, "3.0 days"),
+    (-5, "0 seconds"),
+])
+def test_get_estimate_string(seconds, expected):
+    assert get_estimate_string(timedelta(seconds=seconds)) == expected
+
+
+def test_simulate(tmp_path, monkeypatch, capsys):
+    # Everything a simulation swaps out goes back once the test is done
+    for name in ("clock", "input_sink"):
+        monkeypatch.setattr(lod_hopper, name, getattr(lod_hopper, name))
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    (tmp_path / "tmp").mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "tmp"))
+    trace_path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(sys, "argv", [
+        "lod_hopper", "-r", "300", "-nov", "--journal", str(tmp_path / "run.journal"),
+        "--simulate", "--simulate-pause", "10:100", "--trace", str(trace_path),
+    ])
+
+    lod_hopper.main()
+
+    trace = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    commands = [event["detail"] for event in trace if event["action"] == "type"]
+    hotkeys = [event["time"] for event in trace if event["action"] == "hotkey"]
+
+    # Rings of radius 300, 200, 100 and 0, each side visited
+    assert len(commands) == 4 * (7 + 5 + 3 + 1)
+    assert commands[0] == "/tp -300 180 300"
+    assert hotkeys == [0, 10, 110]
+
+    # 3 seconds of dwell and 0.5 of typing per teleport up to the last enter, plus the pause,
+    # less the part of it spent finishing the command it started in
+    unpaused = len(commands) * 3.5 - 0.1
+    assert unpaused + 100 - 3 <= trace[-1]["time"] <= unpaused + 100
+    assert "Simulated 64 commands" in capsys.readouterr().out
+
+    # The real journal isn't touched, and the copy is gone
+    assert not (tmp_path / "run.journal").exists()
+    assert not list((tmp_path / "tmp").iterdir())
+    assert len(list((tmp_path / "cache" / "lod_hopper").glob("plan-*.npz"))) == 1
+
+
+def test_journal_is_kept_without_resume(tmp_path):
+    plan = teleport_plan_build(300, 0, 100)
+    params = {"desired_radius": 300}
+    path = tmp_path / "run.journal"
+    journal = journal_create(path, plan, params)
+    journal_mark(journal, 5)
+    journal_close(journal)
+
+    with pytest.raises(SystemExit, match="--resume"):
+        lod_hopper.get_journal(command_line_parsing(["-r", "300", "-j", str(path)]), plan, params)
+
+    journal = lod_hopper.get_journal(command_line_parsing(["-r", "300", "-j", str(path), "--resume"]), plan, params)
+    assert journal_visited(journal)[5]
+    journal_close(journal)
+
+    journal = lod_hopper.get_journal(command_line_parsing(["-r", "300", "-j", str(path), "--fresh"]), plan, params)
+    assert not journal_visited(journal).any()
+    journal_close(journal)
+
+    with pytest.raises(SystemExit):
+        command_line_parsing(["-r", "300", "--resume", "--fresh"])
+
+
+def test_run_waits_for_its_tasks(tmp_path, monkeypatch):
+    for name in ("clock", "input_sink"):
+        monkeypatch.setattr(lod_hopper, name, getattr(lod_hopper, name))
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    streams = []
+
+    async def update_screen(control, frames_per_second, stream=None, board=None):
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            streams.append((stream, stream.closed))
+
+    monkeypatch.setattr(lod_hopper, "update_screen", update_screen)
+
+    main(["simulate", "-r", "100", "-nov", "-j", str(tmp_path / "run.journal")])
+
+    # Cancelled and finished before the run returned, and only then was its sink closed
+    (stream, closed_while_running), = streams
+    assert not closed_while_running
+    assert stream.closed
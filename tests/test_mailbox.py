@@ -0,0 +1,46 @@
+from lod_hopper.mailbox import LatestMailbox
+import asyncio
+import threading
+
+
+def test_latest_state_wins():
+    mailbox = LatestMailbox()
+
+    for i in range(1000):
+        mailbox.post(f"state {i}", visited_index=i)
+
+    state, visited = mailbox.take()
+
+    assert state == "state 999"
+    assert visited == list(range(1000))
+
+
+def test_notify_keeps_state():
+    mailbox = LatestMailbox()
+    mailbox.post("state", visited_index=0)
+    mailbox.take()
+
+    mailbox.notify()
+
+    assert mailbox.take(timeout=1) == ("state", [])
+
+
+def test_take_waits_for_news():
+    mailbox = LatestMailbox()
+
+    assert mailbox.take(timeout=0.01) == (None, [])
+
+    threading.Timer(0.05, mailbox.post, args=("later",), kwargs={"visited_index": 3}).start()
+
+    assert mailbox.take(timeout=5) == ("later", [3])
+
+
+def test_take_async_woken_from_another_thread():
+    mailbox = LatestMailbox()
+
+    async def take():
+        threading.Timer(0.05, mailbox.post, args=("later",), kwargs={"visited_index": 3}).start()
+
+        return await asyncio.wait_for(mailbox.take_async(), 5)
+
+    assert asyncio.run(take()) == ("later", [3])
@@ -0,0 +1,157 @@
+from lod_hopper.metrics import (
+    BUCKETS,
+    PROMETHEUS_NAME,
+    JSON_LINES_NAME,
+    Metrics,
+    TimedDwell,
+    TimedTeleporter,
+    histogram_quantile,
+    metrics_export,
+    metrics_summary_lines,
+    metrics_to_prometheus,
+)
+from lod_hopper.eta import RunClock
+import json
+import pytest
+
+
+class FakeTeleporter:
+    def __init__(self):
+        self.teleports = []
+
+    def teleport(self, x, y, z):
+        self.teleports.append((x, y, z))
+        return 0.25
+
+
+class FakeDwell:
+    def wait(self):
+        return 1.5
+
+
+def test_observe():
+    metrics = Metrics()
+    metrics.observe("dwell", 0.003)
+    metrics.observe("dwell", 3)
+    metrics.observe("dwell", 1000)
+
+    histogram = metrics.snapshot()["dwell"]
+
+    assert histogram.count == 3
+    assert histogram.sum == pytest.approx(1003.003)
+    assert histogram.max == 1000
+    assert histogram.counts[BUCKETS.index(0.005)] == 1
+    assert histogram.counts[BUCKETS.index(5)] == 1
+    assert histogram.counts[-1] == 1
+
+
+def test_timer_records_even_on_error():
+    metrics = Metrics()
+
+    with pytest.raises(ValueError):
+        with metrics.timer("command"):
+            raise ValueError
+
+    assert metrics.snapshot()["command"].count == 1
+
+
+def test_timed_wrappers_pass_through():
+    metrics = Metrics()
+    teleporter = FakeTeleporter()
+
+    assert TimedTeleporter(teleporter, metrics).teleport(x=1, y=2, z=3) == 0.25
+    assert TimedDwell(FakeDwell(), metrics).wait() == 1.5
+
+    assert teleporter.teleports == [(1, 2, 3)]
+    assert set(metrics.snapshot()) == {"command", "dwell"}
+
+
+def test_timers_use_the_runs_clock():
+    now = [0.0]
+    metrics = Metrics(monotonic=lambda: now[0])
+
+    with metrics.timer("render"):
+        now[0] += 2
+
+    run_clock = RunClock(monotonic=lambda: now[0])
+
+    class PausedDwell:
+        def wait(self):
+            now[0] += 1
+            run_clock.pause()
+            now[0] += 10
+            run_clock.resume()
+            now[0] += 1
+            return 12
+
+    TimedDwell(PausedDwell(), metrics, monotonic=run_clock.now).wait()
+
+    assert metrics.snapshot()["render"].sum == 2
+    # The pause is measured on its own, not again as part of the dwell
+    assert metrics.snapshot()["dwell"].sum == 2
+
+
+def test_snapshot_is_a_copy():
+    metrics = Metrics()
+    metrics.observe("render", 0.01)
+
+    snapshot = metrics.snapshot()
+    metrics.observe("render", 0.01)
+
+    assert snapshot["render"].count == 1
+
+
+def test_histogram_quantile():
+    metrics = Metrics()
+    for _ in range(90):
+        metrics.observe("dwell", 0.75)
+    for _ in range(10):
+        metrics.observe("dwell", 4)
+
+    histogram = metrics.snapshot()["dwell"]
+
+    assert 0.5 < histogram_quantile(histogram, 0.5) <= 1
+    assert 2.5 < histogram_quantile(histogram, 0.95) <= 4
+    assert histogram_quantile(histogram, 1) == 4
+
+
+def test_metrics_to_prometheus():
+    metrics = Metrics()
+    metrics.observe("command", 0.002)
+    metrics.observe("command", 0.2)
+
+    text = metrics_to_prometheus(metrics.snapshot())
+
+    assert "# TYPE lod_hopper_phase_seconds histogram" in text
+    assert 'lod_hopper_phase_seconds_bucket{phase="command",le="0.0025"} 1' in text
+    assert 'lod_hopper_phase_seconds_bucket{phase="command",le="0.25"} 2' in text
+    assert 'lod_hopper_phase_seconds_bucket{phase="command",le="+Inf"} 2' in text
+    assert 'lod_hopper_phase_seconds_count{phase="command"} 2' in text
+    assert text.endswith("\n")
+
+
+def test_metrics_export(tmp_path):
+    metrics = Metrics()
+    metrics.observe("dwell", 3)
+
+    metrics_export(metrics, tmp_path, timestamp=10)
+    metrics_export(metrics, tmp_path, timestamp=20)
+
+    lines = (tmp_path / JSON_LINES_NAME).read_text().splitlines()
+    assert [json.loads(line)["time"] for line in lines] == [10, 20]
+    assert json.loads(lines[0])["phases"]["dwell"]["count"] == 1
+
+    assert "lod_hopper_phase_seconds_sum" in (tmp_path / PROMETHEUS_NAME).read_text()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_metrics_summary_lines():
+    metrics = Metrics()
+    metrics.observe("command", 0.5)
+    metrics.observe("dwell", 1.5)
+
+    lines = metrics_summary_lines(metrics.snapshot())
+
+    assert lines[0].startswith("Phase")
+    assert lines[1].startswith("command") and "25%" in lines[1]
+    assert lines[2].startswith("dwell") and "75%" in lines[2]
@@ -0,0 +1,49 @@
+from lod_hopper.plan import (
+    teleport_plan_build,
+    teleport_plan_point,
+    teleport_plan_select,
+)
+from lod_hopper.lod_hopper import get_all_teleporation_rings
+import numpy as np
+import pytest
+
+
+def expected_points(desired_radius, radius_done, blocks_per_tp):
+    for ring_i, ring in enumerate(get_all_teleporation_rings(desired_radius, radius_done, blocks_per_tp)):
+        for side_i, side in enumerate(ring):
+            for coordinate_i, coordinate in enumerate(side.coordinates):
+                yield coordinate, ring_i, side_i, coordinate_i, len(side.coordinates), side.side_info
+
+
+@pytest.mark.parametrize("desired_radius, radius_done, blocks_per_tp", [
+    (3000, 0, 100),
+    (250, 0, 100),
+    (1000, 400, 30),
+    (999, 0, 7),
+    (50, 50, 100),
+    (0, 0, 100),
+])
+def test_plan_matches_rings(desired_radius, radius_done, blocks_per_tp):
+    plan = teleport_plan_build(desired_radius, radius_done, blocks_per_tp)
+    expected = list(expected_points(desired_radius, radius_done, blocks_per_tp))
+
+    assert len(plan) == len(expected)
+    assert plan.x.dtype == np.int32
+
+    for point, (coordinate, ring_i, side_i, coordinate_i, side_length, side_info) in zip([teleport_plan_point(plan, index) for index in range(len(plan))], expected):
+        assert point.coordinate == coordinate
+        assert (point.ring_index, point.side_index, point.coordinate_index) == (ring_i, side_i, coordinate_i)
+        assert point.coordinates_in_side == side_length
+        assert point.side_info == side_info
+
+
+def test_plan_select_drops_empty_rings():
+    plan = teleport_plan_build(300, 0, 100)
+    keep = plan.ring != 1
+
+    selected = teleport_plan_select(plan, keep)
+
+    assert selected.num_rings == 3
+    assert selected.x.tolist() == plan.x[keep].tolist()
+    assert [teleport_plan_point(selected, index).coordinates_in_side for index in range(len(selected))] == \
+        [teleport_plan_point(plan, index).coordinates_in_side for index in np.flatnonzero(keep)]
@@ -0,0 +1,99 @@
+from lod_hopper.plan_cache import (
+    CachedPlan,
+    PlanFileError,
+    plan_cache_key,
+    plan_cache_load,
+    plan_cache_path,
+    plan_cache_store,
+    plan_load,
+    plan_save,
+)
+import lod_hopper.plan_cache as plan_cache
+from lod_hopper.grid_display import grid_data_initialize
+from lod_hopper.plan import teleport_plan_build, teleport_plan_from_points
+import numpy as np
+import pytest
+
+PARAMS = {"desired_radius": 1000, "exclude": 200, "blocks_per_tp": 100, "order": "rings"}
+
+
+def cached_plan(params=PARAMS) -> CachedPlan:
+    plan = teleport_plan_build(params["desired_radius"], params["exclude"], params["blocks_per_tp"])
+    grid = grid_data_initialize(plan.x, plan.z, params["blocks_per_tp"]).grid
+
+    return CachedPlan(plan=plan, cell_size=params["blocks_per_tp"], grid=grid, params=params)
+
+
+def test_save_and_load(tmp_path):
+    cached = cached_plan()
+    path = tmp_path / "plan.npz"
+
+    plan_save(path, cached)
+    loaded = plan_load(path)
+
+    assert loaded == cached
+    assert np.array_equal(loaded.plan.side_offsets, cached.plan.side_offsets)
+    assert loaded.plan.segment_name == "Ring"
+    assert not (tmp_path / "plan.npz.tmp").exists()
+
+    # Readable without LOD Hopper
+    with np.load(path) as arrays:
+        assert np.array_equal(arrays["x"], cached.plan.x)
+
+
+def test_save_and_load_segments(tmp_path):
+    plan = teleport_plan_from_points(np.array([0, 100, 200]), np.array([0, 0, 0]), np.array([0, 0, 1]), segment_name="Row")
+    cached = CachedPlan(plan=plan, cell_size=100, grid=np.ones((1, 3), dtype=np.uint8), params={"order": "serpentine"})
+    plan_save(tmp_path / "plan.npz", cached)
+
+    loaded = plan_load(tmp_path / "plan.npz")
+
+    assert loaded == cached
+    assert not loaded.plan.ring_based and loaded.plan.segment_name == "Row"
+
+
+def test_load_not_a_plan(tmp_path):
+    (tmp_path / "plan.npz").write_bytes(b"not a plan")
+    np.savez(tmp_path / "other.npz", x=np.zeros(3))
+
+    for name in ("plan.npz", "other.npz"):
+        with pytest.raises(PlanFileError):
+            plan_load(tmp_path / name)
+
+
+def test_cache_round_trip(tmp_path):
+    cached = cached_plan()
+
+    assert plan_cache_load(tmp_path, PARAMS) is None
+
+    path = plan_cache_store(tmp_path / "cache", cached)
+
+    assert path == plan_cache_path(tmp_path / "cache", PARAMS)
+    assert plan_cache_load(tmp_path / "cache", PARAMS) == cached
+    assert plan_cache_load(tmp_path / "cache", {**PARAMS, "exclude": 0}) is None
+
+
+def test_cache_key():
+    assert plan_cache_key(PARAMS) == plan_cache_key(dict(reversed(PARAMS.items())))
+    assert plan_cache_key(PARAMS) != plan_cache_key({**PARAMS, "order": "hilbert"})
+
+
+def test_planner_version_invalidates(tmp_path, monkeypatch):
+    plan_cache_store(tmp_path, cached_plan())
+
+    monkeypatch.setattr(plan_cache, "PLANNER_VERSION", plan_cache.PLANNER_VERSION + 1)
+
+    assert plan_cache_load(tmp_path, PARAMS) is None
+
+
+def test_cache_ignores_broken_files(tmp_path):
+    plan_cache_path(tmp_path, PARAMS).write_bytes(b"half a plan")
+
+    assert plan_cache_load(tmp_path, PARAMS) is None
+
+
+def test_cache_checks_params(tmp_path):
+    # A file that somehow ended up under the wrong key
+    plan_save(plan_cache_path(tmp_path, PARAMS), cached_plan({**PARAMS, "exclude": 0}))
+
+    assert plan_cache_load(tmp_path, PARAMS) is None
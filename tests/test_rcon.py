@@ -0,0 +1,144 @@
+from lod_hopper.rcon import (
+    RconClient,
+    RconAuthError,
+    RconTeleporter,
+    encode_packet,
+    decode_packets,
+    parse_address,
+    LOGIN,
+    COMMAND,
+    RESPONSE,
+    AUTH_FAILED_ID,
+)
+import socketserver
+import threading
+import pytest
+
+PASSWORD = "hunter2"
+
+
+class FakeRconHandler(socketserver.BaseRequestHandler):
+    """Answers like a Minecraft server: login, then one response per command."""
+
+    def handle(self):
+        buffer = bytearray()
+        server = self.server
+
+        while True:
+            data = self.request.recv(4096)
+            if not data:
+                return
+
+            buffer += data
+            for request_id, packet_type, body in decode_packets(buffer):
+                if packet_type == LOGIN:
+                    answer_id = request_id if body == PASSWORD else AUTH_FAILED_ID
+                    self.request.sendall(encode_packet(answer_id, COMMAND, ""))
+                    continue
+
+                server.commands.append(body)
+
+                if server.drop_after is not None and len(server.commands) == server.drop_after:
+                    server.drop_after = None
+                    return
+
+                self.request.sendall(encode_packet(request_id, RESPONSE, f"ran {body}"))
+
+
+@pytest.fixture()
+def fake_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeRconHandler)
+    server.daemon_threads = True
+    server.commands = []
+    server.drop_after = None
+
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, password=PASSWORD):
+    host, port = server.server_address
+
+    return RconClient(host=host, port=port, password=password, timeout=2)
+
+
+def test_packet_round_trip():
+    buffer = bytearray(encode_packet(7, COMMAND, "tp a 1 2 3") + encode_packet(8, RESPONSE, ""))
+    buffer += encode_packet(9, RESPONSE, "partial")[:5]
+
+    assert decode_packets(buffer) == [(7, COMMAND, "tp a 1 2 3"), (8, RESPONSE, "")]
+    assert len(buffer) == 5
+
+
+def test_command(fake_server):
+    client = make_client(fake_server)
+
+    response = client.command("tp Steve 1 180 2")
+
+    assert response.body == "ran tp Steve 1 180 2"
+    assert response.latency >= 0
+    assert client.last_latency == response.latency
+
+
+def test_pipelined_commands(fake_server):
+    client = make_client(fake_server)
+    commands = [f"tp Steve {i} 180 {-i}" for i in range(200)]
+
+    responses = client.commands(commands)
+
+    assert [response.body for response in responses] == [f"ran {command}" for command in commands]
+    assert fake_server.commands == commands
+
+
+def test_reconnects_after_drop(fake_server):
+    client = make_client(fake_server)
+    client.command("first")
+
+    fake_server.drop_after = 2
+
+    assert client.command("second").body == "ran second"
+    assert fake_server.commands == ["first", "second", "second"]
+
+
+def test_reconnect_sends_only_unanswered_commands(fake_server):
+    client = make_client(fake_server)
+    fake_server.drop_after = 2
+
+    responses = client.commands(["first", "second", "third"])
+
+    assert [response.body for response in responses] == ["ran first", "ran second", "ran third"]
+    # The first one was answered before the drop, so it isn't run twice
+    assert fake_server.commands == ["first", "second", "second", "third"]
+
+
+def test_wrong_password(fake_server):
+    client = make_client(fake_server, password="wrong")
+
+    with pytest.raises(RconAuthError):
+        client.connect()
+
+
+def test_teleporter(fake_server):
+    teleporter = RconTeleporter(client=make_client(fake_server), player="Steve")
+
+    teleporter.teleport(x=100, y=180, z=-100)
+
+    assert fake_server.commands == ["tp Steve 100 180 -100"]
+
+
+def test_teleporter_in_dimension(fake_server):
+    teleporter = RconTeleporter(client=make_client(fake_server), player="Steve", dimension="minecraft:the_nether")
+
+    teleporter.teleport(x=100, y=120, z=-100)
+
+    assert fake_server.commands == ["execute in minecraft:the_nether run tp Steve 100 120 -100"]
+
+
+def test_parse_address():
+    assert parse_address("localhost") == ("localhost", 25575)
+    assert parse_address("10.0.0.2:1234") == ("10.0.0.2", 1234)
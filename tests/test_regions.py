@@ -0,0 +1,90 @@
+from lod_hopper.regions import (
+    WorldDimension,
+    read_region_header,
+    region_dir_for,
+    scan_region_dir,
+    scan_for_points,
+    all_chunks_present,
+    count_present,
+)
+from lod_hopper.plan import teleport_plan_build
+from region_files import full_region, write_region
+import numpy as np
+import pytest
+
+
+def test_read_region_header(tmp_path):
+    write_region(tmp_path, 0, 0, {(0, 0), (31, 2)}, timestamp=123)
+
+    present, timestamps = read_region_header(tmp_path / "r.0.0.mca")
+
+    assert present.sum() == 2
+    assert present[0, 0] and present[2, 31]
+    assert timestamps[2, 31] == 123
+
+
+def test_empty_region_file(tmp_path):
+    (tmp_path / "r.0.0.mca").write_bytes(b"")
+
+    present, _ = read_region_header(tmp_path / "r.0.0.mca")
+
+    assert not present.any()
+
+
+def test_scan_region_dir(tmp_path):
+    write_region(tmp_path, -1, 0, {(31, 0)})
+    write_region(tmp_path, 0, -1, {(0, 31)})
+    write_region(tmp_path, 5, 5, {(0, 0)})  # Outside the rectangle
+    (tmp_path / "notes.txt").write_text("not a region")
+
+    presence = scan_region_dir(tmp_path, -32, -32, 31, 31)
+
+    assert presence.region_files_read == 2
+    assert presence.present.sum() == 2
+    assert presence.present[0 - presence.min_chunk_z, -1 - presence.min_chunk_x]
+    assert presence.present[-1 - presence.min_chunk_z, 0 - presence.min_chunk_x]
+
+
+def test_missing_region_dir(tmp_path):
+    presence = scan_region_dir(tmp_path / "nope", 0, 0, 10, 10)
+
+    assert not presence.present.any()
+
+
+def test_all_chunks_present(tmp_path):
+    full_region(tmp_path, 0, 0)
+    x = np.array([100, 500, 600, -10])
+    z = np.array([100, 100, 100, 100])
+
+    presence = scan_for_points(tmp_path, x, z, 50)
+
+    # Region 0,0 spans blocks 0..511
+    assert all_chunks_present(presence, x, z, 50).tolist() == [True, False, False, False]
+
+    present, total = count_present(presence, x, z, 50)
+    assert total.tolist() == [49] * 4
+    assert present[1] == 28
+
+
+def test_skip_generated_plan_points(tmp_path):
+    for region_x in (-1, 0):
+        for region_z in (-1, 0):
+            full_region(tmp_path, region_x, region_z)
+
+    plan = teleport_plan_build(1000, 0, 100)
+    presence = scan_for_points(tmp_path, plan.x, plan.z, 50)
+    generated = all_chunks_present(presence, plan.x, plan.z, 50)
+
+    # Everything within 512 blocks of spawn is generated
+    inside = (np.abs(plan.x) + 50 < 512) & (np.abs(plan.z) + 50 < 512)
+    assert generated.tolist() == inside.tolist()
+    assert generated.any()
+
+
+@pytest.mark.parametrize("dimension, folder", [
+    (WorldDimension.overworld, "region"),
+    (WorldDimension.nether, "DIM-1/region"),
+    (WorldDimension.end, "DIM1/region"),
+])
+def test_region_dir_for(tmp_path, dimension, folder):
+    assert region_dir_for(tmp_path, dimension) == tmp_path / folder
@@ -0,0 +1,86 @@
+from lod_hopper.renderer import (
+    FrameRenderer,
+    display_width,
+    clip_line,
+    line_diff,
+    frame_diff,
+    render_frame,
+    move_cursor,
+    CLEAR_SCREEN,
+    CLEAR_TO_END_OF_LINE,
+)
+import io
+import os
+import pytest
+
+
+def test_display_width():
+    assert display_width("abc") == 3
+    assert display_width("⬛⬜  ") == 6
+    assert display_width("\033[1mProgress\033[0m") == 8
+
+
+def test_clip_line():
+    assert clip_line("⬛⬛⬛", 4) == "⬛⬛"
+    assert clip_line("⬛⬛⬛", 5) == "⬛⬛"
+    assert clip_line("abc", 10) == "abc"
+
+
+def test_line_diff_single_cell():
+    # Only the changed cell is rewritten, starting at its column
+    assert line_diff(3, "⬛⬛⬛⬛", "⬛⬜⬛⬛") == move_cursor(3, 2) + "⬜"
+
+
+def test_line_diff_shorter_line_is_cleared():
+    assert line_diff(0, "Total (10:00 left)", "Total (9:59 left)") == move_cursor(0, 7) + "9:59 left)" + CLEAR_TO_END_OF_LINE
+
+
+def test_frame_diff_unchanged():
+    assert frame_diff(["a", "b"], ["a", "b"]) == ""
+
+
+def test_frame_diff_removed_lines():
+    assert frame_diff(["a", "b"], ["a"]) == move_cursor(1, 0) + CLEAR_TO_END_OF_LINE
+
+
+@pytest.fixture()
+def terminal_size(monkeypatch):
+    size = os.terminal_size((80, 24))
+    monkeypatch.setattr("shutil.get_terminal_size", lambda: size)
+
+    return size
+
+
+def test_render_frame_incremental(terminal_size):
+    stream = io.StringIO()
+    renderer = FrameRenderer(stream=stream)
+
+    render_frame(renderer, ["⬛⬛", "x"])
+    assert stream.getvalue().startswith(move_cursor(0, 0) + CLEAR_SCREEN)
+
+    stream.truncate(0)
+    stream.seek(0)
+    render_frame(renderer, ["⬜⬛", "x"])
+    assert stream.getvalue() == move_cursor(0, 0) + "⬜" + move_cursor(2, 0)
+
+    stream.truncate(0)
+    stream.seek(0)
+    render_frame(renderer, ["⬜⬛", "x"])
+    assert stream.getvalue() == ""
+
+
+def test_render_frame_redraws_on_resize(monkeypatch, terminal_size):
+    stream = io.StringIO()
+    renderer = FrameRenderer(stream=stream)
+    render_frame(renderer, ["a"])
+
+    monkeypatch.setattr("shutil.get_terminal_size", lambda: os.terminal_size((100, 30)))
+    stream.truncate(0)
+    stream.seek(0)
+    render_frame(renderer, ["a"])
+
+    assert CLEAR_SCREEN in stream.getvalue()
+
+
+def test_clip_styled_line():
+    assert clip_line("\033[1mProgress\033[0m", 4) == "\033[1mProg\033[0m"
@@ -0,0 +1,118 @@
+from lod_hopper.shapes import (
+    Circle,
+    Polygon,
+    Region,
+    Square,
+    polygon_load,
+    region_is_square,
+    region_mask,
+    region_plan_select,
+    region_square,
+    shape_contains,
+    shape_distance,
+)
+from lod_hopper.plan import teleport_plan_build, teleport_plan_point
+from lod_hopper.grid_display import EXCLUDED, UNVISITED, grid_data_initialize
+import numpy as np
+import pytest
+
+L_SHAPE = Polygon(np.array([(-500, -500), (800, -500), (800, 0), (0, 0), (0, 600), (-500, 600)], dtype=np.float64))
+
+
+def test_shape_contains():
+    x = np.array([0, 99, 100, 101, 70, 72, 500])
+    z = np.array([0, 0, 0, 0, 70, 72, 500])
+
+    assert shape_contains(Circle(100), x, z).tolist() == [True, True, True, False, True, False, False]
+    assert shape_contains(Square(100), x, z).tolist() == [True, True, True, False, True, True, False]
+    assert shape_contains(Circle(100, center_x=500, center_z=500), x, z).tolist() == [False] * 6 + [True]
+
+
+def test_polygon_contains_concave():
+    x = np.array([-250, 400, 400, 200, 900])
+    z = np.array([300, -250, 300, 200, 0])
+
+    assert shape_contains(L_SHAPE, x, z).tolist() == [True, True, False, False, False]
+
+
+@pytest.mark.parametrize("shape, x, z, expected", [
+    (Square(100), [150, 90, 150], [0, 0, 150], [50, -10, 50 * np.sqrt(2)]),
+    (Circle(100, center_x=10), [10, 210], [0, 0], [-100, 100]),
+    (L_SHAPE, [-600, -450, 100, 900], [0, 0, 100, 100], [100, -50, 100, 100 * np.sqrt(2)]),
+])
+def test_shape_distance(shape, x, z, expected):
+    assert shape_distance(shape, np.array(x), np.array(z)) == pytest.approx(expected)
+
+
+def test_polygon_load(tmp_path):
+    path = tmp_path / "area.txt"
+    path.write_text("# Spawn\n-10,-10\n10 -10\n\n10, 10  # corner\n")
+
+    assert polygon_load(path) == Polygon(np.array([(-10, -10), (10, -10), (10, 10)], dtype=np.float64))
+
+
+@pytest.mark.parametrize("text", ["1,2\n3,4\n", "1,2\n3,4\nfive,6\n", "1,2,3\n3,4\n5,6\n"])
+def test_polygon_load_invalid(tmp_path, text):
+    path = tmp_path / "area.txt"
+    path.write_text(text)
+
+    with pytest.raises(ValueError):
+        polygon_load(path)
+
+
+def test_circle_saves_the_corners():
+    plan = teleport_plan_build(10000, 0, 100)
+
+    keep = region_mask(Region(Circle(10000)), plan.x, plan.z, 100)
+
+    # A circle is pi/4 of its square, give or take the cells on its edge
+    assert 0.77 < keep.mean() < 0.8
+
+
+def test_region_mask_leaves_no_holes():
+    region = Region(Circle(3000), Circle(1000))
+    plan = teleport_plan_build(3000, 0, 100)
+    keep = region_mask(region, plan.x, plan.z, 100)
+
+    # Every block of the area is within the cell of a kept teleport
+    grid_x, grid_z = np.meshgrid(np.arange(-3000, 3001, 25), np.arange(-3000, 3001, 25))
+    grid_x, grid_z = grid_x.ravel(), grid_z.ravel()
+    wanted = shape_contains(region.outer, grid_x, grid_z) & ~shape_contains(region.inner, grid_x, grid_z)
+
+    kept_x, kept_z = plan.x[keep], plan.z[keep]
+    for block_x, block_z in zip(grid_x[wanted], grid_z[wanted]):
+        assert np.any((np.abs(kept_x - block_x) <= 50) & (np.abs(kept_z - block_z) <= 50))
+
+    # And nothing deep inside the excluded middle is visited
+    assert not np.any(np.hypot(kept_x, kept_z) < 900)
+
+
+def test_region_plan_select():
+    region = Region(L_SHAPE)
+    center_x, center_z, radius = region_square(region, align=16, step=100)
+
+    assert (center_x, center_z, radius) == (144, 48, 700)
+
+    plan = region_plan_select(region, teleport_plan_build(radius, 0, 100), 100, center_x, center_z)
+
+    assert np.all(shape_distance(L_SHAPE, plan.x, plan.z) <= 50 * np.sqrt(2))
+    assert plan.ring_based
+
+    # Still walked ring by ring, side by side
+    points = [teleport_plan_point(plan, index) for index in range(len(plan))]
+    assert [point.index for point in points] == list(range(len(plan)))
+    assert all(point.coordinate_index < point.coordinates_in_side for point in points)
+    assert points[-1].ring_index == plan.num_rings - 1
+
+    # Only the L is drawn, a cell for every point (ring corners are visited twice)
+    grid = grid_data_initialize(plan.x, plan.z, 100).grid
+    assert np.count_nonzero(grid == UNVISITED) == len(np.unique(np.stack([plan.x, plan.z]), axis=1).T)
+    assert grid[0, 0] == EXCLUDED
+
+
+def test_region_is_square():
+    assert region_is_square(Region(Square(100)))
+    assert region_is_square(Region(Square(100), Square(50)))
+    assert not region_is_square(Region(Square(100), Circle(50)))
+    assert not region_is_square(Region(Circle(100)))
+    assert not region_is_square(Region(Square(100, center_x=16)))
@@ -0,0 +1,75 @@
+from lod_hopper.clock import VirtualClock
+from lod_hopper.simulate import (
+    RecordingInputSink,
+    TraceEvent,
+    parse_pause,
+    schedule_key_presses,
+    trace_commands,
+    trace_write,
+)
+import json
+import pytest
+
+
+def test_recording_input_sink():
+    clock = VirtualClock()
+    sink = RecordingInputSink(clock, pause_seconds=0.1)
+
+    sink.press("t")
+    sink.typewrite("/tp 1 2 3")
+    sink.press("enter")
+
+    assert sink.trace == [
+        TraceEvent(0, "press", "t"),
+        TraceEvent(0.1, "type", "/tp 1 2 3"),
+        TraceEvent(0.2, "press", "enter"),
+    ]
+    assert clock.monotonic() == pytest.approx(0.3)
+    assert trace_commands(sink.trace) == [TraceEvent(0.1, "type", "/tp 1 2 3")]
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("60:30", (60, 30)),
+    (" 1.5 : 2 ", (1.5, 2)),
+])
+def test_parse_pause(spec, expected):
+    assert parse_pause(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["60", "a:b", "-1:5", ""])
+def test_parse_pause_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_pause(spec)
+
+
+def test_schedule_key_presses():
+    clock = VirtualClock()
+    sink = RecordingInputSink(clock)
+    paused = [True]
+
+    def toggle():
+        paused[0] = not paused[0]
+
+    schedule_key_presses(clock, sink, [(10, 5)], toggle)
+
+    clock.sleep(0)
+    assert not paused[0]
+
+    clock.sleep(12)
+    assert paused[0]
+
+    clock.sleep(3)
+    assert not paused[0]
+    assert [event.time for event in sink.trace] == [0, 10, 15]
+
+
+def test_trace_write(tmp_path):
+    trace = [TraceEvent(0, "hotkey", "ctrl+p"), TraceEvent(3.2, "type", "/tp 0 180 0")]
+
+    trace_write(tmp_path / "trace.jsonl", trace)
+
+    lines = (tmp_path / "trace.jsonl").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"time": 0, "action": "hotkey", "detail": "ctrl+p"},
+        {"time": 3.2, "action": "type", "detail": "/tp 0 180 0"},
+    ]
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import struct
+import urllib.error
+import urllib.request
+import zlib
+from datetime import timedelta
+import numpy as np
+import pytest
+from lod_hopper.control import RunControl
+from lod_hopper.grid_display import grid_data_add_visited, grid_data_initialize
+from lod_hopper.lod_hopper import PlayerPosition, ScreenUpdate
+from lod_hopper.metrics import Metrics
+from lod_hopper.schemas import Coordinate, SideInfo
+from lod_hopper.status_server import PALETTE, StatusBoard, _request_is_local, grid_png, png_encode, status_server_start
+
+
+def png_decode(png: bytes):
+    """Size, palette, transparency and pixels of a palette PNG without filters."""
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks = {}
+    position = 8
+
+    while position < len(png):
+        (length,) = struct.unpack(">I", png[position:position + 4])
+        kind = png[position + 4:position + 8]
+        data = png[position + 8:position + 8 + length]
+        assert struct.unpack(">I", png[position + 8 + length:position + 12 + length])[0] == zlib.crc32(kind + data)
+        chunks[kind] = data
+        position += 12 + length
+
+    width, height, depth, color_type = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+    assert (depth, color_type) == (8, 3)
+    rows = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(height, width + 1)
+    assert not rows[:, 0].any()
+
+    return chunks[b"PLTE"], chunks[b"tRNS"], rows[:, 1:]
+
+
+@pytest.fixture()
+def grid_data():
+    x, z = np.meshgrid(np.arange(-200, 300, 100, dtype=np.int32), np.arange(-200, 300, 100, dtype=np.int32))
+    grid_data = grid_data_initialize(x.ravel(), z.ravel(), 100)
+
+    for index in range(7):
+        grid_data_add_visited(grid_data, index)
+
+    return grid_data
+
+
+def screen_update(grid_data, **changes) -> ScreenUpdate:
+    return ScreenUpdate(**{
+        "time_estimate": timedelta(seconds=90),
+        "estimate_string": "2 minutes",
+        "ring_index": 1,
+        "side_index": 2,
+        "coordinate_index": 3,
+        "total_rings": 3,
+        "coordinates_in_side": 4,
+        "coordinate": Coordinate(x=200, z=200),
+        "side_info": SideInfo.south,
+        "grid_data": grid_data,
+        "times_teleported": 7,
+        "num_coordinates": 25,
+        "is_visualization_on": False,
+        "command_latency": 0.25,
+        **changes,
+    })
+
+
+def test_png_encode():
+    indexed = np.array([[0, 1, 2], [3, 4, 1]], dtype=np.uint8)
+
+    plte, trns, pixels = png_decode(png_encode(indexed, PALETTE, transparent=(0,)))
+
+    assert np.array_equal(pixels, indexed)
+    assert plte[3:6] == bytes(PALETTE[1])
+    assert list(trns) == [0, 255, 255, 255, 255]
+
+
+def test_grid_png(grid_data):
+    _, _, pixels = png_decode(grid_png(grid_data.grid, players=[(0, 0), (99, 0)]))
+
+    # 5 cells across, scaled up to at least 512 pixels
+    assert pixels.shape == (510, 510)
+    expected = grid_data.grid.copy()
+    expected[0, 0] = 3
+    assert np.array_equal(pixels[::102, ::102], expected)
+
+
+def test_status_board(grid_data):
+    metrics = Metrics()
+    metrics.observe("dwell", 2)
+    board = StatusBoard(metrics)
+
+    assert board.status()["started"] is False
+    assert board.png() is None
+
+    players = (PlayerPosition("Alex", Coordinate(x=-200, z=-200), 3), PlayerPosition("Steve", None, 0))
+    board.post(screen_update(grid_data, player_positions=players, teleports_per_minute=12.5), paused=True)
+    status = board.status()
+
+    assert status["paused"] is True
+    assert "grid_data" not in status
+    assert status["time_estimate"] == 90
+    assert status["side_info"] == "south"
+    assert status["coordinate"] == {"x": 200, "z": 200}
+    assert status["player_positions"][0] == {"name": "Alex", "coordinate": {"x": -200, "z": -200}, "times_teleported": 3}
+    assert status["teleports_per_minute"] == 12.5
+    assert status["phases"]["dwell"] == {"count": 1, "seconds": 2, "max_seconds": 2}
+    json.dumps(status)
+
+    # Made once per frame
+    png = board.png()
+    assert board.png() is png
+    _, _, pixels = png_decode(png)
+    assert pixels[0, 0] == 3 and pixels[-1, -1] == 3
+
+    grid_data_add_visited(grid_data, 20)
+    board.post(screen_update(grid_data), paused=False)
+    assert board.png() != png
+
+
+def test_markers_follow_the_map(grid_data):
+    board = StatusBoard()
+    # A job in a dimension the map draws 400 blocks further west than it really is
+    players = (PlayerPosition("Alex", Coordinate(x=200, z=-200), 3), PlayerPosition("Steve", None, 0))
+    board.post(screen_update(grid_data, coordinate=Coordinate(x=600, z=200), player_positions=players, map_offset_x=-400), paused=False)
+
+    _, _, pixels = png_decode(board.png())
+
+    assert pixels[0, 0] == 3 and pixels[-1, -1] == 3
+    # The status keeps the real coordinates
+    assert board.status()["coordinate"] == {"x": 600, "z": 200}
+
+
+def test_status_server(grid_data):
+    board = StatusBoard()
+    calls = []
+    server = status_server_start(0, board, on_pause=lambda: calls.append("pause"), on_resume=lambda: calls.append("resume"))
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/map.png")
+        assert error.value.code == 503
+
+        board.post(screen_update(grid_data), paused=False)
+
+        with urllib.request.urlopen(f"{url}/status.json") as response:
+            assert json.load(response)["times_teleported"] == 7
+
+        with urllib.request.urlopen(f"{url}/map.png") as response:
+            assert response.headers["Content-Type"] == "image/png"
+            assert png_decode(response.read())[2].shape == (510, 510)
+
+        with urllib.request.urlopen(f"{url}/") as response:
+            assert "/map.png" in response.read().decode()
+
+        urllib.request.urlopen(urllib.request.Request(f"{url}/pause", method="POST"))
+        urllib.request.urlopen(urllib.request.Request(f"{url}/resume", method="POST"))
+        assert calls == ["pause", "resume"]
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(urllib.request.Request(f"{url}/stop", method="POST"))
+        assert error.value.code == 404
+
+        # The page's own buttons work, another site's form doesn't
+        urllib.request.urlopen(urllib.request.Request(f"{url}/pause", method="POST", headers={"Origin": url}))
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(urllib.request.Request(f"{url}/resume", method="POST", headers={"Origin": "http://example.com"}))
+        assert error.value.code == 403
+        assert calls == ["pause", "resume", "pause"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_request_is_local():
+    assert _request_is_local("127.0.0.1:8765", None)
+    assert _request_is_local("localhost:8765", "http://localhost:8765")
+    # Forwarded to another port with ssh -L
+    assert _request_is_local("127.0.0.1:9000", "http://127.0.0.1:9000")
+
+    assert not _request_is_local(None, None)
+    assert not _request_is_local("127.0.0.1:8765", "http://example.com")
+    assert not _request_is_local("127.0.0.1:8765", "null")
+    # A name pointed at 127.0.0.1 by DNS rebinding
+    assert not _request_is_local("rebind.example.com:8765", "http://rebind.example.com:8765")
+
+
+def test_status_server_pauses_the_run():
+    async def pause_over_http():
+        loop = asyncio.get_running_loop()
+        control = RunControl()
+        server = status_server_start(
+            0,
+            StatusBoard(),
+            on_pause=lambda: loop.call_soon_threadsafe(control.pause),
+            on_resume=lambda: loop.call_soon_threadsafe(control.resume),
+        )
+        url = f"http://127.0.0.1:{server.server_address[1]}/pause"
+
+        try:
+            await loop.run_in_executor(None, lambda: urllib.request.urlopen(urllib.request.Request(url, method="POST")).read())
+            await asyncio.sleep(0)
+
+            return control.paused
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    assert asyncio.run(pause_over_http())
@@ -0,0 +1,73 @@
+from lod_hopper.traversal import (
+    Traversal,
+    hilbert_index,
+    traversal_reorder,
+    traversal_stats,
+    REGION_SIZE,
+)
+from lod_hopper.plan import teleport_plan_build, teleport_plan_point
+import numpy as np
+import pytest
+
+
+def test_hilbert_index():
+    column, row = np.meshgrid(np.arange(4), np.arange(4))
+
+    assert hilbert_index(column.ravel(), row.ravel()).reshape(4, 4).tolist() == [
+        [0, 1, 14, 15],
+        [3, 2, 13, 12],
+        [4, 7, 8, 11],
+        [5, 6, 9, 10],
+    ]
+
+
+@pytest.mark.parametrize("traversal", [Traversal.hilbert, Traversal.serpentine, Traversal.region])
+def test_reorder_keeps_every_point(traversal):
+    plan = teleport_plan_build(2000, 0, 100)
+
+    reordered = traversal_reorder(plan, traversal, 100)
+
+    assert set(zip(reordered.x.tolist(), reordered.z.tolist())) == set(zip(plan.x.tolist(), plan.z.tolist()))
+    # Only the shared ring corners are dropped
+    assert len(reordered) == len(set(zip(plan.x.tolist(), plan.z.tolist())))
+
+
+@pytest.mark.parametrize("traversal", [Traversal.hilbert, Traversal.region])
+def test_region_orders_visit_each_region_once(traversal):
+    plan = traversal_reorder(teleport_plan_build(3000, 0, 100), traversal, 100)
+    regions = set(zip((plan.x // REGION_SIZE).tolist(), (plan.z // REGION_SIZE).tolist()))
+
+    assert traversal_stats(plan).region_switches == len(regions) - 1
+    assert plan.num_rings == len(regions)
+    assert plan.segment_name == "Region"
+
+
+def test_serpentine_is_shortest():
+    plan = teleport_plan_build(3000, 0, 100)
+    serpentine = traversal_reorder(plan, Traversal.serpentine, 100)
+
+    assert traversal_stats(serpentine).path_length == (len(serpentine) - 1) * 100
+    assert serpentine.segment_name == "Row"
+
+
+def test_reordered_plan_segments():
+    plan = traversal_reorder(teleport_plan_build(1000, 0, 100), Traversal.region, 100)
+    points = [teleport_plan_point(plan, index) for index in range(len(plan))]
+
+    assert all(point.side_info is None for point in points)
+    assert [point.ring_index for point in points] == sorted(point.ring_index for point in points)
+    assert sum(point.coordinates_in_side for point in points if point.coordinate_index == 0) == len(plan)
+
+
+def test_traversal_stats():
+    plan = teleport_plan_build(100, 0, 100)
+    stats = traversal_stats(plan)
+
+    assert stats.region_switches > 0
+    assert stats.path_length > 0
+
+
+def test_rings_order_is_unchanged():
+    plan = teleport_plan_build(1000, 0, 100)
+
+    assert traversal_reorder(plan, Traversal.rings, 100) is plan
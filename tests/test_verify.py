@@ -0,0 +1,102 @@
+from lod_hopper.verify import verify_plan, retry_plan_build
+from lod_hopper.plan import teleport_plan_build, teleport_plan_from_points
+from lod_hopper.traversal import Traversal, traversal_points, traversal_stats
+from lod_hopper.grid_display import (
+    MISSING,
+    VISITED,
+    grid_data_initialize,
+    grid_data_add_visited_indices,
+    grid_data_add_missing_indices,
+    grid_data_to_lines,
+)
+from region_files import full_region
+import numpy as np
+import pytest
+
+
+@pytest.fixture()
+def plan():
+    return teleport_plan_build(1000, 0, 100)
+
+
+@pytest.fixture()
+def world(tmp_path):
+    # Everything within 512 blocks of spawn
+    for region_x in (-1, 0):
+        for region_z in (-1, 0):
+            full_region(tmp_path, region_x, region_z)
+
+    return tmp_path
+
+
+def test_verify_plan(plan, world):
+    verification = verify_plan(world, plan, 50)
+
+    inside = (np.abs(plan.x) + 50 < 512) & (np.abs(plan.z) + 50 < 512)
+    assert verification.missing.tolist() == (~inside).tolist()
+    assert verification.num_missing == np.count_nonzero(~inside)
+    assert verification.chunks_missing > 0
+    assert verification.region_files_read == 4
+
+
+def test_verify_only_checked(plan, world):
+    checked = np.array([0, len(plan) - 1])
+
+    verification = verify_plan(world, plan, 50, checked)
+
+    # The outermost ring is missing, the innermost is generated
+    assert np.flatnonzero(verification.missing).tolist() == [0]
+
+
+def test_verify_nothing_missing(plan, world):
+    verification = verify_plan(world, plan, 50, checked=np.array([], dtype=np.int64))
+
+    assert verification.num_missing == 0
+    assert verification.region_files_read == 0
+
+
+def test_retry_plan_build(plan, world):
+    missing = verify_plan(world, plan, 50).missing
+
+    retry = retry_plan_build(plan, missing, 100)
+
+    # Only the holes, each once
+    assert set(zip(retry.plan.x.tolist(), retry.plan.z.tolist())) == set(zip(plan.x[missing].tolist(), plan.z[missing].tolist()))
+    assert len(retry.plan) == len(set(zip(retry.plan.x.tolist(), retry.plan.z.tolist())))
+
+    # Every retry point knows where it was in the plan
+    assert np.array_equal(plan.x[retry.indices], retry.plan.x)
+    assert np.array_equal(plan.z[retry.indices], retry.plan.z)
+    assert missing[retry.indices].all()
+
+    # Ring shaped holes are best flown in ring order
+    hilbert, _ = traversal_points(plan.x[missing], plan.z[missing], Traversal.hilbert, 100)
+    assert traversal_stats(retry.plan).path_length <= traversal_stats(hilbert).path_length
+
+
+def test_retry_plan_scattered_holes(plan):
+    missing = np.random.default_rng(0).random(len(plan)) < 0.1
+
+    retry = retry_plan_build(plan, missing, 100)
+
+    in_plan_order = teleport_plan_from_points(plan.x[missing], plan.z[missing], np.zeros(np.count_nonzero(missing), dtype=np.int64), "Ring")
+    assert traversal_stats(retry.plan).path_length < traversal_stats(in_plan_order).path_length
+    assert missing[retry.indices].all()
+
+
+def test_retry_plan_nothing_missing(plan):
+    retry = retry_plan_build(plan, np.zeros(len(plan), dtype=bool), 100)
+
+    assert len(retry.plan) == 0
+    assert len(retry.indices) == 0
+
+
+def test_missing_on_map(plan, world):
+    grid_data = grid_data_initialize(plan.x, plan.z, 100)
+    grid_data_add_visited_indices(grid_data, np.arange(len(plan)))
+
+    missing = verify_plan(world, plan, 50).missing
+    grid_data_add_missing_indices(grid_data, np.flatnonzero(missing))
+
+    assert set(np.unique(grid_data.grid).tolist()) == {VISITED, MISSING}
+    assert grid_data_to_lines(grid_data)[0] == "🟥" * grid_data.grid.shape[1]
@@ -0,0 +1,96 @@
+from lod_hopper.workers import (
+    partition_plan,
+    WorkStealingQueue,
+    run_workers,
+)
+from lod_hopper.dwell import FixedDwell
+from lod_hopper.control import RunControl
+from lod_hopper.plan import teleport_plan_build
+from dataclasses import replace
+import numpy as np
+import asyncio
+import time
+
+
+class RecordingTeleporter:
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+        self.visited = []
+
+    def teleport(self, x, y, z):
+        time.sleep(self.seconds)
+        self.visited.append((x, y, z))
+
+        return self.seconds
+
+
+def test_partition_plan_covers_everything_once():
+    plan = teleport_plan_build(1000, 0, 100)
+
+    parts = partition_plan(plan, 3)
+
+    assert sorted(np.concatenate(parts).tolist()) == list(range(len(plan)))
+    assert max(map(len, parts)) - min(map(len, parts)) <= 1
+
+    # Each slice keeps the plan order
+    for part in parts:
+        assert np.all(np.diff(part) > 0)
+
+
+def test_partition_plan_is_spatially_coherent():
+    plan = teleport_plan_build(1000, 0, 100)
+
+    for part in partition_plan(plan, 4):
+        angles = np.arctan2(plan.z[part], plan.x[part])
+        assert angles.max() - angles.min() <= np.pi / 2 + 0.3
+
+
+def test_partition_plan_off_origin():
+    plan = teleport_plan_build(1000, 0, 100)
+    far = replace(plan, x=plan.x + 50000, z=plan.z - 120000)
+
+    # The same slices as around the origin, not thin strips pointing back at it
+    for part, far_part in zip(partition_plan(plan, 4), partition_plan(far, 4)):
+        assert np.array_equal(part, far_part)
+
+
+def test_partition_plan_subset():
+    plan = teleport_plan_build(500, 0, 100)
+    indices = np.arange(10, 30)
+
+    assert sorted(np.concatenate(partition_plan(plan, 2, indices)).tolist()) == indices.tolist()
+
+
+def test_work_stealing_takes_far_half():
+    queue = WorkStealingQueue([np.array([1, 2, 3, 4, 5, 6]), np.array([], dtype=int)])
+
+    assert queue.take(1) == 4
+    assert queue.remaining(0) == 3
+    assert queue.remaining(1) == 2
+    assert queue.take(0) == 1
+
+
+def test_run_workers_visits_everything():
+    plan = teleport_plan_build(1000, 0, 100)
+    teleporters = [RecordingTeleporter(0.001), RecordingTeleporter(0.0)]
+    visits = []
+    control = RunControl()
+
+    def on_teleport(worker, index, latency):
+        visits.append((worker, index))
+
+    asyncio.run(run_workers(
+        plan=plan,
+        teleporters=teleporters,
+        dwells=[FixedDwell(seconds=0), FixedDwell(seconds=0)],
+        height=180,
+        on_teleport=on_teleport,
+        wait_running=control.wait_running,
+        sleep=control.sleep,
+    ))
+
+    assert sorted(index for _, index in visits) == list(range(len(plan)))
+
+    # The faster player stole work from the slower one
+    assert len(teleporters[1].visited) > len(partition_plan(plan, 2)[1])
+    assert teleporters[0].visited[0] == (int(plan.x[partition_plan(plan, 2)[0][0]]), 180, int(plan.z[partition_plan(plan, 2)[0][0]]))